@@ -0,0 +1,36 @@
+"""add partial index on active chat invitations
+
+Revision ID: 3b1f6c2d9e7a
+Revises: 141b445acf7d
+Create Date: 2025-07-20 10:12:31.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b1f6c2d9e7a'
+down_revision: Union[str, Sequence[str], None] = '141b445acf7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Частичный индекс для принятия приглашений при входе пользователя
+    op.create_index(
+        'ix_chat_invitations_active_username',
+        'chat_invitations',
+        ['username'],
+        unique=False,
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_invitations_active_username', table_name='chat_invitations')
@@ -0,0 +1,43 @@
+"""add position question bank
+
+Revision ID: 4e8b2c6d0f13
+Revises: 9c3e5f7a1b2d
+Create Date: 2025-08-04 16:41:27.905362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8b2c6d0f13'
+down_revision: Union[str, Sequence[str], None] = '9c3e5f7a1b2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Банк заранее сгенерированных вопросов интервью по позициям
+    op.create_table('position_questions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('position_id', sa.Integer(), nullable=False),
+        sa.Column('quality_id', sa.Integer(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['position_id'], ['positions.id'], ),
+        sa.ForeignKeyConstraint(['quality_id'], ['qualities.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_position_questions_id'), 'position_questions', ['id'], unique=False)
+    op.create_index(op.f('ix_position_questions_position_id'), 'position_questions', ['position_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_position_questions_position_id'), table_name='position_questions')
+    op.drop_index(op.f('ix_position_questions_id'), table_name='position_questions')
+    op.drop_table('position_questions')
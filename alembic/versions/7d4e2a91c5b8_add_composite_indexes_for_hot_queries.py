@@ -0,0 +1,91 @@
+"""add composite and partial indexes for hot query shapes
+
+Revision ID: 7d4e2a91c5b8
+Revises: 3b1f6c2d9e7a
+Create Date: 2025-07-22 14:03:52.117640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e2a91c5b8'
+down_revision: Union[str, Sequence[str], None] = '3b1f6c2d9e7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _create_index(name, table, columns, **kwargs) -> None:
+    """Создает индекс; на PostgreSQL — CONCURRENTLY, без блокировки записи"""
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+    else:
+        op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+
+
+def _drop_index(name, table) -> None:
+    if _is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Обратный поиск участников по chat_id (PK (user_id, chat_id) покрывает прямой)
+    _create_index(
+        'ix_chat_members_chat_id_user_id',
+        'chat_members',
+        ['chat_id', 'user_id'],
+        postgresql_include=['is_admin']
+    )
+
+    # История чата и последнее сообщение: только неудаленные сообщения
+    _create_index(
+        'ix_messages_chat_id_created_at_live',
+        'messages',
+        ['chat_id', 'created_at'],
+        postgresql_where=sa.text('is_deleted = false'),
+        sqlite_where=sa.text('is_deleted = 0')
+    )
+
+    # Активные приглашения по username и чату заменяют индекс только по username
+    _create_index(
+        'ix_chat_invitations_active_username_chat_id',
+        'chat_invitations',
+        ['username', 'chat_id'],
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active = 1')
+    )
+    _drop_index('ix_chat_invitations_active_username', 'chat_invitations')
+
+    # Поиск активного интервью пользователя
+    _create_index(
+        'ix_interviews_user_id_status',
+        'interviews',
+        ['user_id', 'status']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_index('ix_interviews_user_id_status', 'interviews')
+    _create_index(
+        'ix_chat_invitations_active_username',
+        'chat_invitations',
+        ['username'],
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active = 1')
+    )
+    _drop_index('ix_chat_invitations_active_username_chat_id', 'chat_invitations')
+    _drop_index('ix_messages_chat_id_created_at_live', 'messages')
+    _drop_index('ix_chat_members_chat_id_user_id', 'chat_members')
@@ -0,0 +1,128 @@
+"""partition messages by month of created_at
+
+Revision ID: 9c3e5f7a1b2d
+Revises: 7d4e2a91c5b8
+Create Date: 2025-07-29 11:26:08.403917
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5f7a1b2d'
+down_revision: Union[str, Sequence[str], None] = '7d4e2a91c5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько будущих месяцев создавать заранее; дальше партиции
+# создает maintain_message_partitions.py
+MONTHS_AHEAD = 2
+
+FOREIGN_KEYS = (
+    ('messages_chat_id_fkey', 'chat_id', 'chats'),
+    ('messages_sender_id_fkey', 'sender_id', 'users'),
+    ('messages_forward_from_user_id_fkey', 'forward_from_user_id', 'users'),
+    ('messages_forward_from_chat_id_fkey', 'forward_from_chat_id', 'chats'),
+)
+
+
+def _add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _create_live_index() -> None:
+    op.create_index(
+        'ix_messages_chat_id_created_at_live',
+        'messages',
+        ['chat_id', 'created_at'],
+        postgresql_where=sa.text('is_deleted = false')
+    )
+
+
+def _swap_table(new_table_ddl: str, primary_key: str) -> None:
+    """
+    Переименовывает текущую messages, создает новую по ее образцу,
+    переносит последовательность id и внешние ключи
+    """
+    op.execute('ALTER TABLE messages RENAME TO messages_old')
+    op.execute('ALTER TABLE messages_old RENAME CONSTRAINT messages_pkey TO messages_old_pkey')
+    op.execute('ALTER TABLE messages_old DROP CONSTRAINT IF EXISTS messages_reply_to_message_id_fkey')
+    for name, _, _ in FOREIGN_KEYS:
+        op.execute(f'ALTER TABLE messages_old DROP CONSTRAINT IF EXISTS {name}')
+    op.execute('DROP INDEX IF EXISTS ix_messages_id')
+    op.execute('DROP INDEX IF EXISTS ix_messages_chat_id_created_at_live')
+
+    op.execute(new_table_ddl)
+    op.execute(f'ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY ({primary_key})')
+    for name, column, referred in FOREIGN_KEYS:
+        op.execute(
+            f'ALTER TABLE messages ADD CONSTRAINT {name} '
+            f'FOREIGN KEY ({column}) REFERENCES {referred} (id)'
+        )
+    # Иначе последовательность удалится вместе со старой таблицей
+    op.execute('ALTER SEQUENCE messages_id_seq OWNED BY messages.id')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Декларативное секционирование есть только в PostgreSQL
+        return
+
+    op.execute('UPDATE messages SET created_at = now() WHERE created_at IS NULL')
+
+    # Ключ секционирования обязан входить в первичный ключ, поэтому PK
+    # становится (id, created_at), а внешний ключ reply_to_message_id на
+    # секционированную таблицу не переносится (ссылочная целостность ответа
+    # проверяется в API)
+    _swap_table(
+        'CREATE TABLE messages (LIKE messages_old INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (created_at)',
+        'id, created_at'
+    )
+    op.execute('ALTER TABLE messages ALTER COLUMN created_at SET NOT NULL')
+
+    first = bind.execute(sa.text('SELECT min(created_at) FROM messages_old')).scalar()
+    today = datetime.now(timezone.utc).date()
+    month = date((first or today).year, (first or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        end = _add_months(month, 1)
+        op.execute(
+            f'CREATE TABLE messages_p{month.year:04d}{month.month:02d} PARTITION OF messages '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+    # Страховка для строк вне созданных диапазонов
+    op.execute('CREATE TABLE messages_default PARTITION OF messages DEFAULT')
+
+    op.execute('INSERT INTO messages SELECT * FROM messages_old')
+    op.execute('DROP TABLE messages_old')
+
+    op.create_index('ix_messages_id', 'messages', ['id'])
+    _create_live_index()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    _swap_table('CREATE TABLE messages (LIKE messages_old INCLUDING DEFAULTS)', 'id')
+    op.execute('INSERT INTO messages SELECT * FROM messages_old')
+    # DROP секционированной таблицы удаляет и все ее партиции
+    op.execute('DROP TABLE messages_old')
+    # NOT VALID: ответы могут ссылаться на уже архивированные сообщения
+    op.execute(
+        'ALTER TABLE messages ADD CONSTRAINT messages_reply_to_message_id_fkey '
+        'FOREIGN KEY (reply_to_message_id) REFERENCES messages (id) NOT VALID'
+    )
+
+    op.create_index('ix_messages_id', 'messages', ['id'])
+    _create_live_index()
@@ -0,0 +1,28 @@
+"""add interview scoring claim
+
+Revision ID: a4c8e2f6b1d9
+Revises: f1a7c3e9b5d2
+Create Date: 2025-08-19 10:12:44.803215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e2f6b1d9'
+down_revision: Union[str, Sequence[str], None] = 'f1a7c3e9b5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('interviews', sa.Column('scoring_claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('interviews', 'scoring_claimed_at')
@@ -0,0 +1,41 @@
+"""add llm response cache
+
+Revision ID: b5d17e3a9c42
+Revises: 4e8b2c6d0f13
+Create Date: 2025-08-07 12:18:45.230871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d17e3a9c42'
+down_revision: Union[str, Sequence[str], None] = '4e8b2c6d0f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Кэш ответов LLM по хэшу модели, параметров и промпта
+    op.create_table('llm_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('response', sa.Text(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_llm_cache_last_used_at'), 'llm_cache', ['last_used_at'], unique=False)
+    op.create_index(op.f('ix_llm_cache_expires_at'), 'llm_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_llm_cache_expires_at'), table_name='llm_cache')
+    op.drop_index(op.f('ix_llm_cache_last_used_at'), table_name='llm_cache')
+    op.drop_table('llm_cache')
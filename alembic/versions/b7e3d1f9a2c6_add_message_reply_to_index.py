@@ -0,0 +1,70 @@
+"""add partial index on messages.reply_to_message_id
+
+Revision ID: b7e3d1f9a2c6
+Revises: a4c8e2f6b1d9
+Create Date: 2025-08-21 09:47:15.226904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3d1f9a2c6'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e2f6b1d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = 'ix_messages_reply_to_message_id'
+PREDICATE = 'reply_to_message_id IS NOT NULL'
+
+
+def _partitions(bind) -> list:
+    """Партиции messages; пустой список, если таблица не секционирована"""
+    return [row[0] for row in bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'messages' ORDER BY c.relname"
+    ))]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Проверка «на сообщение еще отвечают» при очистке удаленных сообщений
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.create_index(INDEX_NAME, 'messages', ['reply_to_message_id'], if_not_exists=True,
+                        sqlite_where=sa.text(PREDICATE))
+        return
+
+    partitions = _partitions(bind)
+    with op.get_context().autocommit_block():
+        if not partitions:
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} '
+                       f'ON messages (reply_to_message_id) WHERE {PREDICATE}')
+            return
+
+        # На секционированной таблице CONCURRENTLY недоступен: индекс родителя
+        # создается пустым (ON ONLY), индексы партиций строятся без блокировки
+        # записи и присоединяются, после чего индекс родителя становится валидным
+        op.execute(f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+                   f'ON ONLY messages (reply_to_message_id) WHERE {PREDICATE}')
+        for partition in partitions:
+            child = f'{partition}_reply_to_message_id_idx'
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {child} '
+                       f'ON {partition} (reply_to_message_id) WHERE {PREDICATE}')
+            op.execute(f'ALTER INDEX {INDEX_NAME} ATTACH PARTITION {child}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.drop_index(INDEX_NAME, table_name='messages', if_exists=True)
+        return
+
+    # Индексы партиций удаляются вместе с индексом родителя
+    op.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
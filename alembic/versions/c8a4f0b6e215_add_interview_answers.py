@@ -0,0 +1,77 @@
+"""move interview answers to interview_answers table
+
+Revision ID: c8a4f0b6e215
+Revises: b5d17e3a9c42
+Create Date: 2025-08-11 09:52:14.671309
+
+"""
+from typing import Sequence, Union
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8a4f0b6e215'
+down_revision: Union[str, Sequence[str], None] = 'b5d17e3a9c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+interviews = sa.table(
+    'interviews',
+    sa.column('id', sa.Integer),
+    sa.column('answers', sa.JSON)
+)
+
+interview_answers = sa.table(
+    'interview_answers',
+    sa.column('interview_id', sa.Integer),
+    sa.column('question_index', sa.Integer),
+    sa.column('answer', sa.Text)
+)
+
+
+def _load(value):
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or {}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Ответ на каждый вопрос — отдельная строка, сохраняемая upsert'ом
+    op.create_table('interview_answers',
+        sa.Column('interview_id', sa.Integer(), nullable=False),
+        sa.Column('question_index', sa.Integer(), nullable=False),
+        sa.Column('answer', sa.Text(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['interview_id'], ['interviews.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('interview_id', 'question_index')
+    )
+
+    # Переносим ответы из JSON колонки и очищаем ее
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(interviews.c.id, interviews.c.answers).where(interviews.c.answers.isnot(None)))
+    values = [
+        {"interview_id": interview_id, "question_index": int(index), "answer": str(answer)}
+        for interview_id, answers in rows
+        for index, answer in _load(answers).items()
+    ]
+    if values:
+        op.bulk_insert(interview_answers, values)
+    op.execute(interviews.update().values(answers=None))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    aggregated = {}
+    for interview_id, question_index, answer in bind.execute(sa.select(
+        interview_answers.c.interview_id, interview_answers.c.question_index, interview_answers.c.answer
+    )):
+        aggregated.setdefault(interview_id, {})[str(question_index)] = answer
+    for interview_id, answers in aggregated.items():
+        bind.execute(interviews.update().where(interviews.c.id == interview_id).values(answers=answers))
+
+    op.drop_table('interview_answers')
@@ -0,0 +1,41 @@
+"""add position interview stats rollup
+
+Revision ID: d3f9a1c7e5b0
+Revises: c8a4f0b6e215
+Create Date: 2025-08-12 15:07:33.418526
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f9a1c7e5b0'
+down_revision: Union[str, Sequence[str], None] = 'c8a4f0b6e215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Агрегаты завершенных интервью по позициям; заполняются командой
+    # python rebuild_position_stats.py
+    op.create_table('position_interview_stats',
+        sa.Column('position_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.Integer(), nullable=False),
+        sa.Column('interviews', sa.Integer(), nullable=False),
+        sa.Column('passed', sa.Integer(), nullable=False),
+        sa.Column('percentage_sum', sa.Float(), nullable=False),
+        sa.Column('duration_sum', sa.Float(), nullable=False),
+        sa.Column('duration_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['position_id'], ['positions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('position_id', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('position_interview_stats')
@@ -0,0 +1,37 @@
+"""unique position quality pairs
+
+Revision ID: e6b2d8f4a0c3
+Revises: d3f9a1c7e5b0
+Create Date: 2025-08-13 10:26:41.905217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b2d8f4a0c3'
+down_revision: Union[str, Sequence[str], None] = 'd3f9a1c7e5b0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Удаляем повторные связи, оставляя самую раннюю
+    op.execute(
+        "DELETE FROM position_qualities WHERE id NOT IN ("
+        "SELECT MIN(id) FROM position_qualities GROUP BY position_id, quality_id)"
+    )
+    op.create_unique_constraint(
+        'uq_position_qualities_position_id_quality_id',
+        'position_qualities',
+        ['position_id', 'quality_id']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_position_qualities_position_id_quality_id', 'position_qualities', type_='unique')
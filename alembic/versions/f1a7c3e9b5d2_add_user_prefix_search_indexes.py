@@ -0,0 +1,33 @@
+"""add user prefix search indexes
+
+Revision ID: f1a7c3e9b5d2
+Revises: e6b2d8f4a0c3
+Create Date: 2025-08-14 11:38:02.557190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a7c3e9b5d2'
+down_revision: Union[str, Sequence[str], None] = 'e6b2d8f4a0c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индексы для lower(column) LIKE 'prefix%' в GET /users/search;
+    # text_pattern_ops нужен PostgreSQL при локали, отличной от C
+    ops = " text_pattern_ops" if op.get_bind().dialect.name == "postgresql" else ""
+    op.create_index('ix_users_username_lower', 'users', [sa.text(f'lower(username){ops}')], unique=False)
+    op.create_index('ix_users_first_name_lower', 'users', [sa.text(f'lower(first_name){ops}')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_first_name_lower', table_name='users')
+    op.drop_index('ix_users_username_lower', table_name='users')
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import exc
-from typing import List
+from typing import List, Optional, Set, Tuple
+from datetime import datetime
 import logging
-from app.database import get_db
+from app.database import get_db, insert_ignore
 from app.auth.dependencies import get_current_user
 from app.models import User, Position, Quality, PositionQuality, Interview
-from app.schemas.position import PositionCreate, PositionUpdate, Position as PositionSchema, PositionWithQualities
+from app.schemas.position import PositionCreate, PositionUpdate, Position as PositionSchema, PositionWithQualities, PositionAnalytics
 from app.schemas.quality import QualityCreate, Quality as QualitySchema
-from app.schemas.interview import Interview as InterviewSchema, InterviewWithUser
-from app.schemas.user import User as UserSchema
+from app.schemas.interview import Interview as InterviewSchema, InterviewWithUser, InterviewSummary, InterviewsPage
+from app.schemas.user import User as UserSchema, UserSummary, UsersPage
+from app.services.question_bank import build_question_bank, invalidate_question_bank, positions_with_quality
+from app.services.llm_cache import cache_stats
+from app.services.export import EXPORT_FORMATS, iter_export
+from app.services.analytics import position_analytics
+from app.services.public_positions import invalidate_public_positions
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -25,19 +32,127 @@ def check_admin_permissions(current_user: User = Depends(get_current_user)):
 
 # User management endpoints
 
-@router.get("/users", response_model=List[UserSchema])
+USER_COLUMNS = (
+    User.id,
+    User.telegram_id,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.language_code,
+    User.is_premium,
+    User.is_admin,
+    User.profile_photo_url,
+    User.bio,
+    User.is_active,
+    User.created_at,
+    User.updated_at,
+)
+
+INTERVIEW_COLUMNS = (
+    Interview.id,
+    Interview.user_id,
+    Interview.position_id,
+    Interview.status,
+    Interview.score,
+    Interview.max_score,
+    Interview.started_at,
+    Interview.completed_at,
+)
+
+
+def parse_id_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Курсор списков администратора — id последнего элемента предыдущей страницы"""
+    if cursor is None:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def filter_users(query, is_admin: Optional[bool], is_active: Optional[bool],
+                 created_from: Optional[datetime], created_to: Optional[datetime]):
+    if is_admin is not None:
+        query = query.filter(User.is_admin == is_admin)
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    if created_from is not None:
+        query = query.filter(User.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(User.created_at < created_to)
+    return query
+
+
+def filter_interviews(query, status_filter: Optional[str], position_id: Optional[int], user_id: Optional[int],
+                      started_from: Optional[datetime], started_to: Optional[datetime]):
+    if status_filter is not None:
+        query = query.filter(Interview.status == status_filter)
+    if position_id is not None:
+        query = query.filter(Interview.position_id == position_id)
+    if user_id is not None:
+        query = query.filter(Interview.user_id == user_id)
+    if started_from is not None:
+        query = query.filter(Interview.started_at >= started_from)
+    if started_to is not None:
+        query = query.filter(Interview.started_at < started_to)
+    return query
+
+
+def export_response(query, columns, export_format: str, name: str) -> StreamingResponse:
+    fields = [column.key for column in columns]
+    return StreamingResponse(
+        iter_export(query, fields, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+
+@router.get("/users", response_model=UsersPage)
 async def get_users(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    is_admin: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
 ):
-    """Получить список всех пользователей"""
+    """Получить список пользователей: новые первыми, курсорная пагинация и фильтры"""
     try:
-        users = db.query(User).all()
-        return users
+        query = filter_users(db.query(*USER_COLUMNS), is_admin, is_active, created_from, created_to)
+        cursor_id = parse_id_cursor(cursor)
+        if cursor_id is not None:
+            query = query.filter(User.id < cursor_id)
+
+        rows = query.order_by(User.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        users = [UserSummary.model_validate(row._mapping) for row in rows[:limit]]
+        return UsersPage(
+            users=users,
+            next_cursor=str(users[-1].id) if has_more else None,
+            has_more=has_more
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка при получении пользователей: {e}")
         raise HTTPException(status_code=500, detail="Ошибка при получении пользователей")
 
+@router.get("/users/export")
+async def export_users(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    is_admin: Optional[bool] = None,
+    is_active: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_permissions)
+):
+    """Потоковая выгрузка пользователей в NDJSON или CSV"""
+    query = filter_users(db.query(*USER_COLUMNS), is_admin, is_active, created_from, created_to)
+    return export_response(query.order_by(User.id), USER_COLUMNS, export_format, "users")
+
 @router.post("/users/make-admin-by-username")
 async def make_user_admin_by_username(
     username: str,
@@ -69,60 +184,68 @@ async def make_user_admin_by_username(
 
 # Position management endpoints
 
+def sync_position_qualities(db: Session, position_id: int, quality_ids: List[int]) -> Tuple[Set[int], Set[int], List[int]]:
+    """
+    Приводит набор качеств позиции к quality_ids: одна проверка существования
+    через IN, затем пакетные DELETE и INSERT только для разницы. Дубликаты
+    отсекает уникальный индекс (position_id, quality_id).
+    Возвращает (добавленные, удаленные, несуществующие id).
+    """
+    requested = set(quality_ids)
+    valid = {quality_id for (quality_id,) in db.query(Quality.id).filter(Quality.id.in_(requested))} if requested else set()
+    missing = sorted(requested - valid)
+    current = {quality_id for (quality_id,) in db.query(PositionQuality.quality_id).filter(
+        PositionQuality.position_id == position_id
+    )}
+
+    to_remove = current - valid
+    to_add = valid - current
+    if to_remove:
+        db.query(PositionQuality).filter(
+            PositionQuality.position_id == position_id,
+            PositionQuality.quality_id.in_(to_remove)
+        ).delete(synchronize_session=False)
+    if to_add:
+        db.execute(
+            insert_ignore(db, PositionQuality.__table__),
+            [{"position_id": position_id, "quality_id": quality_id, "weight": 1} for quality_id in sorted(to_add)]
+        )
+    return to_add, to_remove, missing
+
+
 @router.post("/positions", response_model=PositionSchema)
 async def create_position(
     position: PositionCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
 ):
     """Создать новую позицию"""
     try:
-        logger.info(f"Создание позиции: {position.dict()}")
-        logger.info(f"Текущий пользователь: {current_user.id} ({current_user.username})")
-
         # Извлекаем quality_ids из данных позиции
         quality_ids = getattr(position, 'quality_ids', []) or []
         position_data = position.dict(exclude={'quality_ids'})
         
-        logger.info(f"Данные позиции: {position_data}")
-        logger.info(f"ID качеств: {quality_ids}")
-        
         # Создаем позицию
         db_position = Position(**position_data)
         db.add(db_position)
         db.flush()  # Получаем ID без коммита
-
-        logger.info(f"Позиция создана с ID: {db_position.id}")
         
         # Добавляем качества к позиции
-        for quality_id in quality_ids:
-            logger.info(f"Добавляем качество {quality_id} к позиции {db_position.id}")
-            # Проверяем, что качество существует
-            quality = db.query(Quality).filter(Quality.id == quality_id).first()
-            if quality:
-                logger.info(f"Качество {quality_id} найдено: {quality.name}")
-                # Проверяем, что связь еще не существует
-                existing = db.query(PositionQuality).filter(
-                    PositionQuality.position_id == db_position.id,
-                    PositionQuality.quality_id == quality_id
-                ).first()
-
-                if not existing:
-                    position_quality = PositionQuality(
-                        position_id=db_position.id,
-                        quality_id=quality_id,
-                        weight=1
-                    )
-                    db.add(position_quality)
-                    logger.info(f"Связь позиция-качество создана")
-                else:
-                    logger.info(f"Связь позиция-качество уже существует")
-            else:
-                logger.warning(f"Качество с ID {quality_id} не найдено")
+        added, _, missing_quality_ids = sync_position_qualities(db, db_position.id, quality_ids)
 
         db.commit()
+        invalidate_public_positions()
         db.refresh(db_position)
-        logger.info(f"Позиция успешно создана и сохранена")
+        if missing_quality_ids:
+            logger.warning("Качества не найдены: position_id=%s quality_ids=%s", db_position.id, missing_quality_ids)
+        logger.info(
+            "Позиция создана: position_id=%s qualities=%d user_id=%s",
+            db_position.id, len(added), current_user.id
+        )
+
+        # Заранее строим банк вопросов для интервью
+        background_tasks.add_task(build_question_bank, db_position.id)
         return db_position
         
     except exc.IntegrityError as e:
@@ -131,9 +254,7 @@ async def create_position(
         raise HTTPException(status_code=400, detail="Позиция с таким названием уже существует")
     except Exception as e:
         db.rollback()
-        logger.error(f"Ошибка при создании позиции: {e}")
-        logger.error(f"Тип ошибки: {type(e)}")
-        logger.error(f"Детали ошибки: {str(e)}")
+        logger.error("Ошибка при создании позиции: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Ошибка при создании позиции: {str(e)}")
 
 @router.get("/positions", response_model=List[PositionWithQualities])
@@ -147,19 +268,11 @@ async def get_positions(
         positions = db.query(Position).options(
             joinedload(Position.qualities).joinedload(PositionQuality.quality)
         ).all()
-
-        logger.info(f"Found {len(positions)} positions")
         
         result = []
         for position in positions:
             # Извлекаем качества из связанных PositionQuality
-            qualities = []
-            for pq in position.qualities:
-                if pq.quality:
-                    qualities.append(pq.quality)
-                    logger.info(f"Position {position.id} ({position.title}) has quality: {pq.quality.name}")
-
-            logger.info(f"Position {position.id} ({position.title}) has {len(qualities)} qualities")
+            qualities = [pq.quality for pq in position.qualities if pq.quality]
 
             # Создаем объект позиции с качествами
             position_with_qualities = PositionWithQualities(
@@ -173,7 +286,7 @@ async def get_positions(
             )
             result.append(position_with_qualities)
 
-        logger.info(f"Returning {len(result)} positions with qualities")
+        logger.debug("Получено позиций: %d", len(result))
         return result
     except Exception as e:
         logger.error(f"Ошибка при получении позиций: {e}")
@@ -195,13 +308,8 @@ async def get_position(
             raise HTTPException(status_code=404, detail="Позиция не найдена")
 
         # Извлекаем качества из связанных PositionQuality
-        qualities = []
-        for pq in position.qualities:
-            if pq.quality:
-                qualities.append(pq.quality)
-                logger.info(f"Position {position.id} ({position.title}) has quality: {pq.quality.name}")
-
-        logger.info(f"Position {position.id} ({position.title}) has {len(qualities)} qualities")
+        qualities = [pq.quality for pq in position.qualities if pq.quality]
+        logger.debug("Получена позиция: position_id=%s qualities=%d", position.id, len(qualities))
 
         return PositionWithQualities(
             id=position.id,
@@ -222,6 +330,7 @@ async def get_position(
 async def update_position(
     position_id: int,
     position_update: PositionUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
 ):
@@ -232,27 +341,26 @@ async def update_position(
             raise HTTPException(status_code=404, detail="Позиция не найдена")
 
         update_data = position_update.dict(exclude_unset=True, exclude={'quality_ids'})
+        # Название и качества входят в промпт, их изменение устаревает банк вопросов
+        rebuild_bank = update_data.get('title', position.title) != position.title
         for field, value in update_data.items():
             setattr(position, field, value)
 
-        # Обновляем качества если они переданы
-        if hasattr(position_update, 'quality_ids') and position_update.quality_ids is not None:
-            # Удаляем старые связи
-            db.query(PositionQuality).filter(PositionQuality.position_id == position_id).delete()
-
-            # Добавляем новые связи
-            for quality_id in position_update.quality_ids:
-                quality = db.query(Quality).filter(Quality.id == quality_id).first()
-                if quality:
-                    position_quality = PositionQuality(
-                        position_id=position_id,
-                        quality_id=quality_id,
-                        weight=1
-                    )
-                    db.add(position_quality)
+        # Обновляем качества если они переданы: меняется только разница,
+        # веса оставшихся качеств сохраняются
+        if position_update.quality_ids is not None:
+            added, removed, _ = sync_position_qualities(db, position_id, position_update.quality_ids)
+            rebuild_bank = rebuild_bank or bool(added or removed)
+
+        if rebuild_bank:
+            invalidate_question_bank(db, [position_id])
 
         db.commit()
+        invalidate_public_positions()
         db.refresh(position)
+
+        if rebuild_bank:
+            background_tasks.add_task(build_question_bank, position_id)
         return position
     except HTTPException:
         raise
@@ -279,6 +387,7 @@ async def delete_position(
         # Затем удаляем позицию
         db.delete(position)
         db.commit()
+        invalidate_public_positions()
         return {"message": "Позиция успешно удалена"}
     except HTTPException:
         raise
@@ -298,15 +407,14 @@ async def create_quality(
     """Создать новое качество"""
     try:
         quality_data = quality.dict()
-        logger.info(f"Создание качества: {quality_data}")
-        logger.info(f"Текущий пользователь: {current_user.id} ({current_user.username})")
         
         db_quality = Quality(**quality_data)
         db.add(db_quality)
         db.commit()
+        invalidate_public_positions()
         db.refresh(db_quality)
         
-        logger.info(f"Качество создано с ID: {db_quality.id}")
+        logger.info("Качество создано: quality_id=%s user_id=%s", db_quality.id, current_user.id)
         return db_quality
         
     except exc.IntegrityError as e:
@@ -315,9 +423,7 @@ async def create_quality(
         raise HTTPException(status_code=400, detail="Качество с таким названием уже существует")
     except Exception as e:
         db.rollback()
-        logger.error(f"Ошибка при создании качества: {e}")
-        logger.error(f"Тип ошибки: {type(e)}")
-        logger.error(f"Детали ошибки: {str(e)}")
+        logger.error("Ошибка при создании качества: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Ошибка при создании качества: {str(e)}")
 
 @router.get("/qualities", response_model=List[QualitySchema])
@@ -349,6 +455,7 @@ async def get_quality(
 async def update_quality(
     quality_id: int,
     quality_update: QualityCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
 ):
@@ -358,16 +465,26 @@ async def update_quality(
         raise HTTPException(status_code=404, detail="Качество не найдено")
     
     update_data = quality_update.dict()
+    renamed = update_data.get('name', quality.name) != quality.name
     for field, value in update_data.items():
         setattr(quality, field, value)
     
+    # Название качества входит в промпт банка вопросов
+    position_ids = positions_with_quality(db, quality_id) if renamed else []
+    invalidate_question_bank(db, position_ids)
+    
     db.commit()
+    invalidate_public_positions()
     db.refresh(quality)
+    
+    for position_id in position_ids:
+        background_tasks.add_task(build_question_bank, position_id)
     return quality
 
 @router.delete("/qualities/{quality_id}")
 async def delete_quality(
     quality_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
 ):
@@ -376,8 +493,15 @@ async def delete_quality(
     if not quality:
         raise HTTPException(status_code=404, detail="Качество не найдено")
     
+    position_ids = positions_with_quality(db, quality_id)
+    invalidate_question_bank(db, position_ids)
+    
     db.delete(quality)
     db.commit()
+    invalidate_public_positions()
+    
+    for position_id in position_ids:
+        background_tasks.add_task(build_question_bank, position_id)
     return {"message": "Качество успешно удалено"}
 
 # Position-Quality relationship endpoints
@@ -386,6 +510,7 @@ async def delete_quality(
 async def add_quality_to_position(
     position_id: int,
     quality_id: int,
+    background_tasks: BackgroundTasks,
     weight: int = 1,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
@@ -399,28 +524,28 @@ async def add_quality_to_position(
     if not quality:
         raise HTTPException(status_code=404, detail="Качество не найдено")
     
-    # Проверяем, не существует ли уже такая связь
-    existing_relation = db.query(PositionQuality).filter(
-        PositionQuality.position_id == position_id,
-        PositionQuality.quality_id == quality_id
-    ).first()
-    
-    if existing_relation:
-        raise HTTPException(status_code=400, detail="Качество уже добавлено к этой позиции")
-    
     position_quality = PositionQuality(
         position_id=position_id,
         quality_id=quality_id,
         weight=weight
     )
     db.add(position_quality)
-    db.commit()
+    invalidate_question_bank(db, [position_id])
+    try:
+        db.commit()
+        invalidate_public_positions()
+    except exc.IntegrityError:
+        # Повторную связь отсекает уникальный индекс (position_id, quality_id)
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Качество уже добавлено к этой позиции")
+    background_tasks.add_task(build_question_bank, position_id)
     return {"message": f"Качество '{quality.name}' добавлено к позиции '{position.title}'"}
 
 @router.delete("/positions/{position_id}/qualities/{quality_id}")
 async def remove_quality_from_position(
     position_id: int,
     quality_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
 ):
@@ -434,19 +559,65 @@ async def remove_quality_from_position(
         raise HTTPException(status_code=404, detail="Связь позиция-качество не найдена")
     
     db.delete(position_quality)
+    invalidate_question_bank(db, [position_id])
     db.commit()
+    invalidate_public_positions()
+    background_tasks.add_task(build_question_bank, position_id)
     return {"message": "Качество удалено из позиции"}
 
 # Interview management endpoints
 
-@router.get("/interviews", response_model=List[InterviewSchema])
+@router.get("/interviews", response_model=InterviewsPage)
 async def get_interviews(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    position_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    started_from: Optional[datetime] = None,
+    started_to: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(check_admin_permissions)
 ):
-    """Получить все интервью"""
-    interviews = db.query(Interview).all()
-    return interviews
+    """Получить список интервью без вопросов и ответов: новые первыми, курсорная пагинация и фильтры"""
+    try:
+        query = filter_interviews(
+            db.query(*INTERVIEW_COLUMNS), status_filter, position_id, user_id, started_from, started_to
+        )
+        cursor_id = parse_id_cursor(cursor)
+        if cursor_id is not None:
+            query = query.filter(Interview.id < cursor_id)
+
+        rows = query.order_by(Interview.id.desc()).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        interviews = [InterviewSummary.model_validate(row._mapping) for row in rows[:limit]]
+        return InterviewsPage(
+            interviews=interviews,
+            next_cursor=str(interviews[-1].id) if has_more else None,
+            has_more=has_more
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при получении интервью: {e}")
+        raise HTTPException(status_code=500, detail="Ошибка при получении интервью")
+
+@router.get("/interviews/export")
+async def export_interviews(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    position_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    started_from: Optional[datetime] = None,
+    started_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_permissions)
+):
+    """Потоковая выгрузка интервью (без вопросов и ответов) в NDJSON или CSV"""
+    query = filter_interviews(
+        db.query(*INTERVIEW_COLUMNS), status_filter, position_id, user_id, started_from, started_to
+    )
+    return export_response(query.order_by(Interview.id), INTERVIEW_COLUMNS, export_format, "interviews")
 
 @router.get("/interviews/{interview_id}", response_model=InterviewSchema)
 async def get_interview(
@@ -459,3 +630,29 @@ async def get_interview(
     if not interview:
         raise HTTPException(status_code=404, detail="Интервью не найдено")
     return interview
+
+# LLM cache endpoints
+
+@router.get("/llm-cache/stats")
+async def get_llm_cache_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_permissions)
+):
+    """Статистика кэша ответов LLM: попадания, промахи, обходы, вытеснения"""
+    try:
+        return cache_stats(db)
+    except Exception as e:
+        logger.error(f"Ошибка при получении статистики кэша LLM: {e}")
+        raise HTTPException(status_code=500, detail="Ошибка при получении статистики кэша LLM")
+
+@router.get("/analytics/positions", response_model=List[PositionAnalytics])
+async def get_positions_analytics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(check_admin_permissions)
+):
+    """Аналитика интервью по позициям из предрассчитанных агрегатов"""
+    try:
+        return position_analytics(db)
+    except Exception as e:
+        logger.error(f"Ошибка при получении аналитики по позициям: {e}")
+        raise HTTPException(status_code=500, detail="Ошибка при получении аналитики по позициям")
@@ -1,60 +1,81 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import get_db
+from app.database import get_db, insert_ignore
 from app.models.user import User
 from app.models.chat import Chat, chat_members
 from app.models.message import Message
-from app.schemas.chat import ChatCreate, ChatUpdate, Chat as ChatSchema, ChatList, UserInChat, InviteByUsernameRequest
+from app.schemas.chat import (
+    ChatCreate, ChatCreated, ChatUpdate, Chat as ChatSchema, ChatInfo, ChatList, ChatMembersPage, UserInChat,
+    InviteByUsernameRequest,
+    BulkMembersRequest, BulkMemberResult, BulkMembersResponse
+)
 from app.auth.dependencies import get_current_user
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, or_, desc, func, select
 from app.models.chat_invitation import ChatInvitation
+from app.websocket.manager import manager
 
 router = APIRouter(prefix="/chats", tags=["chats"])
 
 
-def get_chat_with_members(db: Session, chat_id: int) -> Optional[ChatSchema]:
+# Сколько участников возвращается вместе с информацией о чате
+CHAT_MEMBERS_PREVIEW = 20
+
+# Колонки участника чата для UserInChat
+MEMBER_COLUMNS = (
+    User.id,
+    User.telegram_id,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.profile_photo_url,
+    chat_members.c.is_admin,
+    chat_members.c.joined_at
+)
+
+
+def query_chat_members(db: Session, chat_id: int):
     """
-    Вспомогательная функция для получения чата с правильной информацией о членах
+    Запрос участников чата: сначала администраторы, затем по ID
     """
-    # Получаем основную информацию о чате
-    chat = db.query(Chat).filter(Chat.id == chat_id).first()
-    if not chat:
-        return None
-    
-    # Получаем информацию о членах чата с данными из промежуточной таблицы
-    members_query = db.query(
-        User.id,
-        User.telegram_id,
-        User.username,
-        User.first_name,
-        User.last_name,
-        User.profile_photo_url,
-        chat_members.c.is_admin,
-        chat_members.c.joined_at
-    ).join(
+    admin_flag = func.coalesce(chat_members.c.is_admin, False)
+    return db.query(*MEMBER_COLUMNS).join(
         chat_members, User.id == chat_members.c.user_id
     ).filter(
         chat_members.c.chat_id == chat_id
-    ).all()
-    
-    # Формируем список членов чата
-    members = []
-    for member_data in members_query:
-        member = UserInChat(
-            id=member_data.id,
-            telegram_id=member_data.telegram_id,
-            username=member_data.username,
-            first_name=member_data.first_name,
-            last_name=member_data.last_name,
-            profile_photo_url=member_data.profile_photo_url,
-            is_admin=member_data.is_admin,
-            joined_at=member_data.joined_at
-        )
-        members.append(member)
-    
-    # Формируем объект чата
-    chat_schema = ChatSchema(
+    ).order_by(desc(admin_flag), User.id)
+
+
+def member_from_row(row) -> UserInChat:
+    """
+    Построение UserInChat из строки запроса по MEMBER_COLUMNS
+    """
+    return UserInChat(
+        id=row.id,
+        telegram_id=row.telegram_id,
+        username=row.username,
+        first_name=row.first_name,
+        last_name=row.last_name,
+        profile_photo_url=row.profile_photo_url,
+        is_admin=bool(row.is_admin),
+        joined_at=row.joined_at
+    )
+
+
+def count_chat_members(db: Session, chat_id: int) -> int:
+    """
+    Количество участников чата
+    """
+    return db.query(func.count(chat_members.c.user_id)).filter(
+        chat_members.c.chat_id == chat_id
+    ).scalar()
+
+
+def chat_info_fields(chat: Chat, member_count: int) -> dict:
+    """
+    Поля ChatInfo из ORM объекта чата
+    """
+    return dict(
         id=chat.id,
         title=chat.title,
         chat_type=chat.chat_type,
@@ -64,10 +85,45 @@ def get_chat_with_members(db: Session, chat_id: int) -> Optional[ChatSchema]:
         is_active=chat.is_active,
         created_at=chat.created_at,
         updated_at=chat.updated_at,
-        members=members
+        member_count=member_count
     )
+
+
+def get_chat_with_members(
+    db: Session,
+    chat_id: int,
+    members_limit: int = CHAT_MEMBERS_PREVIEW
+) -> Optional[ChatSchema]:
+    """
+    Вспомогательная функция для получения чата с количеством участников
+    и первыми members_limit участниками (администраторы первыми).
+    Полный список участников — через GET /chats/{chat_id}/members
+    """
+    # Получаем основную информацию о чате
+    chat = db.query(Chat).filter(Chat.id == chat_id).first()
+    if not chat:
+        return None
     
-    return chat_schema
+    members = [
+        member_from_row(row)
+        for row in query_chat_members(db, chat_id).limit(members_limit)
+    ]
+    
+    # Формируем объект чата
+    return ChatSchema(
+        **chat_info_fields(chat, count_chat_members(db, chat_id)),
+        members=members
+    )
+
+
+def last_message_column(column):
+    """
+    Значение column последнего неудаленного сообщения чата из внешнего
+    запроса по Chat
+    """
+    return select(column).where(
+        and_(Message.chat_id == Chat.id, Message.is_deleted == False)
+    ).order_by(desc(Message.created_at)).limit(1).correlate(Chat).scalar_subquery()
 
 
 @router.get("/", response_model=List[ChatList])
@@ -78,47 +134,42 @@ async def get_user_chats(
     """
     Получение списка чатов пользователя
     """
-    # Получаем чаты пользователя через промежуточную таблицу
-    chats_query = db.query(Chat).join(
+    # Получаем чаты пользователя одним запросом по колонкам; последнее
+    # неудаленное сообщение — коррелированными подзапросами с LIMIT 1,
+    # каждый из которых читает одну запись индекса ix_messages_chat_id_created_at_live
+    rows = db.query(
+        Chat.id,
+        Chat.title,
+        Chat.chat_type,
+        Chat.photo_url,
+        last_message_column(Message.text),
+        last_message_column(Message.created_at)
+    ).join(
         chat_members, Chat.id == chat_members.c.chat_id
     ).filter(
         and_(
             chat_members.c.user_id == current_user.id,
             Chat.is_active == True
         )
-    ).order_by(desc(Chat.updated_at))
-    
-    chats = chats_query.all()
-    
-    # Формируем список чатов с дополнительной информацией
-    chat_list = []
-    for chat in chats:
-        # Получаем последнее сообщение
-        last_message = db.query(Message).filter(
-            and_(
-                Message.chat_id == chat.id,
-                Message.is_deleted == False
-            )
-        ).order_by(desc(Message.created_at)).first()
-        
-        # Подсчитываем непрочитанные сообщения (временно отключено)
-        unread_count = 0  # TODO: Исправить запрос для JSON поля
-        
-        chat_data = ChatList(
-            id=chat.id,
-            title=chat.title,
-            chat_type=chat.chat_type,
-            photo_url=chat.photo_url,
-            last_message=last_message.text if last_message else None,
-            last_message_time=last_message.created_at if last_message else None,
-            unread_count=unread_count
-        )
-        chat_list.append(chat_data)
-    
-    return chat_list
+    ).order_by(desc(Chat.updated_at)).all()
+    
+    # Подсчет непрочитанных сообщений временно отключен
+    # TODO: Исправить запрос для JSON поля
+    return [
+        ChatList.model_validate({
+            "id": row[0],
+            "title": row[1],
+            "chat_type": row[2],
+            "photo_url": row[3],
+            "last_message": row[4],
+            "last_message_time": row[5],
+            "unread_count": 0
+        })
+        for row in rows
+    ]
 
 
-@router.post("/", response_model=ChatSchema)
+@router.post("/", response_model=ChatCreated)
 async def create_chat(
     chat_data: ChatCreate,
     current_user: User = Depends(get_current_user),
@@ -136,41 +187,37 @@ async def create_chat(
         created_by=current_user.id
     )
     db.add(new_chat)
-    db.commit()
-    db.refresh(new_chat)
-    
-    # Добавляем создателя в чат как администратора
-    db.execute(
-        chat_members.insert().values(
-            user_id=current_user.id,
-            chat_id=new_chat.id,
-            is_admin=True
-        )
+    db.flush()  # Получаем ID без коммита, все вставки идут одной транзакцией
+    
+    # Проверяем существование всех участников одним запросом
+    requested_ids = set(chat_data.member_ids) - {current_user.id}
+    existing_ids = set()
+    if requested_ids:
+        existing_ids = {
+            user_id for (user_id,) in db.query(User.id).filter(User.id.in_(requested_ids))
+        }
+    
+    # Создатель — администратор, остальные участники добавляются одной многострочной вставкой
+    member_rows = [{"user_id": current_user.id, "chat_id": new_chat.id, "is_admin": True}]
+    member_rows.extend(
+        {"user_id": user_id, "chat_id": new_chat.id, "is_admin": False}
+        for user_id in sorted(existing_ids)
     )
-    
-    # Добавляем других участников
-    for member_id in chat_data.member_ids:
-        if member_id != current_user.id:
-            # Проверяем, что пользователь существует
-            member = db.query(User).filter(User.id == member_id).first()
-            if member:
-                db.execute(
-                    chat_members.insert().values(
-                        user_id=member_id,
-                        chat_id=new_chat.id,
-                        is_admin=False
-                    )
-                )
-    
+    db.execute(chat_members.insert(), member_rows)
     db.commit()
     
-    # Возвращаем созданный чат с участниками
-    return get_chat_with_members(db, new_chat.id)
+    # Возвращаем созданный чат с участниками и списком ненайденных ID
+    chat = get_chat_with_members(db, new_chat.id)
+    return ChatCreated(
+        **chat.model_dump(),
+        unknown_member_ids=sorted(requested_ids - existing_ids)
+    )
 
 
 @router.get("/{chat_id}", response_model=ChatSchema)
 async def get_chat(
     chat_id: int,
+    members_limit: int = Query(CHAT_MEMBERS_PREVIEW, ge=0, le=100),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -188,14 +235,14 @@ async def get_chat(
     if not is_member:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
     
-    chat = get_chat_with_members(db, chat_id)
+    chat = get_chat_with_members(db, chat_id, members_limit)
     if not chat:
         raise HTTPException(status_code=404, detail="Чат не найден")
     
     return chat
 
 
-@router.put("/{chat_id}", response_model=ChatSchema)
+@router.put("/{chat_id}", response_model=ChatInfo)
 async def update_chat(
     chat_id: int,
     chat_data: ChatUpdate,
@@ -232,7 +279,67 @@ async def update_chat(
     db.commit()
     db.refresh(chat)
     
-    return get_chat_with_members(db, chat_id)
+    # Список участников не возвращается, только их количество
+    return ChatInfo(**chat_info_fields(chat, count_chat_members(db, chat_id)))
+
+
+@router.get("/{chat_id}/members", response_model=ChatMembersPage)
+async def get_chat_members(
+    chat_id: int,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    prefix: Optional[str] = Query(None, min_length=1),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Постраничный список участников чата: администраторы первыми,
+    курсорная пагинация и поиск по префиксу username
+    """
+    # Проверяем, что пользователь является участником чата
+    is_member = db.query(chat_members).filter(
+        and_(
+            chat_members.c.user_id == current_user.id,
+            chat_members.c.chat_id == chat_id
+        )
+    ).first()
+    
+    if not is_member:
+        raise HTTPException(status_code=403, detail="Доступ запрещен")
+    
+    query = query_chat_members(db, chat_id)
+    
+    if prefix:
+        escaped = prefix.lstrip('@').lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(func.lower(User.username).like(f"{escaped}%", escape='\\'))
+    
+    # Курсор "<is_admin>:<user_id>" последнего элемента предыдущей страницы
+    if cursor:
+        try:
+            cursor_admin, cursor_id = (int(part) for part in cursor.split(':', 1))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+        admin_flag = func.coalesce(chat_members.c.is_admin, False)
+        if cursor_admin:
+            query = query.filter(
+                or_(
+                    admin_flag == False,
+                    and_(admin_flag == True, User.id > cursor_id)
+                )
+            )
+        else:
+            query = query.filter(and_(admin_flag == False, User.id > cursor_id))
+    
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    members = [member_from_row(row) for row in rows[:limit]]
+    
+    next_cursor = None
+    if has_more:
+        last = members[-1]
+        next_cursor = f"{int(last.is_admin)}:{last.id}"
+    
+    return ChatMembersPage(members=members, next_cursor=next_cursor, has_more=has_more)
 
 
 @router.delete("/{chat_id}")
@@ -261,6 +368,153 @@ async def delete_chat(
     return {"message": "Чат успешно удален"}
 
 
+def resolve_bulk_members(db: Session, request: BulkMembersRequest):
+    """
+    Поиск пользователей из запроса массовой операции одним запросом.
+    Возвращает найденные ID и результаты для ненайденных ID/username
+    """
+    requested_ids = list(dict.fromkeys(request.user_ids))
+    requested_usernames = list(dict.fromkeys(u.lstrip('@') for u in request.usernames if u.lstrip('@')))
+    
+    conditions = []
+    if requested_ids:
+        conditions.append(User.id.in_(requested_ids))
+    if requested_usernames:
+        conditions.append(User.username.in_(requested_usernames))
+    
+    rows = db.query(User.id, User.username).filter(or_(*conditions)).all() if conditions else []
+    ids = {row.id for row in rows}
+    username_to_id = {row.username: row.id for row in rows if row.username}
+    
+    # Сохраняем порядок запроса: сначала ID, затем username
+    entries = [(user_id, None, user_id if user_id in ids else None) for user_id in requested_ids]
+    entries.extend((None, username, username_to_id.get(username)) for username in requested_usernames)
+    
+    found_ids = list(dict.fromkeys(user_id for _, _, user_id in entries if user_id is not None))
+    return entries, found_ids
+
+
+@router.post("/{chat_id}/members/bulk", response_model=BulkMembersResponse)
+async def add_members_bulk(
+    chat_id: int,
+    request: BulkMembersRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Массовое добавление участников в чат по ID и/или username
+    """
+    # Проверяем, что пользователь является администратором чата
+    is_admin = db.query(chat_members).filter(
+        and_(
+            chat_members.c.user_id == current_user.id,
+            chat_members.c.chat_id == chat_id,
+            chat_members.c.is_admin == True
+        )
+    ).first()
+    
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    
+    entries, found_ids = resolve_bulk_members(db, request)
+    
+    existing_ids = set()
+    if found_ids:
+        existing_ids = {
+            user_id for (user_id,) in db.query(chat_members.c.user_id).filter(
+                and_(
+                    chat_members.c.chat_id == chat_id,
+                    chat_members.c.user_id.in_(found_ids)
+                )
+            )
+        }
+    
+    new_ids = [user_id for user_id in found_ids if user_id not in existing_ids]
+    if new_ids:
+        db.execute(
+            insert_ignore(db, chat_members),
+            [{"user_id": user_id, "chat_id": chat_id, "is_admin": False} for user_id in new_ids]
+        )
+        db.commit()
+        manager.add_chat_members(chat_id, new_ids)
+    
+    results = []
+    reported = set()
+    for requested_id, username, user_id in entries:
+        if user_id is None:
+            status = "not_found"
+        elif user_id in existing_ids or user_id in reported:
+            status = "already_member"
+        else:
+            status = "added"
+            reported.add(user_id)
+        results.append(BulkMemberResult(user_id=user_id if user_id is not None else requested_id, username=username, status=status))
+    
+    return BulkMembersResponse(results=results, affected=len(new_ids))
+
+
+@router.post("/{chat_id}/members/bulk-remove", response_model=BulkMembersResponse)
+async def remove_members_bulk(
+    chat_id: int,
+    request: BulkMembersRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Массовое удаление участников из чата по ID и/или username
+    """
+    # Проверяем, что пользователь является администратором чата
+    is_admin = db.query(chat_members).filter(
+        and_(
+            chat_members.c.user_id == current_user.id,
+            chat_members.c.chat_id == chat_id,
+            chat_members.c.is_admin == True
+        )
+    ).first()
+    
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    
+    entries, found_ids = resolve_bulk_members(db, request)
+    
+    member_ids = set()
+    if found_ids:
+        member_ids = {
+            user_id for (user_id,) in db.query(chat_members.c.user_id).filter(
+                and_(
+                    chat_members.c.chat_id == chat_id,
+                    chat_members.c.user_id.in_(found_ids)
+                )
+            )
+        }
+    
+    if member_ids:
+        db.execute(
+            chat_members.delete().where(
+                and_(
+                    chat_members.c.chat_id == chat_id,
+                    chat_members.c.user_id.in_(member_ids)
+                )
+            )
+        )
+        db.commit()
+        manager.remove_chat_members(chat_id, member_ids)
+    
+    results = []
+    reported = set()
+    for requested_id, username, user_id in entries:
+        if user_id is None:
+            status = "not_found"
+        elif user_id in member_ids and user_id not in reported:
+            status = "removed"
+            reported.add(user_id)
+        else:
+            status = "not_member"
+        results.append(BulkMemberResult(user_id=user_id if user_id is not None else requested_id, username=username, status=status))
+    
+    return BulkMembersResponse(results=results, affected=len(member_ids))
+
+
 @router.post("/{chat_id}/members/{user_id}")
 async def add_member_to_chat(
     chat_id: int,
@@ -1,22 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import exc
-from typing import List
+from sqlalchemy.sql import func
+from typing import List, Optional
 import logging
-from app.database import get_db
+from app.database import get_db, upsert
 from app.auth.dependencies import get_current_user
 from app.models.user import User
 from app.models.position import Position
 from app.models.quality import Quality
 from app.models.position_quality import PositionQuality
 from app.models.interview import Interview
+from app.models.interview_answer import InterviewAnswer
 from app.schemas.position import Position as PositionSchema
 from app.schemas.interview import InterviewCreate, Interview as InterviewSchema, InterviewUpdate
+from app.services.interviews import fail_stale_generating, prepare_interview_questions
+from app.services.public_positions import etag_matches, public_positions
+from app.services.question_bank import build_question_bank, sample_interview_questions
+from app.services.scoring import calculate_basic_score, scoring_queue
 import random
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/hr", tags=["hr"])
 
+# generating — вопросы еще генерируются в фоне
+ACTIVE_STATUSES = ("generating", "in_progress")
+
 @router.get("/positions", response_model=List[PositionSchema])
 async def get_active_positions(
     db: Session = Depends(get_db),
@@ -25,7 +34,7 @@ async def get_active_positions(
     """Получить активные позиции для интервью"""
     try:
         positions = db.query(Position).filter(Position.is_active == True).all()
-        logger.info(f"Получено {len(positions)} активных позиций")
+        logger.debug("Получено активных позиций: %d", len(positions))
         return positions
     except Exception as e:
         logger.error(f"Ошибка при получении позиций: {e}")
@@ -33,13 +42,16 @@ async def get_active_positions(
 
 @router.get("/positions/public", response_model=List[PositionSchema])
 async def get_active_positions_public(
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    """Получить активные позиции для интервью (публичный доступ)"""
+    """Получить активные позиции для интервью (публичный доступ, кэш в памяти + ETag)"""
     try:
-        positions = db.query(Position).filter(Position.is_active == True).all()
-        logger.info(f"Получено {len(positions)} активных позиций (публичный доступ)")
-        return positions
+        body, etag = public_positions(db)
+        headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Ошибка при получении позиций: {e}")
         raise HTTPException(status_code=500, detail="Ошибка при получении позиций")
@@ -52,7 +64,7 @@ async def get_interviews(
     """Получить все интервью пользователя"""
     try:
         interviews = db.query(Interview).filter(Interview.user_id == current_user.id).all()
-        logger.info(f"Получено {len(interviews)} интервью для пользователя {current_user.id}")
+        logger.debug("Получено интервью: %d, user_id=%s", len(interviews), current_user.id)
         return interviews
     except Exception as e:
         logger.error(f"Ошибка при получении интервью: {e}")
@@ -61,10 +73,11 @@ async def get_interviews(
 @router.post("/interviews", response_model=InterviewSchema)
 async def create_interview(
     interview: InterviewCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Создать новое интервью"""
+    """Создать новое интервью из банка вопросов позиции; без банка вопросы генерируются в фоне (событие interview_ready)"""
     try:
         logger.info(f"Создание интервью для позиции {interview.position_id} пользователем {current_user.id}")
 
@@ -77,33 +90,49 @@ async def create_interview(
         if not position:
             raise HTTPException(status_code=404, detail="Позиция не найдена или неактивна")
 
+        # Интервью, генерация вопросов которого потеряна, не блокирует новое
+        fail_stale_generating(db, user_id=current_user.id)
+
         # Проверяем, нет ли уже активного интервью у пользователя
         existing_interview = db.query(Interview).filter(
             Interview.user_id == current_user.id,
-            Interview.status == "in_progress"
+            Interview.status.in_(ACTIVE_STATUSES)
         ).first()
 
         if existing_interview:
             raise HTTPException(status_code=400, detail="У вас уже есть активное интервью")
 
-        # Генерируем вопросы на основе качеств позиции
-        questions = generate_questions_for_position(position, db)
+        # Вопросы берутся из банка позиции
+        questions = sample_interview_questions(db, position.id, position.title)
 
-        # Создаем интервью
         db_interview = Interview(
             user_id=current_user.id,
             position_id=interview.position_id,
             questions=questions,
             answers={},
             max_score=100,
-            status="in_progress"
+            status="in_progress" if questions else "generating"
         )
 
         db.add(db_interview)
         db.commit()
         db.refresh(db_interview)
 
-        logger.info(f"Интервью создано с ID: {db_interview.id}")
+        if not questions:
+            # Банк еще не построен: генерируем вопросы в фоне и строим банк.
+            # Порядок качеств фиксирован: от него зависит промпт и ключ кэша LLM
+            quality_names = [name for (name,) in db.query(Quality.name).join(
+                PositionQuality, Quality.id == PositionQuality.quality_id
+            ).filter(PositionQuality.position_id == position.id).order_by(Quality.name)]
+            background_tasks.add_task(
+                prepare_interview_questions,
+                db_interview.id,
+                position.title,
+                quality_names
+            )
+            background_tasks.add_task(build_question_bank, position.id)
+
+        logger.info(f"Интервью создано с ID: {db_interview.id}, статус {db_interview.status}")
         return db_interview
 
     except HTTPException:
@@ -122,7 +151,7 @@ async def get_current_interview(
     try:
         interview = db.query(Interview).filter(
             Interview.user_id == current_user.id,
-            Interview.status == "in_progress"
+            Interview.status.in_(ACTIVE_STATUSES)
         ).first()
 
         if not interview:
@@ -138,14 +167,20 @@ async def get_current_interview(
 @router.put("/interviews/{interview_id}/answer")
 async def submit_answer(
     interview_id: int,
-    question_index: int,
     answer: str,
+    question_index: Optional[int] = None,
+    question_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Отправить ответ на вопрос интервью"""
+    """
+    Отправить ответ на вопрос интервью (можно повторно — ответ перезаписывается).
+    Вопрос задается позицией question_index (с 0) или id вопроса question_id;
+    ответ всегда хранится по позиции.
+    """
     try:
-        interview = db.query(Interview).filter(
+        # Только нужные колонки, без загрузки ответов интервью
+        interview = db.query(Interview.status, Interview.questions).filter(
             Interview.id == interview_id,
             Interview.user_id == current_user.id
         ).first()
@@ -153,14 +188,29 @@ async def submit_answer(
         if not interview:
             raise HTTPException(status_code=404, detail="Интервью не найдено")
 
+        if interview.status == "generating":
+            raise HTTPException(status_code=409, detail="Вопросы интервью еще готовятся")
+
         if interview.status != "in_progress":
             raise HTTPException(status_code=400, detail="Интервью уже завершено")
 
-        # Обновляем ответы
-        if not interview.answers:
-            interview.answers = {}
-
-        interview.answers[str(question_index)] = answer
+        if (question_index is None) == (question_id is None):
+            raise HTTPException(status_code=400, detail="Укажите question_index или question_id")
+
+        questions = interview.questions or []
+        if question_id is not None:
+            question_index = next((i for i, q in enumerate(questions) if q.get("id") == question_id), None)
+        if question_index is None or not 0 <= question_index < len(questions):
+            raise HTTPException(status_code=400, detail="Вопрос не найден")
+
+        # Один upsert строки ответа вместо перезаписи всего JSON
+        db.execute(upsert(
+            db,
+            InterviewAnswer.__table__,
+            {"interview_id": interview_id, "question_index": question_index, "answer": answer},
+            index_elements=["interview_id", "question_index"],
+            update_columns=["answer", "updated_at"]
+        ))
         db.commit()
 
         logger.info(f"Ответ сохранен для интервью {interview_id}, вопрос {question_index}")
@@ -179,7 +229,7 @@ async def complete_interview(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Завершить интервью и получить результат"""
+    """Завершить интервью: предварительный балл сразу, итоговый — событием interview_scored или через /result"""
     try:
         interview = db.query(Interview).filter(
             Interview.id == interview_id,
@@ -189,22 +239,25 @@ async def complete_interview(
         if not interview:
             raise HTTPException(status_code=404, detail="Интервью не найдено")
 
+        if interview.status == "generating":
+            raise HTTPException(status_code=409, detail="Вопросы интервью еще готовятся")
+
         if interview.status != "in_progress":
             raise HTTPException(status_code=400, detail="Интервью уже завершено")
 
-        # Рассчитываем балл
-        score = calculate_interview_score(interview, db)
+        # Предварительный балл сразу, итоговая оценка моделью — в очереди
+        score = calculate_basic_score(interview)
         interview.score = score
-        interview.status = "completed"
+        interview.status = "scoring"
+        interview.completed_at = func.now()
+        # Интервью оценит очередь этого процесса, остальные его не забирают
+        interview.scoring_claimed_at = func.now()
 
         db.commit()
+        scoring_queue.submit(interview_id)
 
-        logger.info(f"Интервью {interview_id} завершено с баллом {score}")
-        return {
-            "score": score,
-            "max_score": interview.max_score,
-            "percentage": round((score / interview.max_score) * 100, 2)
-        }
+        logger.info(f"Интервью {interview_id} завершено, предварительный балл {score}, поставлено в очередь оценки")
+        return interview_result(interview)
 
     except HTTPException:
         raise
@@ -213,264 +266,39 @@ async def complete_interview(
         logger.error(f"Ошибка при завершении интервью: {e}")
         raise HTTPException(status_code=500, detail="Ошибка при завершении интервью")
 
-def generate_questions_for_position(position: Position, db: Session) -> List[dict]:
-    """Генерирует 10 вопросов на основе качеств позиции с помощью OpenAI"""
-    try:
-        import os
-        import openai
-        from typing import List
-
-        # Получаем качества позиции
-        position_qualities = db.query(Quality).join(
-            PositionQuality, Quality.id == PositionQuality.quality_id
-        ).filter(PositionQuality.position_id == position.id).all()
-
-        # Проверяем наличие OpenAI API ключа
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            logger.warning("OPENAI_API_KEY не найден, используем базовые вопросы")
-            return generate_basic_questions(position)
-
-        # Настраиваем OpenAI клиент
-        openai.api_key = openai_api_key
-
-        # Формируем промпт для генерации вопросов
-        qualities_text = ", ".join([q.name for q in position_qualities]) if position_qualities else "общие профессиональные навыки"
-        
-        prompt = f"""
-        Создай ровно 10 профессиональных вопросов для интервью на позицию "{position.title}".
-        
-        Ключевые качества для оценки: {qualities_text}
-        
-        Требования к вопросам:
-        1. Вопросы должны быть направлены на оценку указанных качеств
-        2. Вопросы должны быть открытыми и требовать развернутых ответов
-        3. Вопросы должны быть профессиональными и уместными для данной позиции
-        4. Вопросы должны быть разнообразными по типам (поведенческие, ситуационные, технические)
-        5. Вопросы должны быть на русском языке
-        6. Вопросы должны быть конкретными и практическими
-        7. Избегай общих вопросов типа "Расскажите о себе"
-        
-        Примеры хороших вопросов:
-        - "Опишите проект, где вы использовали [конкретная технология/навык]"
-        - "Как бы вы решали конфликт в команде при работе над срочным проектом?"
-        - "Расскажите о случае, когда вам пришлось быстро адаптироваться к изменениям"
-        
-        Формат ответа - только список из ровно 10 вопросов, каждый с новой строки, без нумерации.
-        """
-
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ты HR-специалист, который создает профессиональные вопросы для интервью."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.7
-            )
-
-            # Получаем сгенерированные вопросы
-            generated_questions_text = response.choices[0].message.content.strip()
-            questions_list = [q.strip() for q in generated_questions_text.split('\n') if q.strip()]
-
-            # Формируем структурированные вопросы
-            questions = []
-            for i, question_text in enumerate(questions_list[:10], 1):
-                questions.append({
-                    "id": i,
-                    "text": question_text,
-                    "type": "text",
-                    "category": "ai_generated"
-                })
-
-            # Если получили меньше 10 вопросов, дополняем базовыми
-            if len(questions) < 10:
-                basic_questions = generate_basic_questions(position)
-                for basic_q in basic_questions:
-                    if len(questions) >= 10:
-                        break
-                    questions.append({
-                        "id": len(questions) + 1,
-                        "text": basic_q["text"],
-                        "type": basic_q["type"],
-                        "category": basic_q["category"]
-                    })
-
-            logger.info(f"Сгенерировано {len(questions)} вопросов для позиции {position.title}")
-            return questions
-
-        except Exception as openai_error:
-            logger.error(f"Ошибка при обращении к OpenAI: {openai_error}")
-            return generate_basic_questions(position)
-
-    except Exception as e:
-        logger.error(f"Ошибка при генерации вопросов: {e}")
-        return generate_basic_questions(position)
-
-def generate_basic_questions(position: Position) -> List[dict]:
-    """Генерирует базовые вопросы для позиции"""
-    return [
-        {
-            "id": 1,
-            "text": f"Почему вы заинтересованы в позиции {position.title}?",
-            "type": "text",
-            "category": "motivation"
-        },
-        {
-            "id": 2,
-            "text": "Расскажите о своем профессиональном опыте",
-            "type": "text",
-            "category": "experience"
-        },
-        {
-            "id": 3,
-            "text": "Какие ваши сильные стороны?",
-            "type": "text",
-            "category": "strengths"
-        },
-        {
-            "id": 4,
-            "text": "Как вы работаете в команде?",
-            "type": "text",
-            "category": "teamwork"
-        },
-        {
-            "id": 5,
-            "text": "Опишите сложную рабочую ситуацию и как вы ее решили",
-            "type": "text",
-            "category": "problem_solving"
-        },
-        {
-            "id": 6,
-            "text": "Какие у вас планы профессионального развития?",
-            "type": "text",
-            "category": "career_goals"
-        },
-        {
-            "id": 7,
-            "text": "Что вы знаете о нашей компании?",
-            "type": "text",
-            "category": "company_knowledge"
-        },
-        {
-            "id": 8,
-            "text": "Как вы справляетесь со стрессовыми ситуациями?",
-            "type": "text",
-            "category": "stress_management"
-        },
-        {
-            "id": 9,
-            "text": "Расскажите о проекте, которым вы гордитесь",
-            "type": "text",
-            "category": "achievements"
-        },
-        {
-            "id": 10,
-            "text": "Как вы планируете свое время и приоритеты?",
-            "type": "text",
-            "category": "time_management"
-        }
-    ]
-
-def calculate_interview_score(interview: Interview, db: Session) -> int:
-    """Рассчитывает балл за интервью с помощью OpenAI анализа"""
-    try:
-        if not interview.answers:
-            return 0
-
-        import os
-        import openai
-
-        # Проверяем наличие OpenAI API ключа
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            logger.warning("OPENAI_API_KEY не найден, используем базовый расчет")
-            return calculate_basic_score(interview)
-
-        # Настраиваем OpenAI клиент
-        openai.api_key = openai_api_key
-
-        # Получаем позицию для контекста
-        position = db.query(Position).filter(Position.id == interview.position_id).first()
-        position_title = position.title if position else "неизвестная позиция"
-
-        # Формируем промпт для анализа
-        answers_text = "\n".join([f"Вопрос {i+1}: {interview.questions[i]['text']}\nОтвет: {answer}" 
-                                 for i, answer in enumerate(interview.answers.values())])
-
-        prompt = f"""
-        Проанализируй ответы кандидата на интервью для позиции "{position_title}".
-        
-        Ответы кандидата:
-        {answers_text}
-        
-        Оцени ответы по следующим критериям:
-        1. Глубина и детализация ответов (0-10 баллов)
-        2. Соответствие требованиям позиции (0-10 баллов)
-        3. Практический опыт и примеры (0-10 баллов)
-        4. Профессиональные знания (0-10 баллов)
-        5. Коммуникативные навыки (0-10 баллов)
-        
-        Общий балл должен быть от 0 до 100.
-        
-        Верни только число - общий балл от 0 до 100.
-        """
-
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Ты HR-специалист, который оценивает кандидатов на основе их ответов на интервью."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=50,
-                temperature=0.3
-            )
-
-            # Получаем оценку
-            score_text = response.choices[0].message.content.strip()
-            try:
-                score = int(score_text)
-                # Ограничиваем балл от 0 до 100
-                score = max(0, min(100, score))
-                logger.info(f"AI оценка для интервью {interview.id}: {score}")
-                return score
-            except ValueError:
-                logger.warning(f"Не удалось распарсить AI оценку: {score_text}, используем базовый расчет")
-                return calculate_basic_score(interview)
-
-        except Exception as openai_error:
-            logger.error(f"Ошибка при обращении к OpenAI: {openai_error}")
-            return calculate_basic_score(interview)
-
-    except Exception as e:
-        logger.error(f"Ошибка при расчете балла интервью: {e}")
-        return calculate_basic_score(interview)
-
-def calculate_basic_score(interview: Interview) -> int:
-    """Базовый расчет балла за интервью"""
+@router.get("/interviews/{interview_id}/result")
+async def get_interview_result(
+    interview_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Получить результат интервью (для опроса, пока идет оценка)"""
     try:
-        if not interview.answers:
-            return 0
-
-        total_questions = len(interview.questions)
-        answered_questions = len(interview.answers)
-
-        # Базовый балл за количество отвеченных вопросов
-        completion_score = (answered_questions / total_questions) * 50
+        interview = db.query(Interview).filter(
+            Interview.id == interview_id,
+            Interview.user_id == current_user.id
+        ).first()
 
-        # Дополнительные баллы за качество ответов
-        quality_score = 0
-        for answer in interview.answers.values():
-            if isinstance(answer, str) and len(answer.strip()) > 10:
-                quality_score += 5
-            elif isinstance(answer, (int, float)):
-                quality_score += answer
+        if not interview:
+            raise HTTPException(status_code=404, detail="Интервью не найдено")
 
-        total_score = min(int(completion_score + quality_score), interview.max_score)
-        return total_score
+        if interview.status not in ("scoring", "completed"):
+            raise HTTPException(status_code=400, detail="Интервью еще не завершено")
 
+        return interview_result(interview)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Ошибка при базовом расчете балла: {e}")
-        return 0
+        logger.error(f"Ошибка при получении результата интервью: {e}")
+        raise HTTPException(status_code=500, detail="Ошибка при получении результата интервью")
+
+def interview_result(interview: Interview) -> dict:
+    score = interview.score or 0
+    return {
+        "status": interview.status,
+        "score": score,
+        "max_score": interview.max_score,
+        "percentage": round((score / interview.max_score) * 100, 2),
+        # Пока идет оценка моделью, балл предварительный
+        "provisional": interview.status == "scoring"
+    }
@@ -7,24 +7,92 @@ from app.models.chat import Chat, chat_members
 from app.models.message import Message
 from app.schemas.message import MessageCreate, MessageUpdate, Message as MessageSchema, MessageList
 from app.auth.dependencies import get_current_user
-from sqlalchemy import and_, desc, asc
+from sqlalchemy import and_, desc, asc, func
+from datetime import datetime
 import os
 import uuid
 from app.config import settings
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
+# Колонки для построения MessageSchema напрямую из строк запроса
+MESSAGE_COLUMNS = (
+    Message.id,
+    Message.chat_id,
+    Message.sender_id,
+    Message.text,
+    Message.message_type,
+    Message.reply_to_message_id,
+    Message.media_url,
+    Message.media_type,
+    Message.media_size,
+    Message.media_duration,
+    Message.forward_from_user_id,
+    Message.forward_from_chat_id,
+    Message.is_edited,
+    Message.is_deleted,
+    Message.read_by,
+    Message.created_at,
+    Message.updated_at,
+)
+
+SENDER_COLUMNS = (
+    User.telegram_id.label("sender_telegram_id"),
+    User.username.label("sender_username"),
+    User.first_name.label("sender_first_name"),
+    User.last_name.label("sender_last_name"),
+    User.profile_photo_url.label("sender_profile_photo_url"),
+)
+
+
+def message_from_row(row) -> MessageSchema:
+    """
+    Построение MessageSchema из строки запроса по MESSAGE_COLUMNS + SENDER_COLUMNS
+    """
+    return MessageSchema.model_validate({
+        "id": row.id,
+        "chat_id": row.chat_id,
+        "sender_id": row.sender_id,
+        "sender": {
+            "id": row.sender_id,
+            "telegram_id": row.sender_telegram_id,
+            "username": row.sender_username,
+            "first_name": row.sender_first_name,
+            "last_name": row.sender_last_name,
+            "profile_photo_url": row.sender_profile_photo_url,
+        },
+        "text": row.text,
+        "message_type": row.message_type,
+        "reply_to_message_id": row.reply_to_message_id,
+        "media_url": row.media_url,
+        "media_type": row.media_type,
+        "media_size": row.media_size,
+        "media_duration": row.media_duration,
+        "forward_from_user_id": row.forward_from_user_id,
+        "forward_from_chat_id": row.forward_from_chat_id,
+        "is_edited": row.is_edited,
+        "is_deleted": row.is_deleted,
+        "read_by": row.read_by or [],
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    })
+
 
 @router.get("/chat/{chat_id}", response_model=MessageList)
 async def get_chat_messages(
     chat_id: int,
     page: int = Query(1, ge=1),
     per_page: int = Query(50, ge=1, le=100),
+    before: Optional[datetime] = Query(None, description="Только сообщения, созданные раньше этого времени"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Получение сообщений из чата с пагинацией
+    Получение сообщений из чата с пагинацией.
+
+    created_at — ключ секционирования messages в PostgreSQL: сортировка по
+    нему позволяет читать партиции от новых к старым с ранней остановкой по
+    LIMIT, а курсор before отсекает более новые партиции еще до чтения.
     """
     # Проверяем, что пользователь является участником чата
     is_member = db.query(chat_members).filter(
@@ -37,25 +105,22 @@ async def get_chat_messages(
     if not is_member:
         raise HTTPException(status_code=403, detail="Доступ запрещен")
     
+    filters = [Message.chat_id == chat_id, Message.is_deleted == False]
+    if before is not None:
+        filters.append(Message.created_at < before)
+    
     # Получаем общее количество сообщений
-    total = db.query(Message).filter(
-        and_(
-            Message.chat_id == chat_id,
-            Message.is_deleted == False
-        )
-    ).count()
+    total = db.query(func.count(Message.id)).filter(and_(*filters)).scalar()
     
-    # Получаем сообщения с пагинацией (сначала новые)
+    # Получаем сообщения с пагинацией (сначала новые) одним запросом
+    # по колонкам, без загрузки ORM объектов и ленивой подгрузки отправителя
     offset = (page - 1) * per_page
-    messages = db.query(Message).filter(
-        and_(
-            Message.chat_id == chat_id,
-            Message.is_deleted == False
-        )
-    ).order_by(desc(Message.created_at)).offset(offset).limit(per_page).all()
+    rows = db.query(*MESSAGE_COLUMNS, *SENDER_COLUMNS).join(
+        User, User.id == Message.sender_id
+    ).filter(and_(*filters)).order_by(desc(Message.created_at)).offset(offset).limit(per_page).all()
     
     # Обратный порядок для отображения (старые сначала)
-    messages.reverse()
+    messages = [message_from_row(row) for row in reversed(rows)]
     
     return MessageList(
         messages=messages,
@@ -98,6 +163,18 @@ async def send_message(
     if not chat:
         raise HTTPException(status_code=404, detail="Чат не найден")
     
+    # Внешнего ключа на reply_to_message_id в секционированной таблице нет,
+    # поэтому сообщение для ответа проверяется здесь
+    if message_data.reply_to_message_id is not None:
+        reply_exists = db.query(Message.id).filter(
+            and_(
+                Message.id == message_data.reply_to_message_id,
+                Message.chat_id == message_data.chat_id
+            )
+        ).first()
+        if not reply_exists:
+            raise HTTPException(status_code=400, detail="Сообщение для ответа не найдено")
+    
     # Создаем сообщение
     new_message = Message(
         chat_id=message_data.chat_id,
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from app.models.user import User
+from app.schemas.user import UserPresence
+from app.auth.dependencies import get_current_user
+from app.websocket.presence import presence
+
+router = APIRouter(prefix="/presence", tags=["presence"])
+
+# Максимум пользователей в одном запросе
+MAX_PRESENCE_USERS = 200
+
+
+@router.get("", response_model=List[UserPresence])
+async def get_presence(
+    user_ids: str = Query(..., description="id пользователей через запятую"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Статусы присутствия нескольких пользователей одним запросом
+    """
+    try:
+        ids = list(dict.fromkeys(int(item) for item in user_ids.split(",") if item.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный список user_ids")
+    
+    if not ids:
+        raise HTTPException(status_code=400, detail="Список user_ids пуст")
+    if len(ids) > MAX_PRESENCE_USERS:
+        raise HTTPException(status_code=400, detail=f"Не больше {MAX_PRESENCE_USERS} пользователей за запрос")
+    
+    return presence.status(ids)
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
-from sqlalchemy import and_
-from typing import List
-from app.models.chat_invitation import ChatInvitation
+from sqlalchemy import func, or_
+from typing import List, Optional
 from app.database import get_db
-from app.models.user import User
-from app.models.chat import chat_members
-from app.schemas.user import UserCreate, UserUpdate, User as UserSchema, UserList, SubordinateBase
+from app.models.user import User, subordinates_association
+from app.schemas.user import UserCreate, UserUpdate, User as UserSchema, UserList, SubordinateBase, SubordinateReport, OrgTreeNode, UserSearchPage
 from app.auth.dependencies import get_current_user
+from app.services.invitations import accept_pending_invitations
+from app.services.hierarchy import add_subordinate_link, all_reports, is_direct_subordinate, is_report, org_tree
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -90,6 +89,47 @@ async def get_users(
     )
 
 
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+@router.get("/search", response_model=UserSearchPage)
+async def search_users(
+    prefix: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Поиск активных пользователей по началу username или имени без учета регистра.
+    Условия lower(...) LIKE 'prefix%' используют индексы ix_users_*_lower;
+    пагинация по курсору — id последнего пользователя страницы.
+    """
+    pattern = escape_like(prefix.strip().lower()) + "%"
+    query = db.query(User).filter(
+        User.is_active == True,
+        or_(
+            func.lower(User.username).like(pattern, escape="\\"),
+            func.lower(User.first_name).like(pattern, escape="\\")
+        )
+    )
+    if cursor is not None:
+        try:
+            query = query.filter(User.id > int(cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    users = query.order_by(User.id).limit(limit + 1).all()
+    has_more = len(users) > limit
+    users = users[:limit]
+    return UserSearchPage(
+        users=users,
+        next_cursor=str(users[-1].id) if has_more else None,
+        has_more=has_more
+    )
+
+
 @router.get("/subordinates", response_model=List[UserSchema])
 async def get_subordinates(
     current_user: User = Depends(get_current_user),
@@ -121,15 +161,13 @@ async def add_subordinate(
     if not subordinate:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
-    # Проверяем, не является ли пользователь уже подчиненным
-    if subordinate in current_user.subordinates:
-        raise HTTPException(status_code=400, detail="Пользователь уже является подчиненным")
+    # Повторная связь и циклы проверяются запросами EXISTS по индексам
+    error = add_subordinate_link(db, current_user.id, subordinate.id)
+    if error:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=error)
     
-    # Добавляем подчиненного
-    current_user.subordinates.append(subordinate)
     db.commit()
-    db.refresh(current_user)
-    
     return subordinate
 
 
@@ -151,17 +189,56 @@ async def remove_subordinate(
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
     # Проверяем, является ли пользователь подчиненным
-    if subordinate not in current_user.subordinates:
+    if not is_direct_subordinate(db, current_user.id, subordinate_id):
         raise HTTPException(status_code=400, detail="Пользователь не является подчиненным")
     
     # Удаляем подчиненного
-    current_user.subordinates.remove(subordinate)
+    db.execute(subordinates_association.delete().where(
+        subordinates_association.c.manager_id == current_user.id,
+        subordinates_association.c.subordinate_id == subordinate_id
+    ))
     db.commit()
-    db.refresh(current_user)
     
     return subordinate
 
 
+def check_hierarchy_access(db: Session, current_user: User, user_id: int) -> None:
+    """
+    Иерархию пользователя видят администраторы, сам пользователь и его
+    руководители любого уровня
+    """
+    if current_user.is_admin or current_user.id == user_id:
+        return
+    if not is_report(db, current_user.id, user_id):
+        raise HTTPException(status_code=403, detail="Нет доступа к иерархии пользователя")
+
+
+@router.get("/{user_id}/reports", response_model=List[SubordinateReport])
+async def get_all_reports(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Все подчиненные пользователя на любом уровне (рекурсивный CTE)
+    """
+    check_hierarchy_access(db, current_user, user_id)
+    return [{"user": user, "depth": depth} for user, depth in all_reports(db, user_id)]
+
+
+@router.get("/{user_id}/org-tree", response_model=List[OrgTreeNode])
+async def get_org_tree(
+    user_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Дерево подчиненных пользователя
+    """
+    check_hierarchy_access(db, current_user, user_id)
+    return org_tree(db, user_id)
+
+
 @router.post("/check-invitations")
 async def check_and_accept_invitations(
     current_user: User = Depends(get_current_user),
@@ -173,40 +250,7 @@ async def check_and_accept_invitations(
     if not current_user.username:
         return {"message": "У пользователя нет username", "accepted": 0}
     
-    # Находим активные приглашения для этого username
-    invitations = db.query(ChatInvitation).filter(
-        and_(
-            ChatInvitation.username == current_user.username,
-            ChatInvitation.is_active == True
-        )
-    ).all()
-    
-    accepted_count = 0
-    
-    for invitation in invitations:
-        # Проверяем, что пользователь еще не является участником чата
-        existing_member = db.query(chat_members).filter(
-            and_(
-                chat_members.c.user_id == current_user.id,
-                chat_members.c.chat_id == invitation.chat_id
-            )
-        ).first()
-        
-        if not existing_member:
-            # Добавляем пользователя в чат
-            db.execute(
-                chat_members.insert().values(
-                    user_id=current_user.id,
-                    chat_id=invitation.chat_id,
-                    is_admin=False
-                )
-            )
-            accepted_count += 1
-        
-        # Деактивируем приглашение
-        invitation.is_active = False
-        invitation.accepted_at = func.now()
-    
+    accepted_count = accept_pending_invitations(db, current_user)
     db.commit()
     
-    return {"message": f"Принято {accepted_count} приглашений", "accepted": accepted_count} 
\ No newline at end of file
+    return {"message": f"Принято {accepted_count} приглашений", "accepted": accepted_count}
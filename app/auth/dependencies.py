@@ -5,6 +5,7 @@ import logging
 from app.database import get_db
 from app.models.user import User
 from app.auth.telegram import validate_telegram_data, extract_user_info
+from app.services.invitations import accept_pending_invitations
 
 # Настраиваем логгер
 logger = logging.getLogger(__name__)
@@ -45,6 +46,7 @@ async def get_current_user(
         
         # Ищем пользователя в базе данных
         user = db.query(User).filter(User.telegram_id == telegram_id).first()
+        previous_username = user.username if user else None
         
         if not user:
             logger.info(f"Создание нового пользователя с telegram_id: {telegram_id}")
@@ -83,6 +85,15 @@ async def get_current_user(
                 logger.error(f"Ошибка при обновлении пользователя: {e}")
                 db.rollback()
         
+        # Username встречается впервые — принимаем ожидающие приглашения в чаты
+        if user.username and user.username != previous_username:
+            try:
+                accept_pending_invitations(db, user)
+                db.commit()
+            except Exception as e:
+                logger.error(f"Ошибка при принятии приглашений: {e}")
+                db.rollback()
+        
         # Проверяем, есть ли администраторы в системе
         admin_exists = db.query(User).filter(User.is_admin == True).first()
         if not admin_exists:
@@ -22,11 +22,77 @@ class Settings(BaseSettings):
     # File upload settings
     upload_dir: str = os.getenv("UPLOAD_DIR", "uploads")
     max_file_size: int = int(os.getenv("MAX_FILE_SIZE", "52428800"))  # 50MB
+
+    # Message archive settings
+    message_retention_months: int = int(os.getenv("MESSAGE_RETENTION_MONTHS", "12"))
+    message_archive_dir: str = os.getenv("MESSAGE_ARCHIVE_DIR", "archives/messages")
+
+    # LLM settings: openai, fake (локальный детерминированный) или пусто — openai при наличии ключа
+    llm_provider: str = os.getenv("LLM_PROVIDER", "").lower()
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "60"))  # общий лимит запроса с повторами, секунд
+    fake_llm_latency: float = float(os.getenv("FAKE_LLM_LATENCY", "0.5"))  # секунд
+    fake_llm_error_rate: float = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+
+    # LLM response cache settings
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    llm_cache_ttl: int = int(os.getenv("LLM_CACHE_TTL", "604800"))  # секунд, 7 дней
+    llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    # Ответы с температурой выше порога не кэшируются
+    llm_cache_max_temperature: float = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.8"))
+
+    # OpenAI settings
+    openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
+    openai_model: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    openai_timeout: float = float(os.getenv("OPENAI_TIMEOUT", "20"))  # секунд на попытку
+    openai_max_retries: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+    # Interview scoring queue settings
+    scoring_workers: int = int(os.getenv("SCORING_WORKERS", "2"))
+    scoring_concurrency: int = int(os.getenv("SCORING_CONCURRENCY", "2"))  # одновременных запросов к модели
+    scoring_batch_size: int = int(os.getenv("SCORING_BATCH_SIZE", "5"))
+    scoring_batch_wait: float = float(os.getenv("SCORING_BATCH_WAIT", "0.5"))  # секунд
+    # Интервью, захваченное воркером и не оцененное за это время, забирает другой процесс
+    scoring_claim_ttl: float = float(os.getenv("SCORING_CLAIM_TTL", "300"))  # секунд
+    scoring_drain_timeout: float = float(os.getenv("SCORING_DRAIN_TIMEOUT", "10"))  # секунд при остановке
+
+    # Интервью в статусе generating дольше этого времени считается потерянным
+    # (процесс перезапустился во время генерации) и переводится в failed
+    interview_generating_timeout: float = float(os.getenv("INTERVIEW_GENERATING_TIMEOUT", "600"))  # секунд
+
+    # HR analytics settings: минимальный процент баллов для прохождения интервью
+    interview_pass_percentage: float = float(os.getenv("INTERVIEW_PASS_PERCENTAGE", "60"))
+
+    # Кэш публичного списка позиций: страховочный TTL для изменений из других процессов
+    public_positions_cache_ttl: float = float(os.getenv("PUBLIC_POSITIONS_CACHE_TTL", "60"))  # секунд
+
+    # Deleted messages purge settings
+    message_purge_enabled: bool = os.getenv("MESSAGE_PURGE_ENABLED", "True").lower() == "true"
+    message_purge_interval: int = int(os.getenv("MESSAGE_PURGE_INTERVAL", "3600"))  # секунд
+    message_purge_retention_days: int = int(os.getenv("MESSAGE_PURGE_RETENTION_DAYS", "30"))
+    message_purge_batch_size: int = int(os.getenv("MESSAGE_PURGE_BATCH_SIZE", "500"))
+    message_purge_batch_pause: float = float(os.getenv("MESSAGE_PURGE_BATCH_PAUSE", "0.5"))  # секунд
+    message_purge_max_batches: int = int(os.getenv("MESSAGE_PURGE_MAX_BATCHES", "200"))
+
+    # Presence settings: пользователь офлайн, если от него нет кадров /ws дольше presence_ttl
+    presence_ttl: float = float(os.getenv("PRESENCE_TTL", "60"))  # секунд
+    # Окно, за которое изменения статусов собираются в одну рассылку
+    presence_debounce: float = float(os.getenv("PRESENCE_DEBOUNCE", "2"))  # секунд
+
+    # Response compression settings
+    compression_min_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # байт
+    compression_level: int = int(os.getenv("COMPRESSION_LEVEL", "6"))  # gzip 1-9, brotli 0-11
     
     # App settings
     app_name: str = "Aeon Messenger"
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
-    
+
+    # Logging settings
+    log_file: str = os.getenv("LOG_FILE", "app.log")
+    # Доля запросов, попадающих в access log (ошибки 5xx логируются всегда)
+    access_log_sample_rate: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+    # Уровни отдельных логгеров, например "app.api.admin=DEBUG,app.api.hr=WARNING"
+    log_levels: str = os.getenv("LOG_LEVELS", "")
+
     # Heroku settings
     port: int = int(os.getenv("PORT", "8000"))
     host: str = os.getenv("HOST", "0.0.0.0")
@@ -47,3 +47,35 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def dialect_insert(db, table):
+    """
+    INSERT с поддержкой ON CONFLICT для текущего диалекта (PostgreSQL/SQLite)
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT не поддерживается для {dialect}")
+    return insert(table)
+
+
+def insert_ignore(db, table):
+    """
+    INSERT ... ON CONFLICT DO NOTHING для текущего диалекта (PostgreSQL/SQLite)
+    """
+    return dialect_insert(db, table).on_conflict_do_nothing()
+
+
+def upsert(db, table, values: dict, index_elements, update_columns):
+    """
+    INSERT ... ON CONFLICT (index_elements) DO UPDATE для колонок update_columns
+    """
+    stmt = dialect_insert(db, table).values(**values)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: stmt.excluded[column] for column in update_columns}
+    )
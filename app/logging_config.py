@@ -0,0 +1,77 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+from typing import Dict, Optional
+
+from app.config import settings
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_log_levels(spec: str) -> Dict[str, int]:
+    """
+    Разбор переопределений уровней вида "app.api.admin=DEBUG,app.api.hr=WARNING";
+    некорректные элементы пропускаются
+    """
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if name and isinstance(logging.getLevelName(level), int):
+            levels[name] = logging.getLevelName(level)
+    return levels
+
+
+def apply_log_levels(spec: str) -> None:
+    """
+    Переопределение уровней отдельных логгеров (например, роутеров API),
+    чтобы включать подробные логи только там, где они нужны
+    """
+    for name, level in parse_log_levels(spec).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def setup_logging() -> None:
+    """
+    Настройка неблокирующего логирования.
+
+    Обработчики логгеров только кладут записи в очередь (QueueHandler), а
+    запись в консоль и в файл выполняет фоновый поток QueueListener, поэтому
+    медленный диск не задерживает event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if not settings.debug and settings.log_file:
+        handlers.append(logging.FileHandler(settings.log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG if settings.debug else logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    apply_log_levels(settings.log_levels)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """
+    Остановка фонового потока логирования с дозаписью очереди
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -1,31 +1,31 @@
 from fastapi import FastAPI, Depends, HTTPException, Request
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+import asyncio
 import os
 import logging
-import traceback
 
 from app.config import settings
+from app.logging_config import setup_logging
+from app.middleware import AccessLogMiddleware, CompressionMiddleware
+from app.responses import DefaultResponse
+from app.services.interviews import fail_stale_generating
+from app.services.purge import run_purge_worker
+from app.services.scoring import scoring_queue
+from app.websocket.presence import run_presence_worker
+from app import database
 from app.database import get_db, engine
 from app.models import user, chat, message
-from app.api import chats, messages, admin, hr
+from app.api import chats, messages, admin, hr, users, presence
 from app.websocket import router as websocket_router
 from app.auth.dependencies import get_current_user
 from app.models.user import User
 from app.models.chat_invitation import ChatInvitation
 
 # Настройка логирования
-logging.basicConfig(
-    level=logging.DEBUG if settings.debug else logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('app.log') if not settings.debug else logging.NullHandler()
-    ]
-)
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +34,8 @@ app = FastAPI(
     description="Backend для мессенджера Aeon - Telegram Mini App",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=DefaultResponse
 )
 
 # ВАЖНО: Более агрессивные настройки CORS для исправления проблем
@@ -54,77 +55,23 @@ if cors_origins_env:
     env_origins = [origin.strip() for origin in cors_origins_env.split(",")]
     ALLOWED_ORIGINS.extend(env_origins)
 
-logger.info(f"🌐 CORS Origins: {ALLOWED_ORIGINS}")
+logger.info("🌐 CORS Origins: %s", ALLOWED_ORIGINS)
 
-# Настройка CORS с максимальной совместимостью
+# Сжатие JSON ответов (без /media и websocket)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Временно разрешаем все
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH", "HEAD"],
-    allow_headers=["*", "x-telegram-init-data"],
-    expose_headers=["*"]
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    compression_level=settings.compression_level,
+    exclude_paths=("/media",)
 )
 
-def add_cors_headers(response, origin=None):
-    """Добавляет CORS заголовки к ответу"""
-    if origin and origin in ALLOWED_ORIGINS:
-        response.headers["Access-Control-Allow-Origin"] = origin
-    else:
-        response.headers["Access-Control-Allow-Origin"] = "*"
-
-    response.headers["Access-Control-Allow-Credentials"] = "true"
-    response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, PATCH, HEAD"
-    response.headers["Access-Control-Allow-Headers"] = "Accept, Accept-Language, Content-Language, Content-Type, Authorization, X-Requested-With, Origin, X-CSRF-Token, x-telegram-init-data"
-    response.headers["Access-Control-Expose-Headers"] = "*"
-    response.headers["Access-Control-Max-Age"] = "86400"
-    return response
-
-@app.middleware("http")
-async def cors_and_error_handler(request: Request, call_next):
-    """Универсальный обработчик CORS и ошибок"""
-    origin = request.headers.get('origin')
-    method = request.method
-
-    logger.info(f"📡 {method} {request.url} from {origin}")
-
-    # Обработка OPTIONS запросов
-    if method == "OPTIONS":
-        response = JSONResponse(content={"status": "ok"})
-        response = add_cors_headers(response, origin)
-        logger.info(f"✅ OPTIONS response for {origin}")
-        return response
-
-    try:
-        # Выполняем запрос
-        response = await call_next(request)
-
-        # Добавляем CORS заголовки к успешному ответу
-        response = add_cors_headers(response, origin)
-
-        logger.info(f"✅ {method} {request.url} -> {response.status_code}")
-        return response
-
-    except Exception as e:
-        # Логируем ошибку
-        logger.error(f"❌ Error in {method} {request.url}: {str(e)}")
-        logger.error(traceback.format_exc())
-
-        # Создаем JSON ответ об ошибке
-        error_content = {
-            "error": "Internal Server Error",
-            "detail": str(e) if settings.debug else "An unexpected error occurred",
-            "status_code": 500
-        }
-
-        # Создаем ответ с CORS заголовками
-        error_response = JSONResponse(
-            status_code=500,
-            content=error_content
-        )
-        error_response = add_cors_headers(error_response, origin)
-
-        return error_response
+# Единый middleware для CORS, access log и обработки ошибок
+app.add_middleware(
+    AccessLogMiddleware,
+    allowed_origins=ALLOWED_ORIGINS,
+    sample_rate=settings.access_log_sample_rate,
+    debug=settings.debug
+)
 
 # Создаем директорию для медиа файлов
 os.makedirs(settings.upload_dir, exist_ok=True)
@@ -137,6 +84,8 @@ app.include_router(chats.router, prefix="/api/v1")
 app.include_router(messages.router, prefix="/api/v1")
 app.include_router(admin.router, prefix="/api/v1")
 app.include_router(hr.router, prefix="/api/v1")
+app.include_router(users.router, prefix="/api/v1")
+app.include_router(presence.router, prefix="/api/v1")
 app.include_router(websocket_router.router)
 
 
@@ -152,6 +101,34 @@ async def startup_event():
     Base.metadata.create_all(bind=engine)
     
     logger.info("Таблицы базы данных созданы")
+    
+    # Интервью, генерация вопросов которых прервалась перезапуском
+    db = database.SessionLocal()
+    try:
+        fail_stale_generating(db)
+        db.commit()
+    finally:
+        db.close()
+    
+    # Фоновая очистка удаленных сообщений
+    if settings.message_purge_enabled:
+        app.state.purge_task = asyncio.create_task(run_purge_worker())
+    
+    # Воркеры очереди оценки интервью
+    scoring_queue.start()
+    
+    # Истечение присутствия и пакетная рассылка статусов
+    app.state.presence_task = asyncio.create_task(run_presence_worker())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Останавливаем фоновые задачи"""
+    for task_name in ("purge_task", "presence_task"):
+        task = getattr(app.state, task_name, None)
+        if task is not None:
+            task.cancel()
+    await scoring_queue.stop()
 
 
 @app.get("/")
@@ -296,5 +273,7 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=settings.debug
+        reload=settings.debug,
+        ws="websockets",
+        ws_per_message_deflate=True
     )
@@ -0,0 +1,362 @@
+import json
+import logging
+import random
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli опционален, без него используется только gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
+
+Header = Tuple[bytes, bytes]
+
+# Статические CORS заголовки вычисляются один раз при импорте
+CORS_STATIC_HEADERS: Tuple[Header, ...] = (
+    (b"access-control-allow-credentials", b"true"),
+    (b"access-control-allow-methods", b"GET, POST, PUT, DELETE, OPTIONS, PATCH, HEAD"),
+    (
+        b"access-control-allow-headers",
+        b"Accept, Accept-Language, Content-Language, Content-Type, Authorization, "
+        b"X-Requested-With, Origin, X-CSRF-Token, x-telegram-init-data",
+    ),
+    (b"access-control-expose-headers", b"*"),
+    (b"access-control-max-age", b"86400"),
+)
+CORS_ANY_ORIGIN: Tuple[Header, ...] = ((b"access-control-allow-origin", b"*"),)
+
+PREFLIGHT_BODY = b'{"status":"ok"}'
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/x-ndjson", b"application/javascript")
+
+# Поддерживаемые алгоритмы сжатия в порядке предпочтения
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+
+class AccessLogMiddleware:
+    """
+    Единый ASGI middleware: CORS заголовки, выборочный access log и
+    перехват необработанных ошибок.
+
+    Работает на уровне ASGI без BaseHTTPMiddleware, чтобы не создавать
+    лишних задач и копий тела ответа на каждый запрос.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allowed_origins: Iterable[str] = ("*",),
+        sample_rate: float = 1.0,
+        debug: bool = False,
+    ):
+        self.app = app
+        origins = set(allowed_origins)
+        self.allow_any_origin = "*" in origins
+        self.allowed_origins = frozenset(o.encode("latin-1") for o in origins if o != "*")
+        self.sample_rate = sample_rate
+        self.debug = debug
+
+    def cors_headers(self, origin: Optional[bytes]) -> List[Header]:
+        """
+        Собирает CORS заголовки для конкретного Origin
+        """
+        if origin and (self.allow_any_origin or origin in self.allowed_origins):
+            headers = [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+        else:
+            headers = list(CORS_ANY_ORIGIN)
+        headers.extend(CORS_STATIC_HEADERS)
+        return headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+                break
+        cors_headers = self.cors_headers(origin)
+
+        if scope["method"] == "OPTIONS":
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(PREFLIGHT_BODY)).encode()),
+                    *cors_headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": PREFLIGHT_BODY})
+            return
+
+        status_code = 500
+        response_started = False
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                message["headers"] = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if not name.lower().startswith(b"access-control-")
+                ] + cors_headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error("Необработанная ошибка в %s %s", scope["method"], scope["path"], exc_info=True)
+            if response_started:
+                raise
+            body = json.dumps({
+                "error": "Internal Server Error",
+                "detail": str(e) if self.debug else "An unexpected error occurred",
+                "status_code": 500,
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    *cors_headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+        finally:
+            if status_code >= 500 or random.random() < self.sample_rate:
+                self.log_access(scope, status_code, time.perf_counter() - start)
+
+    def log_access(self, scope: Scope, status_code: int, duration: float) -> None:
+        """
+        Структурированная запись access log; форматирование выполняется
+        только если уровень INFO включен
+        """
+        if not access_logger.isEnabledFor(logging.INFO):
+            return
+        access_logger.info(
+            "%s %s -> %d (%.1f ms)",
+            scope["method"],
+            scope["path"],
+            status_code,
+            duration * 1000,
+            extra={
+                "http_method": scope["method"],
+                "http_path": scope["path"],
+                "http_status": status_code,
+                "duration_ms": round(duration * 1000, 3),
+            },
+        )
+
+
+class CompressionMiddleware:
+    """
+    Сжатие HTTP ответов gzip/brotli по заголовку Accept-Encoding.
+
+    Ответы меньше minimum_size отдаются как есть. Потоковые ответы
+    сжимаются по мере поступления чанков (с flush после каждого), поэтому
+    клиент получает данные без ожидания конца выгрузки. Пути из
+    exclude_paths (например /media) и websocket не затрагиваются.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compression_level: int = 6,
+        exclude_paths: Iterable[str] = ("/media",),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compression_level = compression_level
+        self.exclude_paths = tuple(exclude_paths)
+
+    def select_encoding(self, scope: Scope) -> Optional[str]:
+        """
+        Выбор алгоритма сжатия по Accept-Encoding клиента с учетом q-значений.
+        Алгоритм с q=0 (явно или через *;q=0) не используется; если identity
+        указан с большим q, чем доступные алгоритмы, ответ не сжимается.
+        """
+        accept_encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+                break
+        preferences = parse_accept_encoding(accept_encoding.decode("latin-1"))
+        wildcard = preferences.get("*", 0.0)
+
+        best, best_q = None, 0.0
+        # При равных q выигрывает первый: brotli сжимает JSON лучше gzip
+        for encoding in SUPPORTED_ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            q = preferences.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        if best is None or best_q < preferences.get("identity", 0.0):
+            return None
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+
+        # Без подходящего алгоритма ответ идет несжатым, но с Vary
+        responder = CompressionResponder(send, self.select_encoding(scope), self.minimum_size, self.compression_level)
+        await self.app(scope, receive, responder.send)
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """
+    Разбор Accept-Encoding: "gzip;q=0.8, br" -> {"gzip": 0.8, "br": 1.0}.
+    Токены с некорректным q пропускаются.
+    """
+    preferences: Dict[str, float] = {}
+    for item in value.split(","):
+        token, _, params = item.partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, raw = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(raw.strip())
+                except ValueError:
+                    q = -1.0
+        if 0.0 <= q <= 1.0:
+            preferences[token] = q
+    return preferences
+
+
+def with_vary_accept_encoding(headers: List[Header]) -> List[Header]:
+    """Добавляет Accept-Encoding в заголовок Vary, не дублируя его"""
+    headers = list(headers)
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            tokens = {token.strip().lower() for token in value.split(b",")}
+            if b"accept-encoding" not in tokens and b"*" not in tokens:
+                headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+class CompressionResponder:
+    """
+    Обертка над send для одного ответа: копит тело до порога,
+    затем переключается на потоковое сжатие. Без encoding ответ не
+    сжимается; сжимаемые по типу ответы в любом случае получают
+    Vary: Accept-Encoding, чтобы кэши не отдавали несжатый вариант
+    клиентам со сжатием и наоборот.
+    """
+
+    def __init__(self, send: Send, encoding: Optional[str], minimum_size: int, compression_level: int):
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.compression_level = compression_level
+        self.start_message: Optional[Message] = None
+        self.buffer = bytearray()
+        self.compressor = None
+        self.passthrough = False
+
+    def encoded_etag(self, value: bytes) -> bytes:
+        """
+        Сильный ETag сжатого ответа должен отличаться от несжатого:
+        "abc" -> "abc-gzip"
+        """
+        if value.startswith(b'"') and value.endswith(b'"'):
+            return value[:-1] + b"-" + self.encoding.encode() + b'"'
+        return value
+
+    def create_compressor(self):
+        if self.encoding == "br":
+            return brotli.Compressor(quality=max(0, min(11, self.compression_level)))
+        return zlib.compressobj(max(1, min(9, self.compression_level)), zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        if self.encoding == "br":
+            chunk = self.compressor.process(data)
+            return chunk + (self.compressor.finish() if finish else self.compressor.flush())
+        chunk = self.compressor.compress(data)
+        return chunk + self.compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = message.get("headers", [])
+            content_type = b""
+            for name, value in headers:
+                lower = name.lower()
+                if lower == b"content-encoding":
+                    self.passthrough = True
+                elif lower == b"content-type":
+                    content_type = value.lower()
+            if not content_type.startswith(COMPRESSIBLE_TYPES):
+                self.passthrough = True
+            if self.passthrough:
+                await self._send(message)
+            elif self.encoding is None:
+                self.passthrough = True
+                message["headers"] = with_vary_accept_encoding(headers)
+                await self._send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            self.buffer.extend(body)
+            if len(self.buffer) < self.minimum_size:
+                if more_body:
+                    return
+                # Ответ целиком меньше порога — отдаем без сжатия
+                self.start_message["headers"] = with_vary_accept_encoding(self.start_message.get("headers", []))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": bytes(self.buffer)})
+                return
+
+            self.compressor = self.create_compressor()
+            headers = [
+                (name, self.encoded_etag(value) if name.lower() == b"etag" else value)
+                for name, value in self.start_message.get("headers", [])
+                if name.lower() != b"content-length"
+            ]
+            headers.append((b"content-encoding", self.encoding.encode()))
+            headers = with_vary_accept_encoding(headers)
+            if not more_body:
+                compressed = self.compress(bytes(self.buffer), finish=True)
+                headers.append((b"content-length", str(len(compressed)).encode()))
+                self.start_message["headers"] = headers
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            self.start_message["headers"] = headers
+            await self._send(self.start_message)
+            body = bytes(self.buffer)
+            self.buffer.clear()
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self.compress(body, finish=not more_body),
+            "more_body": more_body,
+        })
@@ -6,6 +6,10 @@ from .position import Position
 from .quality import Quality
 from .position_quality import PositionQuality
 from .interview import Interview
+from .interview_answer import InterviewAnswer
+from .position_question import PositionQuestion
+from .llm_cache import LLMCacheEntry
+from .position_interview_stats import PositionInterviewStats
 
 __all__ = [
     "User",
@@ -16,5 +20,9 @@ __all__ = [
     "Position",
     "Quality", 
     "PositionQuality",
-    "Interview"
+    "Interview",
+    "InterviewAnswer",
+    "PositionQuestion",
+    "LLMCacheEntry",
+    "PositionInterviewStats"
 ] 
\ No newline at end of file
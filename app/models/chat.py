@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,7 +10,9 @@ chat_members = Table(
     Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
     Column('chat_id', Integer, ForeignKey('chats.id'), primary_key=True),
     Column('joined_at', DateTime(timezone=True), server_default=func.now()),
-    Column('is_admin', Boolean, default=False)
+    Column('is_admin', Boolean, default=False),
+    # Обратный поиск участников по chat_id (PK покрывает поиск по user_id)
+    Index('ix_chat_members_chat_id_user_id', 'chat_id', 'user_id', postgresql_include=['is_admin'])
 )
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -17,4 +17,15 @@ class ChatInvitation(Base):
     
     # Отношения
     chat = relationship("Chat")
-    inviter = relationship("User", foreign_keys=[invited_by]) 
\ No newline at end of file
+    inviter = relationship("User", foreign_keys=[invited_by]) 
+    
+    __table_args__ = (
+        # Частичный индекс: ищутся только активные приглашения по username (и чату)
+        Index(
+            "ix_chat_invitations_active_username_chat_id",
+            "username",
+            "chat_id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1")
+        ),
+    )
@@ -1,25 +1,58 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from typing import Any, Dict, Optional
 from app.database import Base
 
 class Interview(Base):
     __tablename__ = "interviews"
+    __table_args__ = (
+        # Поиск активного интервью пользователя
+        Index("ix_interviews_user_id_status", "user_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     position_id = Column(Integer, ForeignKey("positions.id"), nullable=False)
-    status = Column(String(50), default="in_progress")  # in_progress, completed, cancelled
+    status = Column(String(50), default="in_progress")  # generating, in_progress, scoring, completed, cancelled, failed
     score = Column(Integer)  # Общий балл
     max_score = Column(Integer, default=100)
-    answers = Column(JSON)  # Ответы на вопросы
+    # Ответы хранятся в interview_answers; колонка answers — только для
+    # интервью, сохраненных до переноса
+    legacy_answers = Column("answers", JSON)
     questions = Column(JSON)  # Вопросы интервью
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True))
+    # Когда процесс взял интервью в оценку; по истечении SCORING_CLAIM_TTL его забирает другой процесс
+    scoring_claimed_at = Column(DateTime(timezone=True))
     
     # Связи
     user = relationship("User", back_populates="interviews")
     position = relationship("Position", back_populates="interviews")
+    answer_rows = relationship(
+        "InterviewAnswer",
+        order_by="InterviewAnswer.question_index",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin"
+    )
+    
+    @property
+    def answers(self) -> Dict[str, Any]:
+        """Ответы интервью: question_index (строкой) -> ответ"""
+        answers = dict(self.legacy_answers or {})
+        for row in self.answer_rows:
+            answers[str(row.question_index)] = row.answer
+        return answers
+    
+    @answers.setter
+    def answers(self, value: Optional[Dict[str, Any]]):
+        from app.models.interview_answer import InterviewAnswer
+        self.legacy_answers = None
+        self.answer_rows = [
+            InterviewAnswer(question_index=int(index), answer=str(answer))
+            for index, answer in (value or {}).items()
+        ]
     
     def __repr__(self):
         return f"<Interview(id={self.id}, user_id={self.user_id}, position_id={self.position_id}, status='{self.status}', score={self.score})>" 
\ No newline at end of file
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+class InterviewAnswer(Base):
+    """Ответ на один вопрос интервью; сохраняется upsert'ом по (interview_id, question_index)"""
+    __tablename__ = "interview_answers"
+    
+    interview_id = Column(Integer, ForeignKey("interviews.id", ondelete="CASCADE"), primary_key=True)
+    question_index = Column(Integer, primary_key=True)
+    answer = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<InterviewAnswer(interview_id={self.interview_id}, question_index={self.question_index})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, JSON, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -6,6 +6,23 @@ from app.database import Base
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # История чата и последнее сообщение: только неудаленные, по времени
+        Index(
+            "ix_messages_chat_id_created_at_live",
+            "chat_id",
+            "created_at",
+            postgresql_where=text("is_deleted = false"),
+            sqlite_where=text("is_deleted = 0")
+        ),
+        # Поиск ответов на сообщение при очистке удаленных сообщений
+        Index(
+            "ix_messages_reply_to_message_id",
+            "reply_to_message_id",
+            postgresql_where=text("reply_to_message_id IS NOT NULL"),
+            sqlite_where=text("reply_to_message_id IS NOT NULL")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     chat_id = Column(Integer, ForeignKey('chats.id'), nullable=False)
@@ -31,7 +48,9 @@ class Message(Base):
     is_deleted = Column(Boolean, default=False)
     read_by = Column(JSON, default=list)  # список user_id, которые прочитали сообщение
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # В PostgreSQL таблица секционирована по месяцам created_at
+    # (PK (id, created_at), см. миграцию 9c3e5f7a1b2d)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Отношения
@@ -16,6 +16,7 @@ class Position(Base):
     # Связи
     qualities = relationship("PositionQuality", back_populates="position", cascade="all, delete-orphan")
     interviews = relationship("Interview", back_populates="position", cascade="all, delete-orphan")
+    question_bank = relationship("PositionQuestion", back_populates="position", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Position(id={self.id}, title='{self.title}', is_active={self.is_active})>" 
\ No newline at end of file
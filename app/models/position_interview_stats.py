@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+class PositionInterviewStats(Base):
+    """
+    Агрегаты завершенных интервью позиции по корзинам гистограммы баллов.
+    Обновляется инкрементально при завершении оценки интервью.
+    """
+    __tablename__ = "position_interview_stats"
+    
+    position_id = Column(Integer, ForeignKey("positions.id", ondelete="CASCADE"), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # процент баллов // 10, 0..9
+    interviews = Column(Integer, nullable=False, default=0)
+    passed = Column(Integer, nullable=False, default=0)
+    percentage_sum = Column(Float, nullable=False, default=0)
+    duration_sum = Column(Float, nullable=False, default=0)  # секунд от начала до завершения
+    duration_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<PositionInterviewStats(position_id={self.position_id}, bucket={self.bucket}, interviews={self.interviews})>"
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class PositionQuality(Base):
     __tablename__ = "position_qualities"
+    __table_args__ = (
+        UniqueConstraint("position_id", "quality_id", name="uq_position_qualities_position_id_quality_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     position_id = Column(Integer, ForeignKey("positions.id"), nullable=False)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class PositionQuestion(Base):
+    """Банк заранее сгенерированных вопросов позиции"""
+    __tablename__ = "position_questions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    position_id = Column(Integer, ForeignKey("positions.id"), nullable=False, index=True)
+    # Качество, которое оценивает вопрос; NULL — общий вопрос позиции
+    quality_id = Column(Integer, ForeignKey("qualities.id"), nullable=True)
+    text = Column(Text, nullable=False)
+    category = Column(String(100), default="question_bank")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Связи
+    position = relationship("Position", back_populates="question_bank")
+    
+    def __repr__(self):
+        return f"<PositionQuestion(id={self.id}, position_id={self.position_id}, quality_id={self.quality_id})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -8,7 +8,10 @@ subordinates_association = Table(
     'subordinates',
     Base.metadata,
     Column('manager_id', Integer, ForeignKey('users.id'), primary_key=True),
-    Column('subordinate_id', Integer, ForeignKey('users.id'), primary_key=True)
+    Column('subordinate_id', Integer, ForeignKey('users.id'), primary_key=True),
+    # Индексы обхода иерархии вниз и вверх (рекурсивные CTE)
+    Index('ix_subordinates_manager_id', 'manager_id'),
+    Index('ix_subordinates_subordinate_id', 'subordinate_id')
 )
 
 class User(Base):
@@ -42,4 +45,18 @@ class User(Base):
     )
     
     # Отношения для HR системы
-    interviews = relationship("Interview", back_populates="user") 
\ No newline at end of file
+    interviews = relationship("Interview", back_populates="user")
+
+
+# Регистронезависимый поиск по префиксу: lower(column) LIKE 'prefix%'.
+# text_pattern_ops позволяет PostgreSQL использовать индекс для LIKE при любой локали
+Index(
+    "ix_users_username_lower",
+    func.lower(User.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"}
+)
+Index(
+    "ix_users_first_name_lower",
+    func.lower(User.first_name).label("first_name_lower"),
+    postgresql_ops={"first_name_lower": "text_pattern_ops"}
+) 
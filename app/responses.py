@@ -0,0 +1,13 @@
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson опционален
+    orjson = None
+
+if orjson is not None:
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+else:
+    DefaultResponse = JSONResponse
+
+__all__ = ["DefaultResponse"]
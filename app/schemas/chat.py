@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -34,18 +34,32 @@ class UserInChat(BaseModel):
         from_attributes = True
 
 
-class Chat(ChatBase):
+class ChatInfo(ChatBase):
     id: int
     created_by: int
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime]
-    members: List[UserInChat] = []
+    member_count: int = 0
     
     class Config:
         from_attributes = True
 
 
+class Chat(ChatInfo):
+    members: List[UserInChat] = []  # Первые участники, администраторы первыми
+
+
+class ChatMembersPage(BaseModel):
+    members: List[UserInChat]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class ChatCreated(Chat):
+    unknown_member_ids: List[int] = []  # ID из member_ids, для которых не найден пользователь
+
+
 class ChatList(BaseModel):
     id: int
     title: Optional[str]
@@ -60,4 +74,23 @@ class ChatList(BaseModel):
 
 
 class InviteByUsernameRequest(BaseModel):
-    username: str 
\ No newline at end of file
+    username: str 
+
+# Максимум пользователей в одном массовом запросе (IN (...) и многострочная вставка)
+MAX_BULK_MEMBERS = 500
+
+
+class BulkMembersRequest(BaseModel):
+    user_ids: List[int] = Field(default=[], max_length=MAX_BULK_MEMBERS)
+    usernames: List[str] = Field(default=[], max_length=MAX_BULK_MEMBERS)
+
+
+class BulkMemberResult(BaseModel):
+    user_id: Optional[int] = None
+    username: Optional[str] = None
+    status: str  # 'added', 'already_member', 'removed', 'not_member', 'not_found'
+
+
+class BulkMembersResponse(BaseModel):
+    results: List[BulkMemberResult]
+    affected: int
@@ -33,6 +33,24 @@ class Interview(InterviewBase):
     class Config:
         from_attributes = True
 
+class InterviewSummary(InterviewBase):
+    """Интервью без вопросов и ответов — для списков администратора"""
+    id: int
+    user_id: int
+    status: str
+    score: Optional[int] = None
+    max_score: int
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class InterviewsPage(BaseModel):
+    interviews: List[InterviewSummary]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
 class InterviewWithUser(Interview):
     user: "User"
     position: "Position"
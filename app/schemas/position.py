@@ -39,6 +39,16 @@ class PositionWithQualities(BaseModel):
     class Config:
         from_attributes = True
 
+class PositionAnalytics(BaseModel):
+    position_id: int
+    title: str
+    completed: int
+    passed: int
+    pass_rate: float
+    average_percentage: float
+    histogram: List[int]  # число интервью по корзинам 0-9%, 10-19%, ..., 90-100%
+    average_completion_seconds: Optional[float] = None
+
 # Импортируем Quality после определения PositionWithQualities
 from .quality import Quality
 PositionWithQualities.model_rebuild() 
\ No newline at end of file
@@ -25,7 +25,11 @@ class UserUpdate(BaseModel):
     language_code: Optional[str] = None
     profile_photo_url: Optional[str] = None
     bio: Optional[str] = None
-    is_admin: Optional[bool] = None
+
+    class Config:
+        # Профиль редактирует сам пользователь: права администратора
+        # и прочие служебные поля через этот запрос не меняются
+        extra = "forbid"
 
 
 class SubordinateBase(BaseModel):
@@ -37,21 +41,67 @@ class User(UserBase):
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime]
-    subordinates: List["User"] = []
-    managers: List["User"] = []
+    # Связанные пользователи без собственных связей: вложенные User
+    # образуют цикл руководитель <-> подчиненный
+    subordinates: List["UserSummary"] = []
+    managers: List["UserSummary"] = []
 
     class Config:
         from_attributes = True
 
 
-# Для избежания циклических импортов
-User.model_rebuild()
-
-
 class UserList(BaseModel):
-    users: List[User]
+    # Без связей руководитель-подчиненный: список доступен любому пользователю
+    users: List["UserSummary"]
     total: int
     page: int
     per_page: int
     has_next: bool
-    has_prev: bool 
\ No newline at end of file
+    has_prev: bool 
+
+
+class UserSummary(UserBase):
+    """Пользователь без связей — для списков администратора"""
+    id: int
+    is_active: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+# UserSummary объявлен после User и UserList
+User.model_rebuild()
+UserList.model_rebuild()
+
+
+class UsersPage(BaseModel):
+    users: List[UserSummary]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class UserSearchPage(BaseModel):
+    users: List[UserSummary]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class UserPresence(BaseModel):
+    user_id: int
+    is_online: bool
+    last_seen: Optional[datetime] = None  # время последнего кадра /ws в этом процессе
+
+
+class SubordinateReport(BaseModel):
+    user: UserSummary
+    depth: int  # 1 — прямой подчиненный
+
+
+class OrgTreeNode(BaseModel):
+    user: UserSummary
+    subordinates: List["OrgTreeNode"] = []
+
+
+OrgTreeNode.model_rebuild()
@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.config import settings
+from app.database import dialect_insert
+from app.models.interview import Interview
+from app.models.position import Position
+from app.models.position_interview_stats import PositionInterviewStats
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BUCKETS = 10
+
+COUNTER_COLUMNS = ("interviews", "passed", "percentage_sum", "duration_sum", "duration_count")
+
+
+def score_percentage(score: Optional[int], max_score: Optional[int]) -> float:
+    if not max_score:
+        return 0.0
+    return max(0.0, min(100.0, (score or 0) / max_score * 100))
+
+
+def score_bucket(percentage: float) -> int:
+    """Корзина гистограммы: 0-9%, 10-19%, ..., 90-100%"""
+    return min(int(percentage // (100 / HISTOGRAM_BUCKETS)), HISTOGRAM_BUCKETS - 1)
+
+
+def completion_seconds(started_at: Optional[datetime], completed_at: Optional[datetime]) -> Optional[float]:
+    if started_at is None or completed_at is None:
+        return None
+    # SQLite возвращает даты без часового пояса, PostgreSQL — с ним
+    if (started_at.tzinfo is None) != (completed_at.tzinfo is None):
+        started_at = started_at.replace(tzinfo=None)
+        completed_at = completed_at.replace(tzinfo=None)
+    return max(0.0, (completed_at - started_at).total_seconds())
+
+
+def aggregate_rows(rows: Iterable[Tuple]) -> Dict[Tuple[int, int], Dict[str, float]]:
+    """
+    Свертка строк (position_id, score, max_score, started_at, completed_at)
+    в приращения счетчиков по (position_id, bucket)
+    """
+    totals: Dict[Tuple[int, int], Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+    for position_id, score, max_score, started_at, completed_at in rows:
+        percentage = score_percentage(score, max_score)
+        counters = totals[(position_id, score_bucket(percentage))]
+        counters["interviews"] += 1
+        counters["passed"] += int(percentage >= settings.interview_pass_percentage)
+        counters["percentage_sum"] += percentage
+        duration = completion_seconds(started_at, completed_at)
+        if duration is not None:
+            counters["duration_sum"] += duration
+            counters["duration_count"] += 1
+    return totals
+
+
+def apply_increments(db: Session, totals: Dict[Tuple[int, int], Dict[str, float]]) -> None:
+    """
+    Прибавляет приращения к строкам rollup-таблицы одним UPSERT на корзину;
+    параллельные обновления не теряются, так как сложение выполняет БД
+    """
+    table = PositionInterviewStats.__table__
+    for (position_id, bucket), counters in totals.items():
+        stmt = dialect_insert(db, table).values(position_id=position_id, bucket=bucket, **counters)
+        set_ = {column: table.c[column] + stmt.excluded[column] for column in COUNTER_COLUMNS}
+        set_["updated_at"] = func.now()
+        db.execute(stmt.on_conflict_do_update(index_elements=["position_id", "bucket"], set_=set_))
+
+
+def record_completed_interviews(db: Session, interviews: Iterable) -> None:
+    """
+    Учитывает только что оцененные интервью (объекты или строки RETURNING
+    с теми же атрибутами) в агрегатах позиций. Коммит выполняет вызывающий
+    код вместе со сменой статуса интервью.
+    """
+    apply_increments(db, aggregate_rows(
+        (interview.position_id, interview.score, interview.max_score, interview.started_at, interview.completed_at)
+        for interview in interviews
+    ))
+
+
+def rebuild_position_stats(db: Session, chunk_rows: int = 1000) -> int:
+    """
+    Полный пересчет агрегатов по всем завершенным интервью.
+    Возвращает число учтенных интервью.
+
+    В PostgreSQL таблица агрегатов блокируется до конца пересчета (SHARE ROW
+    EXCLUSIVE конфликтует с UPSERT из record_completed_interviews) до чтения
+    интервью: оценка, успевшая обновить агрегаты, завершается раньше и
+    попадает в пересчет, а начатая позже ждет и прибавляется к его результату.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"LOCK TABLE {PositionInterviewStats.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+
+    rows = db.query(
+        Interview.position_id,
+        Interview.score,
+        Interview.max_score,
+        Interview.started_at,
+        Interview.completed_at
+    ).filter(Interview.status == "completed").execution_options(yield_per=chunk_rows)
+
+    totals = aggregate_rows(rows)
+    db.query(PositionInterviewStats).delete(synchronize_session=False)
+    apply_increments(db, totals)
+    db.commit()
+
+    count = sum(counters["interviews"] for counters in totals.values())
+    logger.info(f"Агрегаты интервью пересчитаны: {count} интервью, {len(totals)} корзин")
+    return int(count)
+
+
+def position_analytics(db: Session) -> List[dict]:
+    """
+    Аналитика по позициям из rollup-таблицы: количество завершенных и
+    пройденных интервью, средний процент, гистограмма баллов, среднее время прохождения
+    """
+    rows = db.query(PositionInterviewStats, Position.title).join(
+        Position, Position.id == PositionInterviewStats.position_id
+    ).order_by(PositionInterviewStats.position_id, PositionInterviewStats.bucket).all()
+
+    positions: Dict[int, dict] = {}
+    for stats, title in rows:
+        item = positions.setdefault(stats.position_id, {
+            "position_id": stats.position_id,
+            "title": title,
+            "completed": 0,
+            "passed": 0,
+            "percentage_sum": 0.0,
+            "duration_sum": 0.0,
+            "duration_count": 0,
+            "histogram": [0] * HISTOGRAM_BUCKETS
+        })
+        item["completed"] += stats.interviews
+        item["passed"] += stats.passed
+        item["percentage_sum"] += stats.percentage_sum
+        item["duration_sum"] += stats.duration_sum
+        item["duration_count"] += stats.duration_count
+        item["histogram"][stats.bucket] += stats.interviews
+
+    result = []
+    for item in positions.values():
+        completed = item.pop("completed")
+        duration_count = item.pop("duration_count")
+        percentage_sum = item.pop("percentage_sum")
+        duration_sum = item.pop("duration_sum")
+        result.append({
+            **item,
+            "completed": completed,
+            "pass_rate": round(item["passed"] / completed, 4) if completed else 0.0,
+            "average_percentage": round(percentage_sum / completed, 2) if completed else 0.0,
+            "average_completion_seconds": round(duration_sum / duration_count, 1) if duration_count else None
+        })
+    return result
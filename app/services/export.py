@@ -0,0 +1,43 @@
+from typing import Iterator, Sequence
+import csv
+import io
+import json
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Строк в одном чанке ответа и в одной порции курсора БД
+EXPORT_CHUNK_ROWS = 500
+
+
+def iter_export(query, fields: Sequence[str], export_format: str, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[str]:
+    """
+    Потоковая выгрузка результатов запроса в NDJSON или CSV.
+
+    Строки читаются порциями через yield_per (серверный курсор в
+    PostgreSQL), поэтому потребление памяти не зависит от размера таблицы.
+    """
+    rows = query.execution_options(yield_per=chunk_rows)
+    buffer = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+
+    count = 0
+    for row in rows:
+        if writer is not None:
+            writer.writerow(["" if value is None else value for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False, default=str))
+            buffer.write("\n")
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
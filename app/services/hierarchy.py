@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import and_, exists, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.user import User, subordinates_association
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg advisory lock: изменения иерархии сериализуются, чтобы две
+# параллельные вставки не образовали цикл
+HIERARCHY_LOCK_KEY = 7_365_002
+
+edges = subordinates_association.c
+
+
+def reports_cte(manager_id: int):
+    """
+    Рекурсивный CTE id всех подчиненных manager_id (колонка subordinate_id).
+    UNION вместо UNION ALL посещает каждого пользователя один раз: ромбы в
+    иерархии не размножают пути, а циклы в старых данных завершают обход
+    без ограничения глубины. Каждый шаг использует индекс ix_subordinates_manager_id.
+    """
+    base = select(edges.subordinate_id).where(edges.manager_id == manager_id).cte("reports", recursive=True)
+    step = select(edges.subordinate_id).join(base, edges.manager_id == base.c.subordinate_id)
+    return base.union(step)
+
+
+def managers_cte(user_id: int):
+    """
+    Рекурсивный CTE id всех руководителей user_id вверх по иерархии (UNION,
+    как в reports_cte). Каждый шаг использует индекс ix_subordinates_subordinate_id.
+    """
+    base = select(edges.manager_id).where(edges.subordinate_id == user_id).cte("managers", recursive=True)
+    step = select(edges.manager_id).join(base, edges.subordinate_id == base.c.manager_id)
+    return base.union(step)
+
+
+def report_edges(db: Session, manager_id: int) -> List[Tuple[int, int]]:
+    """Все связи (manager_id, subordinate_id) внутри поддерева manager_id одним запросом"""
+    reports = reports_cte(manager_id)
+    return db.query(edges.manager_id, edges.subordinate_id).filter(or_(
+        edges.manager_id == manager_id,
+        edges.manager_id.in_(select(reports.c.subordinate_id))
+    )).all()
+
+
+def report_depths(manager_id: int, edge_rows: List[Tuple[int, int]]) -> Dict[int, int]:
+    """Кратчайшая глубина каждого подчиненного обходом в ширину по связям поддерева"""
+    children: Dict[int, List[int]] = {}
+    for parent_id, child_id in edge_rows:
+        children.setdefault(parent_id, []).append(child_id)
+    depths: Dict[int, int] = {}
+    level, depth = [manager_id], 0
+    while level:
+        depth += 1
+        next_level = []
+        for parent_id in level:
+            for child_id in children.get(parent_id, []):
+                if child_id != manager_id and child_id not in depths:
+                    depths[child_id] = depth
+                    next_level.append(child_id)
+        level = next_level
+    return depths
+
+
+def is_direct_subordinate(db: Session, manager_id: int, subordinate_id: int) -> bool:
+    """EXISTS по первичному ключу (manager_id, subordinate_id)"""
+    return db.query(exists().where(and_(
+        edges.manager_id == manager_id,
+        edges.subordinate_id == subordinate_id
+    ))).scalar()
+
+
+def is_report(db: Session, manager_id: int, user_id: int) -> bool:
+    """Находится ли user_id где-либо под manager_id"""
+    managers = managers_cte(user_id)
+    return db.query(exists().where(managers.c.manager_id == manager_id)).scalar()
+
+
+def would_create_cycle(db: Session, manager_id: int, subordinate_id: int) -> bool:
+    """
+    Связь manager -> subordinate образует цикл, если subordinate уже
+    руководит manager (прямо или косвенно). Обход идет вверх от manager,
+    что обычно короче обхода всего поддерева subordinate.
+    """
+    return manager_id == subordinate_id or is_report(db, subordinate_id, manager_id)
+
+
+def lock_hierarchy(db: Session) -> None:
+    """Блокировка изменений иерархии до конца транзакции (только PostgreSQL)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": HIERARCHY_LOCK_KEY})
+
+
+def all_reports(db: Session, manager_id: int) -> List[Tuple[User, int]]:
+    """
+    Все подчиненные manager_id с минимальной глубиной (1 — прямые),
+    по возрастанию глубины
+    """
+    depths = report_depths(manager_id, report_edges(db, manager_id))
+    if not depths:
+        return []
+    users = db.query(User).filter(User.id.in_(depths)).all()
+    return sorted(((user, depths[user.id]) for user in users), key=lambda item: (item[1], item[0].id))
+
+
+def org_tree(db: Session, manager_id: int) -> List[dict]:
+    """
+    Дерево подчиненных manager_id одним рекурсивным запросом:
+    [{"user": User, "subordinates": [...]}, ...]
+    """
+    edge_rows = report_edges(db, manager_id)
+    if not edge_rows:
+        return []
+
+    user_ids = {subordinate_id for _, subordinate_id in edge_rows}
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids))}
+    children: Dict[int, List[int]] = {}
+    for parent_id, child_id in edge_rows:
+        children.setdefault(parent_id, []).append(child_id)
+
+    def build(parent_id: int, path: frozenset) -> List[dict]:
+        return [
+            {"user": users[child_id], "subordinates": build(child_id, path | {child_id})}
+            for child_id in sorted(children.get(parent_id, []))
+            if child_id not in path
+        ]
+
+    return build(manager_id, frozenset({manager_id}))
+
+
+def add_subordinate_link(db: Session, manager_id: int, subordinate_id: int) -> Optional[str]:
+    """
+    Добавляет связь руководитель-подчиненный без коммита.
+    Возвращает текст ошибки, если связь уже есть или образует цикл.
+    """
+    lock_hierarchy(db)
+    if is_direct_subordinate(db, manager_id, subordinate_id):
+        return "Пользователь уже является подчиненным"
+    if would_create_cycle(db, manager_id, subordinate_id):
+        return "Назначение образует цикл в иерархии"
+    db.execute(subordinates_association.insert().values(manager_id=manager_id, subordinate_id=subordinate_id))
+    return None
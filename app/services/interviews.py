@@ -0,0 +1,257 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import asyncio
+import logging
+
+from sqlalchemy.orm import Session
+
+from app import database
+from app.config import settings
+from app.models.interview import Interview
+from app.services.llm import get_llm_provider
+from app.services.llm_cache import cache_key, get_cached_response, is_cacheable, store_response
+from app.websocket.manager import manager
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PER_INTERVIEW = 10
+
+SYSTEM_PROMPT = "Ты HR-специалист, который создает профессиональные вопросы для интервью."
+
+
+def build_questions_prompt(position_title: str, quality_names: List[str]) -> str:
+    qualities_text = ", ".join(quality_names) if quality_names else "общие профессиональные навыки"
+    return f"""
+        Создай ровно 10 профессиональных вопросов для интервью на позицию "{position_title}".
+        
+        Ключевые качества для оценки: {qualities_text}
+        
+        Требования к вопросам:
+        1. Вопросы должны быть направлены на оценку указанных качеств
+        2. Вопросы должны быть открытыми и требовать развернутых ответов
+        3. Вопросы должны быть профессиональными и уместными для данной позиции
+        4. Вопросы должны быть разнообразными по типам (поведенческие, ситуационные, технические)
+        5. Вопросы должны быть на русском языке
+        6. Вопросы должны быть конкретными и практическими
+        7. Избегай общих вопросов типа "Расскажите о себе"
+        
+        Примеры хороших вопросов:
+        - "Опишите проект, где вы использовали [конкретная технология/навык]"
+        - "Как бы вы решали конфликт в команде при работе над срочным проектом?"
+        - "Расскажите о случае, когда вам пришлось быстро адаптироваться к изменениям"
+        
+        Формат ответа - только список из ровно 10 вопросов, каждый с новой строки, без нумерации.
+        """
+
+
+def pad_with_basic_questions(questions: List[dict], position_title: str) -> List[dict]:
+    """
+    Дополняет список до QUESTIONS_PER_INTERVIEW базовыми вопросами
+    """
+    for basic_q in generate_basic_questions(position_title):
+        if len(questions) >= QUESTIONS_PER_INTERVIEW:
+            break
+        questions.append({
+            "id": len(questions) + 1,
+            "text": basic_q["text"],
+            "type": basic_q["type"],
+            "category": basic_q["category"]
+        })
+    return questions
+
+
+def parse_questions(position_title: str, generated_text: str) -> List[dict]:
+    """
+    Разбор ответа модели в структурированные вопросы; недостающие
+    дополняются базовыми
+    """
+    questions_list = [q.strip() for q in generated_text.strip().split('\n') if q.strip()]
+
+    questions = []
+    for i, question_text in enumerate(questions_list[:QUESTIONS_PER_INTERVIEW], 1):
+        questions.append({
+            "id": i,
+            "text": question_text,
+            "type": "text",
+            "category": "ai_generated"
+        })
+
+    return pad_with_basic_questions(questions, position_title)
+
+
+async def request_completion(system_prompt: str, prompt: str, max_tokens: int, temperature: float) -> Optional[str]:
+    """
+    Запрос к настроенному LLM провайдеру с общим лимитом времени LLM_TIMEOUT.
+    Ответы на запросы с невысокой температурой берутся из кэша llm_cache.
+    Возвращает None, если провайдер не настроен или запрос не удался.
+    """
+    provider = get_llm_provider()
+    if provider is None:
+        logger.warning("LLM провайдер не настроен")
+        return None
+
+    key = None
+    if is_cacheable(temperature):
+        model = getattr(provider, "model", provider.name)
+        key = cache_key(model, system_prompt, prompt, max_tokens, temperature)
+        # Кэш в БД читается и пишется в потоке, не блокируя event loop
+        cached = await asyncio.to_thread(get_cached_response, key)
+        if cached is not None:
+            return cached
+
+    try:
+        response = await asyncio.wait_for(
+            provider.complete(system_prompt, prompt, max_tokens=max_tokens, temperature=temperature),
+            settings.llm_timeout
+        )
+        if key is not None and response:
+            await asyncio.to_thread(store_response, key, response)
+        return response
+    except asyncio.TimeoutError:
+        logger.error(f"Превышено время ожидания ответа LLM ({provider.name})")
+        return None
+    except Exception as e:
+        logger.error(f"Ошибка при обращении к LLM ({provider.name}): {e}")
+        return None
+
+
+async def generate_questions_for_position(position_title: str, quality_names: List[str]) -> List[dict]:
+    """
+    Генерирует 10 вопросов на основе качеств позиции с помощью LLM.
+    При любой ошибке возвращаются базовые вопросы.
+    """
+    generated_text = await request_completion(
+        SYSTEM_PROMPT,
+        build_questions_prompt(position_title, quality_names),
+        max_tokens=1000,
+        temperature=0.7
+    )
+    if generated_text is None:
+        return generate_basic_questions(position_title)
+
+    questions = parse_questions(position_title, generated_text)
+    logger.info(f"Сгенерировано {len(questions)} вопросов для позиции {position_title}")
+    return questions
+
+
+async def prepare_interview_questions(interview_id: int, position_title: str, quality_names: List[str]) -> None:
+    """
+    Фоновая задача: генерирует вопросы для интервью в статусе generating,
+    переводит его в in_progress и уведомляет пользователя через /ws
+    """
+    questions = await generate_questions_for_position(position_title, quality_names)
+
+    db = database.SessionLocal()
+    try:
+        interview = db.query(Interview).filter(
+            Interview.id == interview_id,
+            Interview.status == "generating"
+        ).first()
+        if not interview:
+            logger.warning(f"Интервью {interview_id} не ожидает генерации вопросов")
+            return
+
+        interview.questions = questions
+        interview.status = "in_progress"
+        db.commit()
+        user_id = interview.user_id
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Ошибка при сохранении вопросов интервью {interview_id}: {e}")
+        return
+    finally:
+        db.close()
+
+    logger.info(f"Вопросы для интервью {interview_id} готовы")
+    await manager.send_interview_event(
+        "interview_ready",
+        interview_id,
+        user_id,
+        status="in_progress"
+    )
+
+
+def fail_stale_generating(db: Session, user_id: Optional[int] = None, timeout: Optional[float] = None) -> int:
+    """
+    Переводит в failed интервью, застрявшие в generating дольше timeout:
+    фоновая генерация потеряна при перезапуске процесса, а такое интервью
+    не дает пользователю начать новое. Условный UPDATE не трогает интервью,
+    вопросы которых успели сохраниться. Коммит выполняет вызывающий код.
+    """
+    timeout = settings.interview_generating_timeout if timeout is None else timeout
+    query = db.query(Interview).filter(
+        Interview.status == "generating",
+        Interview.started_at < datetime.now(timezone.utc) - timedelta(seconds=timeout)
+    )
+    if user_id is not None:
+        query = query.filter(Interview.user_id == user_id)
+    failed = query.update({Interview.status: "failed"}, synchronize_session=False)
+    if failed:
+        logger.warning(f"Интервью без сгенерированных вопросов переведены в failed: {failed}")
+    return failed
+
+
+def generate_basic_questions(position_title: str) -> List[dict]:
+    """Генерирует базовые вопросы для позиции"""
+    return [
+        {
+            "id": 1,
+            "text": f"Почему вы заинтересованы в позиции {position_title}?",
+            "type": "text",
+            "category": "motivation"
+        },
+        {
+            "id": 2,
+            "text": "Расскажите о своем профессиональном опыте",
+            "type": "text",
+            "category": "experience"
+        },
+        {
+            "id": 3,
+            "text": "Какие ваши сильные стороны?",
+            "type": "text",
+            "category": "strengths"
+        },
+        {
+            "id": 4,
+            "text": "Как вы работаете в команде?",
+            "type": "text",
+            "category": "teamwork"
+        },
+        {
+            "id": 5,
+            "text": "Опишите сложную рабочую ситуацию и как вы ее решили",
+            "type": "text",
+            "category": "problem_solving"
+        },
+        {
+            "id": 6,
+            "text": "Какие у вас планы профессионального развития?",
+            "type": "text",
+            "category": "career_goals"
+        },
+        {
+            "id": 7,
+            "text": "Что вы знаете о нашей компании?",
+            "type": "text",
+            "category": "company_knowledge"
+        },
+        {
+            "id": 8,
+            "text": "Как вы справляетесь со стрессовыми ситуациями?",
+            "type": "text",
+            "category": "stress_management"
+        },
+        {
+            "id": 9,
+            "text": "Расскажите о проекте, которым вы гордитесь",
+            "type": "text",
+            "category": "achievements"
+        },
+        {
+            "id": 10,
+            "text": "Как вы планируете свое время и приоритеты?",
+            "type": "text",
+            "category": "time_management"
+        }
+    ]
@@ -0,0 +1,53 @@
+from sqlalchemy import and_, false, literal, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+import logging
+
+from app.database import insert_ignore
+from app.models.chat import chat_members
+from app.models.chat_invitation import ChatInvitation
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+def accept_pending_invitations(db: Session, user: User) -> int:
+    """
+    Принимает все активные приглашения для username пользователя.
+
+    Участие во всех чатах добавляется одним INSERT ... SELECT с
+    ON CONFLICT DO NOTHING, приглашения деактивируются одним UPDATE.
+    Возвращает количество чатов, в которые пользователь был добавлен.
+    Коммит выполняет вызывающий код.
+    """
+    if not user.username:
+        return 0
+
+    active_invitations = and_(
+        ChatInvitation.username == user.username,
+        ChatInvitation.is_active == True
+    )
+
+    pending_chats = select(
+        literal(user.id),
+        ChatInvitation.chat_id,
+        false()
+    ).where(active_invitations).distinct()
+
+    result = db.execute(
+        insert_ignore(db, chat_members).from_select(
+            ["user_id", "chat_id", "is_admin"], pending_chats
+        )
+    )
+    accepted = max(result.rowcount or 0, 0)
+
+    db.execute(
+        update(ChatInvitation).where(active_invitations).values(
+            is_active=False,
+            accepted_at=func.now()
+        ).execution_options(synchronize_session=False)
+    )
+
+    if accepted:
+        logger.info("Пользователь %s принял %d приглашений", user.id, accepted)
+    return accepted
@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import random
+import re
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUESTION_COUNT_RE = re.compile(r"ровно (\d+)")
+CANDIDATE_RE = re.compile(r"^\s*Кандидат (\d+):", re.MULTILINE)
+
+
+class LLMError(Exception):
+    """Ошибка обращения к LLM провайдеру"""
+
+
+class LLMProvider(ABC):
+    """
+    Интерфейс LLM провайдера: один асинхронный запрос чат-комплишена
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        """Текст ответа модели"""
+
+
+class OpenAIProvider(LLMProvider):
+    """
+    Провайдер OpenAI; клиент создается один раз и переиспользует соединения
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str, timeout: float, max_retries: int):
+        import openai
+
+        self.model = model
+        self.client = openai.AsyncOpenAI(api_key=api_key, timeout=timeout, max_retries=max_retries)
+
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0].message.content
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Локальный детерминированный провайдер для тестов и нагрузочных прогонов
+    без сети.
+
+    Ответ зависит только от промпта: промпт оценки («Кандидат N:») получает
+    строки «N: балл», остальные — список вопросов. latency задает задержку
+    ответа в секундах, error_rate — долю запросов, завершающихся ошибкой.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.errors = random.Random(seed)
+        self.calls = 0
+
+    def rng_for(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    async def complete(self, system_prompt: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.errors.random() < self.error_rate:
+            raise LLMError("Искусственная ошибка FakeLLMProvider")
+
+        rng = self.rng_for(prompt)
+        candidates = CANDIDATE_RE.findall(prompt)
+        if candidates:
+            return "\n".join(f"{number}: {rng.randint(0, 100)}" for number in candidates)
+
+        match = QUESTION_COUNT_RE.search(prompt)
+        count = int(match.group(1)) if match else 10
+        return "\n".join(f"Тестовый вопрос {rng.randint(1000, 9999)}-{i}?" for i in range(1, count + 1))
+
+
+_override: Optional[LLMProvider] = None
+_cached: Tuple[Optional[tuple], Optional[LLMProvider]] = (None, None)
+
+
+def set_llm_provider(provider: Optional[LLMProvider]) -> None:
+    """
+    Явная подмена провайдера (тесты, бенчмарки); None возвращает выбор по настройкам
+    """
+    global _override
+    _override = provider
+
+
+def get_llm_provider() -> Optional[LLMProvider]:
+    """
+    Провайдер по настройке LLM_PROVIDER: openai, fake или пусто — OpenAI
+    при заданном OPENAI_API_KEY. None означает, что LLM недоступна.
+    """
+    global _cached
+    if _override is not None:
+        return _override
+
+    key = (settings.llm_provider, settings.openai_api_key, settings.openai_model,
+           settings.fake_llm_latency, settings.fake_llm_error_rate)
+    if _cached[0] == key:
+        return _cached[1]
+
+    provider_name = settings.llm_provider or ("openai" if settings.openai_api_key else "")
+    provider = None
+    if provider_name == "fake":
+        provider = FakeLLMProvider(latency=settings.fake_llm_latency, error_rate=settings.fake_llm_error_rate)
+    elif provider_name == "openai" and settings.openai_api_key:
+        try:
+            provider = OpenAIProvider(
+                api_key=settings.openai_api_key,
+                model=settings.openai_model,
+                timeout=settings.openai_timeout,
+                max_retries=settings.openai_max_retries
+            )
+        except ImportError:
+            logger.error("Пакет openai не установлен")
+    elif provider_name:
+        logger.error(f"Неизвестный LLM провайдер: {provider_name}")
+
+    _cached = (key, provider)
+    return provider
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app import database
+from app.config import settings
+from app.models.llm_cache import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Вытеснение проверяется раз в EVICT_EVERY сохранений
+EVICT_EVERY = 20
+
+# Счетчики процесса с момента запуска
+stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "bypassed": 0,
+    "stores": 0,
+    "evictions": 0,
+    "errors": 0,
+}
+
+
+def normalize_text(text: str) -> str:
+    """
+    Схлопывает пробелы и переводы строк: промпты собираются из f-строк с
+    отступами, и форматирование не должно влиять на ключ
+    """
+    return " ".join(text.split())
+
+
+def cache_key(model: str, system_prompt: str, prompt: str, max_tokens: int, temperature: float) -> str:
+    payload = json.dumps(
+        [model, normalize_text(system_prompt), normalize_text(prompt), max_tokens, round(temperature, 2)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature: float) -> bool:
+    """
+    При высокой температуре ответы намеренно разнообразны — кэш обходится
+    """
+    if not settings.llm_cache_enabled:
+        return False
+    if temperature > settings.llm_cache_max_temperature:
+        stats["bypassed"] += 1
+        return False
+    return True
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_cached_response(key: str) -> Optional[str]:
+    """
+    Ответ из кэша, если запись есть и не истекла
+    """
+    db = database.SessionLocal()
+    try:
+        now = utcnow()
+        entry = db.query(LLMCacheEntry).filter(
+            LLMCacheEntry.key == key,
+            LLMCacheEntry.expires_at > now
+        ).first()
+        if entry is None:
+            stats["misses"] += 1
+            return None
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = now
+        response = entry.response
+        db.commit()
+        stats["hits"] += 1
+        return response
+    except Exception as e:
+        db.rollback()
+        stats["errors"] += 1
+        logger.error(f"Ошибка чтения кэша LLM: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def store_response(key: str, response: str) -> None:
+    db = database.SessionLocal()
+    try:
+        now = utcnow()
+        db.merge(LLMCacheEntry(
+            key=key,
+            response=response,
+            hits=0,
+            last_used_at=now,
+            expires_at=now + timedelta(seconds=settings.llm_cache_ttl)
+        ))
+        db.commit()
+        stats["stores"] += 1
+        if stats["stores"] % EVICT_EVERY == 1:
+            evict_entries(db)
+    except Exception as e:
+        db.rollback()
+        stats["errors"] += 1
+        logger.error(f"Ошибка записи в кэш LLM: {e}")
+    finally:
+        db.close()
+
+
+def evict_entries(db: Session, max_entries: Optional[int] = None) -> int:
+    """
+    Удаляет истекшие записи и самые давно использованные сверх max_entries
+    """
+    max_entries = settings.llm_cache_max_entries if max_entries is None else max_entries
+    removed = db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= utcnow())).rowcount
+
+    overflow = db.query(func.count(LLMCacheEntry.key)).scalar() - max_entries
+    if overflow > 0:
+        oldest = select(LLMCacheEntry.key).order_by(LLMCacheEntry.last_used_at).limit(overflow)
+        removed += db.execute(
+            delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(oldest))
+        ).rowcount
+    db.commit()
+
+    if removed:
+        stats["evictions"] += removed
+        logger.info(f"Из кэша LLM вытеснено {removed} записей")
+    return removed
+
+
+def cache_stats(db: Session) -> dict:
+    """
+    Статистика кэша: счетчики процесса и размер хранилища
+    """
+    lookups = stats["hits"] + stats["misses"]
+    return {
+        **stats,
+        "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+        "entries": db.query(func.count(LLMCacheEntry.key)).scalar(),
+        "max_entries": settings.llm_cache_max_entries,
+        "ttl_seconds": settings.llm_cache_ttl,
+    }
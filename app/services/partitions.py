@@ -0,0 +1,221 @@
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+import gzip
+import json
+import logging
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "messages_p"
+PARTITION_NAME_RE = re.compile(r"^messages_p(\d{4})(\d{2})$")
+DEFAULT_PARTITION = "messages_default"
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}{month.month:02d}"
+
+
+def partition_bounds(month: date) -> Tuple[date, date]:
+    """
+    Границы месячной партиции [начало месяца, начало следующего месяца)
+    """
+    start = month_start(month)
+    return start, add_months(start, 1)
+
+
+def parse_partition_month(name: str) -> Optional[date]:
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def is_partitioned(db: Session) -> bool:
+    """
+    Проверяет, что messages — секционированная таблица PostgreSQL
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(db.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'messages'"
+    )).scalar())
+
+
+def create_partition_sql(month: date) -> str:
+    start, end = partition_bounds(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF messages "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def list_partitions(db: Session) -> List[str]:
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'messages' ORDER BY c.relname"
+    )).all()
+    return [row[0] for row in rows]
+
+
+def default_partition_rows_sql(month: date, action: str) -> str:
+    """
+    SQL для строк партиции по умолчанию, попадающих в диапазон месяца:
+    action — "SELECT *" для переноса, "SELECT 1" для проверки или "DELETE"
+    """
+    start, end = partition_bounds(month)
+    return (
+        f"{action} FROM {DEFAULT_PARTITION} "
+        f"WHERE created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+    )
+
+
+def create_partition(db: Session, month: date, has_default: bool) -> None:
+    """
+    Создает месячную партицию без коммита.
+
+    PostgreSQL не создает партицию, если подходящие строки уже лежат в
+    партиции по умолчанию (например, задание запоздало с началом месяца).
+    Тогда в одной транзакции партиция по умолчанию отсоединяется, новая
+    создается, строки переносятся в нее, и партиция по умолчанию
+    присоединяется обратно.
+    """
+    has_rows = has_default and db.execute(
+        text(f"SELECT EXISTS ({default_partition_rows_sql(month, 'SELECT 1')})")
+    ).scalar()
+    if not has_rows:
+        db.execute(text(create_partition_sql(month)))
+        return
+
+    db.execute(text(f"ALTER TABLE messages DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.execute(text(create_partition_sql(month)))
+    moved = db.execute(text(f"INSERT INTO messages {default_partition_rows_sql(month, 'SELECT *')}")).rowcount
+    db.execute(text(default_partition_rows_sql(month, "DELETE")))
+    db.execute(text(f"ALTER TABLE messages ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    logger.warning("Из %s в %s перенесено строк: %d", DEFAULT_PARTITION, partition_name(month), moved)
+
+
+def ensure_message_partitions(db: Session, months_ahead: int = 2, today: Optional[date] = None) -> List[str]:
+    """
+    Создает партиции messages для текущего месяца и months_ahead следующих
+    """
+    if not is_partitioned(db):
+        logger.info("Таблица messages не секционирована, пропускаем создание партиций")
+        return []
+
+    current = month_start(today or datetime.now(timezone.utc).date())
+    existing = set(list_partitions(db))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name not in existing:
+            create_partition(db, month, DEFAULT_PARTITION in existing)
+            db.commit()
+            created.append(name)
+
+    if created:
+        logger.info("Созданы партиции messages: %s", ", ".join(created))
+    return created
+
+
+def export_partition(db: Session, name: str, archive_dir: str) -> Tuple[str, int]:
+    """
+    Выгружает партицию в сжатый JSONL архив потоково, без загрузки в память.
+    Файл пишется во временный и переименовывается только после полной выгрузки.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.jsonl.gz")
+    partial_path = f"{path}.partial"
+    rows = 0
+    result = db.execute(
+        text(f"SELECT row_to_json(m)::text FROM {name} m ORDER BY m.id").execution_options(yield_per=1000)
+    )
+    with gzip.open(partial_path, "wt", encoding="utf-8") as archive:
+        for (row_json,) in result:
+            archive.write(row_json)
+            archive.write("\n")
+            rows += 1
+    os.replace(partial_path, path)
+    return path, rows
+
+
+def list_detached_partitions(db: Session) -> List[str]:
+    """
+    Таблицы messages_p*, уже отсоединенные от messages, но не удаленные —
+    остаются после прерванной архивации
+    """
+    rows = db.execute(text(
+        "SELECT relname FROM pg_class "
+        "WHERE relkind = 'r' AND NOT relispartition AND relname LIKE 'messages\\_p%' "
+        "ORDER BY relname"
+    )).all()
+    return [row[0] for row in rows if parse_partition_month(row[0]) is not None]
+
+
+def archive_old_partitions(
+    db: Session,
+    retain_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    today: Optional[date] = None
+) -> List[dict]:
+    """
+    Выгружает партиции старше retain_months в archive_dir/<партиция>.jsonl.gz,
+    затем отсоединяет и удаляет их.
+
+    Выгрузка, отсоединение и удаление идут в одной транзакции под SHARE
+    блокировкой партиции: при ошибке выгрузки партиция остается на месте
+    и будет архивирована при следующем запуске. Отсоединенные таблицы,
+    оставшиеся от прерванных запусков, тоже архивируются.
+    """
+    if not is_partitioned(db):
+        logger.info("Таблица messages не секционирована, пропускаем архивацию")
+        return []
+
+    retain_months = settings.message_retention_months if retain_months is None else retain_months
+    archive_dir = archive_dir or settings.message_archive_dir
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc).date()), -retain_months)
+
+    attached = set(list_partitions(db))
+    archived = []
+    for name in sorted(attached | set(list_detached_partitions(db))):
+        month = parse_partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+
+        try:
+            # Запрет изменений партиции на время выгрузки
+            db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+            path, rows = export_partition(db, name, archive_dir)
+            if name in attached:
+                db.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Ошибка архивации партиции {name}, повтор при следующем запуске: {e}")
+            continue
+
+        logger.info("Партиция %s (%d строк) архивирована в %s", name, rows, path)
+        archived.append({"partition": name, "rows": rows, "path": path})
+
+    return archived
@@ -0,0 +1,89 @@
+from typing import Optional, Tuple
+import hashlib
+import json
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.position import Position
+from app.schemas.position import Position as PositionSchema
+
+try:
+    import orjson
+except ImportError:  # orjson опционален
+    orjson = None
+
+# Суффиксы, которые CompressionMiddleware добавляет к ETag сжатого ответа
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+_lock = threading.Lock()
+_version = 0
+# (версия, время построения, тело ответа, ETag)
+_cached: Optional[Tuple[int, float, bytes, str]] = None
+
+
+def invalidate_public_positions() -> None:
+    """
+    Сбрасывает кэш публичного списка позиций; вызывается после изменений
+    позиций и качеств в админке
+    """
+    global _version
+    with _lock:
+        _version += 1
+
+
+def serialize_positions(positions) -> bytes:
+    items = [PositionSchema.model_validate(position).model_dump(mode="json") for position in positions]
+    if orjson is not None:
+        return orjson.dumps(items)
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def public_positions(db: Session) -> Tuple[bytes, str]:
+    """
+    Сериализованный список активных позиций и его сильный ETag.
+
+    Ответ хранится в памяти процесса до изменения версии. Изменения,
+    сделанные в других процессах, подхватываются не позже чем через
+    PUBLIC_POSITIONS_CACHE_TTL секунд.
+    """
+    global _cached
+    with _lock:
+        version = _version
+        cached = _cached
+    if cached is not None and cached[0] == version and time.monotonic() - cached[1] < settings.public_positions_cache_ttl:
+        return cached[2], cached[3]
+
+    positions = db.query(Position).filter(Position.is_active == True).order_by(Position.id).all()
+    body = serialize_positions(positions)
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    with _lock:
+        # Версия, прочитанная до запроса: если кэш сбросили во время
+        # построения, следующий запрос построит его заново
+        _cached = (version, time.monotonic(), body, etag)
+    return body, etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверка If-None-Match (список тегов или *) против сильного ETag.
+    Теги сжатых вариантов ответа сравниваются без суффикса кодировки.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        # If-None-Match использует слабое сравнение
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        for suffix in ENCODING_SUFFIXES:
+            if tag.endswith(suffix + '"'):
+                tag = tag[:-len(suffix) - 1] + '"'
+                break
+        if tag == etag:
+            return True
+    return False
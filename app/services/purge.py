@@ -0,0 +1,240 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+import os
+import time
+
+from sqlalchemy import and_, delete, exists, or_, select, text, update
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import func
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.chat import Chat
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+# Ключ pg advisory lock: очистку выполняет только один процесс из всех воркеров
+PURGE_LOCK_KEY = 7_365_001
+
+MEDIA_PREFIX = "/media/"
+
+
+def new_report() -> Dict[str, int]:
+    return {
+        "batches": 0,
+        "messages_deleted": 0,
+        "messages_compacted": 0,
+        "row_bytes": 0,
+        "files_deleted": 0,
+        "file_bytes": 0,
+    }
+
+
+def purge_candidates_query(db: Session, cutoff: datetime, batch_size: int):
+    """
+    Сообщения для очистки: удаленные раньше cutoff и все сообщения чатов,
+    деактивированных раньше cutoff
+    """
+    reply = aliased(Message)
+    is_referenced = exists().where(reply.reply_to_message_id == Message.id)
+    inactive_chats = select(Chat.id).where(
+        and_(
+            Chat.is_active == False,
+            func.coalesce(Chat.updated_at, Chat.created_at) < cutoff
+        )
+    )
+    return db.query(
+        Message.id,
+        Message.media_url,
+        is_referenced.label("is_referenced")
+    ).filter(
+        or_(
+            and_(
+                Message.is_deleted == True,
+                func.coalesce(Message.updated_at, Message.created_at) < cutoff
+            ),
+            Message.chat_id.in_(inactive_chats)
+        ),
+        # Уже сжатые сообщения (без текста и медиа), на которые еще
+        # отвечают, повторно не выбираем
+        or_(~is_referenced, Message.text.isnot(None), Message.media_url.isnot(None))
+    ).order_by(Message.id).limit(batch_size)
+
+
+def estimate_row_bytes(db: Session, message_ids: List[int]) -> int:
+    """
+    Размер удаляемых строк; доступен только в PostgreSQL
+    """
+    if not message_ids or db.get_bind().dialect.name != "postgresql":
+        return 0
+    return int(db.execute(
+        text("SELECT coalesce(sum(pg_column_size(m.*)), 0) FROM messages m WHERE m.id = ANY(:ids)"),
+        {"ids": message_ids}
+    ).scalar())
+
+
+def media_path(media_url: str, upload_dir: str) -> Optional[str]:
+    """
+    Путь к загруженному файлу по media_url вида /media/<имя>
+    """
+    if not media_url or not media_url.startswith(MEDIA_PREFIX):
+        return None
+    return os.path.join(upload_dir, os.path.basename(media_url))
+
+
+def delete_media_files(media_urls: Set[str], upload_dir: str, report: Dict[str, int]) -> None:
+    for media_url in media_urls:
+        path = media_path(media_url, upload_dir)
+        if path is None:
+            continue
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning("Не удалось удалить медиа файл %s: %s", path, e)
+            continue
+        report["files_deleted"] += 1
+        report["file_bytes"] += size
+
+
+def purge_batch(db: Session, cutoff: datetime, batch_size: int, upload_dir: str, report: Dict[str, int]) -> int:
+    """
+    Очищает одну пачку сообщений в отдельной короткой транзакции.
+
+    Сообщения без ответов удаляются, сообщения, на которые еще ссылаются
+    ответы, сжимаются (очищаются текст, медиа и read_by). Медиа файлы
+    удаляются после коммита, если на них больше не ссылается ни одно сообщение.
+    Возвращает количество обработанных сообщений.
+    """
+    rows = purge_candidates_query(db, cutoff, batch_size).all()
+    if not rows:
+        return 0
+
+    delete_ids = [row.id for row in rows if not row.is_referenced]
+    compact_ids = [row.id for row in rows if row.is_referenced]
+    media_urls = {row.media_url for row in rows if row.media_url}
+
+    report["row_bytes"] += estimate_row_bytes(db, delete_ids)
+    if delete_ids:
+        db.execute(delete(Message).where(Message.id.in_(delete_ids)))
+    if compact_ids:
+        db.execute(
+            update(Message).where(Message.id.in_(compact_ids)).values(
+                text=None,
+                media_url=None,
+                media_type=None,
+                media_size=None,
+                media_duration=None,
+                read_by=[]
+            )
+        )
+
+    # Коммит сразу после изменений: блокировки строк пачки не держатся
+    # во время проверки медиа
+    db.commit()
+
+    # Пересланные сообщения копируют media_url, такие файлы оставляем.
+    # Проверка — отдельное чтение после коммита, поэтому видит и ссылки,
+    # появившиеся одновременно с очисткой
+    still_used = set()
+    if media_urls:
+        still_used = {
+            media_url for (media_url,) in db.query(Message.media_url).filter(
+                Message.media_url.in_(media_urls)
+            ).distinct()
+        }
+        db.commit()
+
+    delete_media_files(media_urls - still_used, upload_dir, report)
+    report["batches"] += 1
+    report["messages_deleted"] += len(delete_ids)
+    report["messages_compacted"] += len(compact_ids)
+    return len(rows)
+
+
+def purge_deleted_messages(
+    db: Session,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    batch_pause: Optional[float] = None,
+    max_batches: Optional[int] = None,
+    upload_dir: Optional[str] = None,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """
+    Физическая очистка удаленных сообщений и сообщений неактивных чатов
+    старше retention_days небольшими пачками с паузой между ними.
+    Возвращает отчет о количестве строк и освобожденных байтах.
+    """
+    retention_days = settings.message_purge_retention_days if retention_days is None else retention_days
+    batch_size = batch_size or settings.message_purge_batch_size
+    batch_pause = settings.message_purge_batch_pause if batch_pause is None else batch_pause
+    max_batches = max_batches or settings.message_purge_max_batches
+    upload_dir = upload_dir or settings.upload_dir
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+
+    report = new_report()
+    for batch_number in range(max_batches):
+        if batch_number and batch_pause:
+            # Пауза между пачками, чтобы не мешать основной нагрузке
+            time.sleep(batch_pause)
+        try:
+            processed = purge_batch(db, cutoff, batch_size, upload_dir, report)
+        except Exception:
+            db.rollback()
+            raise
+        if processed < batch_size:
+            break
+
+    logger.info(
+        "Очистка сообщений: удалено %d, сжато %d, файлов %d, освобождено %d байт строк и %d байт файлов",
+        report["messages_deleted"],
+        report["messages_compacted"],
+        report["files_deleted"],
+        report["row_bytes"],
+        report["file_bytes"],
+    )
+    return report
+
+
+def run_purge() -> Optional[Dict[str, int]]:
+    """
+    Один запуск очистки в собственной сессии. В PostgreSQL защищен
+    advisory lock, поэтому при нескольких воркерах выполняется один раз.
+    """
+    db = SessionLocal()
+    try:
+        is_postgresql = db.get_bind().dialect.name == "postgresql"
+        if is_postgresql:
+            locked = db.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": PURGE_LOCK_KEY}).scalar()
+            db.commit()
+            if not locked:
+                logger.info("Очистка сообщений уже выполняется другим процессом")
+                return None
+        try:
+            return purge_deleted_messages(db)
+        finally:
+            if is_postgresql:
+                db.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PURGE_LOCK_KEY})
+                db.commit()
+    finally:
+        db.close()
+
+
+async def run_purge_worker(interval: Optional[float] = None) -> None:
+    """
+    Фоновая задача приложения: периодически запускает очистку в потоке,
+    не блокируя event loop
+    """
+    interval = interval or settings.message_purge_interval
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(run_purge)
+        except Exception as e:
+            logger.error(f"Ошибка очистки сообщений: {e}", exc_info=True)
@@ -0,0 +1,214 @@
+from typing import Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import random
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app import database
+from app.models.position import Position
+from app.models.position_quality import PositionQuality
+from app.models.position_question import PositionQuestion
+from app.models.quality import Quality
+from app.services.interviews import (
+    QUESTIONS_PER_INTERVIEW,
+    SYSTEM_PROMPT,
+    generate_basic_questions,
+    pad_with_basic_questions,
+    request_completion,
+)
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PER_QUALITY = 5
+
+# Вопросы по качеству, если LLM недоступна
+QUALITY_QUESTION_TEMPLATES = (
+    "Расскажите о ситуации, в которой вам особенно пригодилось качество «{quality}».",
+    "Как качество «{quality}» проявляется в вашей работе на позиции {position}?",
+    "Опишите случай, когда вам не хватило качества «{quality}», и что вы сделали.",
+    "Как вы развиваете в себе качество «{quality}»?",
+    "Приведите пример задачи, где «{quality}» повлияло на результат команды.",
+)
+
+
+def build_quality_prompt(position_title: str, quality_name: str, count: int) -> str:
+    return f"""
+        Создай ровно {count} профессиональных вопросов для интервью на позицию "{position_title}",
+        направленных на оценку качества: {quality_name}.
+        
+        Вопросы должны быть открытыми, конкретными, практическими и на русском языке.
+        Избегай общих вопросов типа "Расскажите о себе".
+        
+        Формат ответа - только список вопросов, каждый с новой строки, без нумерации.
+        """
+
+
+def template_quality_questions(position_title: str, quality_name: str, count: int) -> List[str]:
+    return [
+        template.format(quality=quality_name, position=position_title)
+        for template in QUALITY_QUESTION_TEMPLATES[:count]
+    ]
+
+
+async def generate_quality_questions(position_title: str, quality_name: str, count: int = QUESTIONS_PER_QUALITY) -> List[str]:
+    """
+    Генерирует вопросы для одного качества позиции, при ошибке — по шаблонам
+    """
+    generated_text = await request_completion(
+        SYSTEM_PROMPT,
+        build_quality_prompt(position_title, quality_name, count),
+        max_tokens=600,
+        temperature=0.7
+    )
+    if generated_text is None:
+        return template_quality_questions(position_title, quality_name, count)
+
+    questions = [q.strip() for q in generated_text.strip().split('\n') if q.strip()][:count]
+    return questions or template_quality_questions(position_title, quality_name, count)
+
+
+def load_position_qualities(db: Session, position_id: int) -> List[Tuple[int, str]]:
+    return [
+        (quality_id, name) for quality_id, name in db.query(Quality.id, Quality.name).join(
+            PositionQuality, Quality.id == PositionQuality.quality_id
+        ).filter(PositionQuality.position_id == position_id).order_by(Quality.id)
+    ]
+
+
+def invalidate_question_bank(db: Session, position_ids: Iterable[int]) -> None:
+    """
+    Удаляет банк вопросов позиций; коммит выполняет вызывающий код
+    """
+    position_ids = list(position_ids)
+    if position_ids:
+        db.query(PositionQuestion).filter(
+            PositionQuestion.position_id.in_(position_ids)
+        ).delete(synchronize_session=False)
+
+
+def positions_with_quality(db: Session, quality_id: int) -> List[int]:
+    return [
+        position_id for (position_id,) in db.query(PositionQuality.position_id).filter(
+            PositionQuality.quality_id == quality_id
+        ).distinct()
+    ]
+
+
+def latest_bank_question_id(db: Session, position_id: int) -> int:
+    """Максимальный id вопроса в банке позиции: растет с каждой сохраненной сборкой"""
+    return db.query(func.coalesce(func.max(PositionQuestion.id), 0)).filter(
+        PositionQuestion.position_id == position_id
+    ).scalar()
+
+
+def load_bank_snapshot(db: Session, position_id: int, lock: bool = False) -> Optional[tuple]:
+    """
+    Данные позиции, от которых зависит банк вопросов: (название, качества,
+    последний id вопроса банка). С lock строка позиции блокируется до конца
+    транзакции (SELECT ... FOR UPDATE), сериализуя сохранение банка.
+    """
+    query = db.query(Position.title).filter(Position.id == position_id)
+    if lock:
+        query = query.with_for_update()
+    position = query.first()
+    if not position:
+        return None
+    return position.title, load_position_qualities(db, position_id), latest_bank_question_id(db, position_id)
+
+
+async def build_question_bank(position_id: int) -> int:
+    """
+    Фоновая задача: генерирует банк вопросов позиции по каждому ее качеству.
+
+    Запросы к LLM выполняются вне транзакции и параллельно по качествам.
+    Сохранение сериализовано блокировкой строки позиции. Результат
+    отбрасывается, если за время генерации изменились название или
+    качества позиции (новую сборку запланировал код, изменивший их) или
+    банк уже сохранила сборка, запущенная позже.
+    Возвращает количество сохраненных вопросов.
+    """
+    db = database.SessionLocal()
+    try:
+        snapshot = load_bank_snapshot(db, position_id)
+    finally:
+        db.close()
+    if snapshot is None:
+        return 0
+    position_title, qualities, _ = snapshot
+
+    if qualities:
+        generated = await asyncio.gather(*[
+            generate_quality_questions(position_title, quality_name) for _, quality_name in qualities
+        ])
+        rows = [
+            PositionQuestion(position_id=position_id, quality_id=quality_id, text=text, category=quality_name)
+            for (quality_id, quality_name), texts in zip(qualities, generated)
+            for text in texts
+        ]
+    else:
+        rows = [
+            PositionQuestion(position_id=position_id, quality_id=None, text=q["text"], category=q["category"])
+            for q in generate_basic_questions(position_title)
+        ]
+
+    db = database.SessionLocal()
+    try:
+        if load_bank_snapshot(db, position_id, lock=True) != snapshot:
+            db.rollback()
+            logger.info(f"Позиция {position_id} или ее банк вопросов изменились, банк вопросов не сохранен")
+            return 0
+        invalidate_question_bank(db, [position_id])
+        db.add_all(rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Ошибка при сохранении банка вопросов позиции {position_id}: {e}")
+        return 0
+    finally:
+        db.close()
+
+    logger.info(f"Банк вопросов позиции {position_id}: {len(rows)} вопросов")
+    return len(rows)
+
+
+def sample_interview_questions(
+    db: Session,
+    position_id: int,
+    position_title: str,
+    count: int = QUESTIONS_PER_INTERVIEW,
+    rng: Optional[random.Random] = None
+) -> List[dict]:
+    """
+    Выбирает вопросы интервью из банка позиции без повторов, с вероятностью,
+    пропорциональной PositionQuality.weight качества вопроса.
+    Возвращает пустой список, если банк еще не построен.
+    """
+    rng = rng or random
+    rows = db.query(
+        PositionQuestion.text,
+        PositionQuestion.category,
+        func.coalesce(PositionQuality.weight, 1).label("weight")
+    ).outerjoin(
+        PositionQuality,
+        (PositionQuality.position_id == PositionQuestion.position_id)
+        & (PositionQuality.quality_id == PositionQuestion.quality_id)
+    ).filter(PositionQuestion.position_id == position_id).all()
+
+    # Взвешенная выборка без возвращения (Efraimidis–Spirakis): ключ u^(1/w)
+    weighted = [row for row in rows if row.weight and row.weight > 0]
+    weighted.sort(key=lambda row: rng.random() ** (1.0 / row.weight), reverse=True)
+
+    questions = [
+        {
+            "id": i,
+            "text": row.text,
+            "type": "text",
+            "category": row.category
+        }
+        for i, row in enumerate(weighted[:count], 1)
+    ]
+    if not questions:
+        return []
+    return pad_with_basic_questions(questions, position_title)
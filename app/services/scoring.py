@@ -0,0 +1,336 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import re
+
+from sqlalchemy import case, or_, update
+
+from app import database
+from app.config import settings
+from app.models.interview import Interview
+from app.models.position import Position
+from app.services.analytics import record_completed_interviews
+from app.services.interviews import request_completion
+from app.services.llm import get_llm_provider
+from app.websocket.manager import manager
+
+logger = logging.getLogger(__name__)
+
+SCORING_SYSTEM_PROMPT = "Ты HR-специалист, который оценивает кандидатов на основе их ответов на интервью."
+
+SCORE_LINE_RE = re.compile(r"^\s*(\d+)\s*[:\-–]\s*(\d+)")
+
+
+def calculate_basic_score(interview: Interview) -> int:
+    """Базовый расчет балла за интервью"""
+    try:
+        if not interview.answers:
+            return 0
+
+        total_questions = len(interview.questions)
+        answered_questions = len(interview.answers)
+
+        # Базовый балл за количество отвеченных вопросов
+        completion_score = (answered_questions / total_questions) * 50
+
+        # Дополнительные баллы за качество ответов
+        quality_score = 0
+        for answer in interview.answers.values():
+            if isinstance(answer, str) and len(answer.strip()) > 10:
+                quality_score += 5
+            elif isinstance(answer, (int, float)):
+                quality_score += answer
+
+        total_score = min(int(completion_score + quality_score), interview.max_score)
+        return total_score
+
+    except Exception as e:
+        logger.error(f"Ошибка при базовом расчете балла: {e}")
+        return 0
+
+
+def format_answers(interview: Interview) -> str:
+    lines = []
+    for key, answer in sorted(interview.answers.items(), key=lambda item: int(item[0])):
+        index = int(key)
+        question = interview.questions[index]['text'] if 0 <= index < len(interview.questions) else ""
+        lines.append(f"Вопрос {index + 1}: {question}\nОтвет: {answer}")
+    return "\n".join(lines)
+
+
+def build_batch_scoring_prompt(candidates: List[str]) -> str:
+    """
+    Один промпт для оценки нескольких интервью; candidates — блоки
+    «позиция + ответы» в порядке номеров
+    """
+    blocks = "\n\n".join(f"Кандидат {i}:\n{block}" for i, block in enumerate(candidates, 1))
+    return f"""
+        Проанализируй ответы кандидатов на интервью.
+        
+        {blocks}
+        
+        Оцени ответы каждого кандидата по следующим критериям:
+        1. Глубина и детализация ответов (0-10 баллов)
+        2. Соответствие требованиям позиции (0-10 баллов)
+        3. Практический опыт и примеры (0-10 баллов)
+        4. Профессиональные знания (0-10 баллов)
+        5. Коммуникативные навыки (0-10 баллов)
+        
+        Общий балл должен быть от 0 до 100.
+        
+        Для каждого кандидата верни строку вида "<номер кандидата>: <общий балл>" и ничего больше.
+        """
+
+
+def parse_batch_scores(text: str, count: int) -> Dict[int, int]:
+    """
+    Разбор ответа модели: номер кандидата (с 1) -> балл 0..100
+    """
+    scores = {}
+    for line in text.splitlines():
+        match = SCORE_LINE_RE.match(line)
+        if match:
+            number, score = int(match.group(1)), int(match.group(2))
+            if 1 <= number <= count:
+                scores[number] = max(0, min(100, score))
+    return scores
+
+
+def claim_stale_interviews(claim_ttl: float) -> List[int]:
+    """
+    Захватывает интервью в статусе scoring без захвата или с истекшим
+    захватом: UPDATE ... RETURNING возвращает только строки, обновленные
+    этим процессом
+    """
+    now = datetime.now(timezone.utc)
+    db = database.SessionLocal()
+    try:
+        claimed = db.execute(
+            update(Interview).where(
+                Interview.status == "scoring",
+                or_(
+                    Interview.scoring_claimed_at.is_(None),
+                    Interview.scoring_claimed_at < now - timedelta(seconds=claim_ttl)
+                )
+            ).values(scoring_claimed_at=now).returning(Interview.id),
+            execution_options={"synchronize_session": False}
+        ).scalars().all()
+        db.commit()
+        return claimed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class ScoringQueue:
+    """
+    Очередь оценки завершенных интервью.
+
+    Пул воркеров забирает интервью из очереди пачками до batch_size (ожидая
+    добора не дольше batch_wait секунд) и оценивает всю пачку одним запросом
+    к модели. Число одновременных запросов ограничено семафором.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        concurrency: int,
+        batch_size: int,
+        batch_wait: float,
+        claim_ttl: float = 300,
+        drain_timeout: float = 10
+    ):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.claim_ttl = claim_ttl
+        self.drain_timeout = drain_timeout
+        self.queue: Optional[asyncio.Queue] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.tasks: List[asyncio.Task] = []
+        self.recovery_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Запуск воркеров в текущем event loop (повторный вызов ничего не делает)
+        """
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue()
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        self.recovery_task = asyncio.create_task(self.recover())
+
+    async def recover(self) -> None:
+        """
+        Периодически возвращает в очередь интервью в статусе scoring, которые
+        не были оценены: оценка не завершилась до перезапуска или процесс,
+        захвативший интервью, упал. Интервью захватываются условным UPDATE,
+        поэтому при нескольких процессах каждое забирает только один.
+        """
+        while True:
+            try:
+                claimed = await asyncio.to_thread(claim_stale_interviews, self.claim_ttl)
+                for interview_id in claimed:
+                    self.queue.put_nowait(interview_id)
+                if claimed:
+                    logger.info(f"В очередь оценки возвращено {len(claimed)} интервью")
+            except Exception as e:
+                logger.error(f"Ошибка при возврате интервью в очередь оценки: {e}", exc_info=True)
+            await asyncio.sleep(self.claim_ttl)
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркеры, дождавшись оценки уже поставленных интервью
+        не дольше drain_timeout секунд. Неоцененные интервью остаются в
+        статусе scoring и после истечения захвата забираются другим процессом.
+        """
+        if not self.tasks:
+            return
+        self.recovery_task.cancel()
+        try:
+            await asyncio.wait_for(self.queue.join(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            queued = []
+            while not self.queue.empty():
+                queued.append(self.queue.get_nowait())
+            logger.warning(f"Оценка не завершена при остановке, в очереди остались интервью: {queued}")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(self.recovery_task, *self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.recovery_task = None
+
+    def submit(self, interview_id: int) -> None:
+        self.start()
+        self.queue.put_nowait(interview_id)
+
+    async def next_batch(self) -> List[int]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def worker(self) -> None:
+        while True:
+            batch = await self.next_batch()
+            try:
+                await score_interviews(batch, self.semaphore)
+            except Exception as e:
+                logger.error(f"Ошибка при оценке интервью {batch}: {e}", exc_info=True)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+
+async def score_interviews(interview_ids: List[int], semaphore: Optional[asyncio.Semaphore] = None) -> Dict[int, int]:
+    """
+    Оценивает пачку интервью в статусе scoring одним запросом к модели,
+    сохраняет итоговые баллы, обновляет агрегаты позиций в той же транзакции
+    и отправляет пользователям событие interview_scored.
+    Интервью без оценки модели получают базовый балл.
+
+    Соединение с БД не удерживается на время запроса к модели: данные для
+    промпта читаются в отдельной сессии, а баллы сохраняются условным
+    UPDATE ... WHERE status = 'scoring' ... RETURNING, поэтому интервью, уже
+    оцененные другим воркером, не перезаписываются и не учитываются повторно.
+    """
+    db = database.SessionLocal()
+    try:
+        interviews = db.query(Interview).filter(
+            Interview.id.in_(interview_ids),
+            Interview.status == "scoring"
+        ).order_by(Interview.id).all()
+        if not interviews:
+            return {}
+
+        titles = dict(db.query(Position.id, Position.title).filter(
+            Position.id.in_({interview.position_id for interview in interviews})
+        ).all())
+        basic_scores = {interview.id: calculate_basic_score(interview) for interview in interviews}
+        to_model = [
+            (interview.id, f"Позиция: {titles.get(interview.position_id, 'неизвестная позиция')}\n{format_answers(interview)}")
+            for interview in interviews if interview.answers
+        ]
+    finally:
+        db.close()
+
+    model_scores: Dict[int, int] = {}
+    if to_model and get_llm_provider() is not None:
+        prompt = build_batch_scoring_prompt([block for _, block in to_model])
+        if semaphore is not None:
+            async with semaphore:
+                text = await request_completion(SCORING_SYSTEM_PROMPT, prompt, max_tokens=20 * len(to_model), temperature=0.3)
+        else:
+            text = await request_completion(SCORING_SYSTEM_PROMPT, prompt, max_tokens=20 * len(to_model), temperature=0.3)
+        parsed = parse_batch_scores(text or "", len(to_model))
+        model_scores = {to_model[number - 1][0]: score for number, score in parsed.items()}
+
+    scores = {interview_id: model_scores.get(interview_id, score) for interview_id, score in basic_scores.items()}
+
+    db = database.SessionLocal()
+    try:
+        # В агрегаты и события попадают только строки, которые перевел в
+        # completed именно этот UPDATE
+        completed = db.execute(
+            update(Interview).where(
+                Interview.id.in_(scores),
+                Interview.status == "scoring"
+            ).values(
+                score=case(scores, value=Interview.id),
+                status="completed"
+            ).returning(
+                Interview.id,
+                Interview.user_id,
+                Interview.position_id,
+                Interview.score,
+                Interview.max_score,
+                Interview.started_at,
+                Interview.completed_at
+            ),
+            execution_options={"synchronize_session": False}
+        ).all()
+        record_completed_interviews(db, completed)
+        db.commit()
+
+        results = {row.id: row.score for row in completed}
+        events = [(row.id, row.user_id, row.score, row.max_score) for row in completed]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info(f"Оценено интервью: {results}")
+    for interview_id, user_id, score, max_score in events:
+        await manager.send_interview_event(
+            "interview_scored",
+            interview_id,
+            user_id,
+            status="completed",
+            score=score,
+            max_score=max_score
+        )
+    return results
+
+
+scoring_queue = ScoringQueue(
+    workers=settings.scoring_workers,
+    concurrency=settings.scoring_concurrency,
+    batch_size=settings.scoring_batch_size,
+    batch_wait=settings.scoring_batch_wait,
+    claim_ttl=settings.scoring_claim_ttl,
+    drain_timeout=settings.scoring_drain_timeout
+)
@@ -0,0 +1,102 @@
+from typing import Any, Dict, Union
+import json
+
+try:
+    import msgpack
+except ImportError:  # msgpack опционален, без него доступен только compact JSON
+    msgpack = None
+
+# Поддерживаемые кодировки кадров, выбираются параметром ?encoding= при подключении
+ENCODING_JSON = "json"
+ENCODING_COMPACT = "compact"
+ENCODING_MSGPACK = "msgpack"
+
+SUPPORTED_ENCODINGS = {ENCODING_JSON, ENCODING_COMPACT} | ({ENCODING_MSGPACK} if msgpack is not None else set())
+
+# Короткие ключи для компактных кодировок
+SHORT_KEYS = {
+    "type": "t",
+    "chat_id": "c",
+    "user_id": "u",
+    "message": "m",
+    "message_id": "mi",
+    "is_typing": "ty",
+    "is_online": "on",
+    "id": "i",
+    "sender_id": "s",
+    "sender": "sn",
+    "text": "x",
+    "message_type": "mt",
+    "reply_to_message_id": "r",
+    "media_url": "mu",
+    "media_type": "md",
+    "media_size": "ms",
+    "media_duration": "dr",
+    "forward_from_user_id": "fu",
+    "forward_from_chat_id": "fc",
+    "is_edited": "e",
+    "is_deleted": "d",
+    "read_by": "rb",
+    "created_at": "ca",
+    "updated_at": "ua",
+    "telegram_id": "tg",
+    "username": "un",
+    "first_name": "fn",
+    "last_name": "ln",
+    "profile_photo_url": "pp",
+    "interview_id": "ii",
+    "status": "st",
+    "last_seen": "ls",
+}
+
+# Короткие коды типов событий
+SHORT_TYPES = {
+    "connection_established": "ce",
+    "new_message": "nm",
+    "message_read": "mr",
+    "typing": "tp",
+    "user_status": "us",
+    "pong": "po",
+    "interview_ready": "ir",
+    "interview_scored": "is",
+}
+
+
+def normalize_encoding(encoding: str) -> str:
+    """
+    Возвращает поддерживаемую кодировку, по умолчанию — обычный JSON
+    """
+    encoding = (encoding or ENCODING_JSON).lower()
+    if encoding == ENCODING_MSGPACK and msgpack is None:
+        return ENCODING_COMPACT
+    return encoding if encoding in SUPPORTED_ENCODINGS else ENCODING_JSON
+
+
+def shorten(value: Any) -> Any:
+    """
+    Рекурсивно заменяет известные ключи и типы событий на короткие
+    """
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            if item is None:
+                # None-поля в компактном формате опускаются
+                continue
+            if key == "type" and isinstance(item, str):
+                item = SHORT_TYPES.get(item, item)
+            result[SHORT_KEYS.get(key, key)] = shorten(item)
+        return result
+    if isinstance(value, list):
+        return [shorten(item) for item in value]
+    return value
+
+
+def encode_frame(message: Dict[str, Any], encoding: str) -> Union[str, bytes]:
+    """
+    Кодирование события в кадр: str для текстовых кадров, bytes для бинарных
+    """
+    if encoding == ENCODING_COMPACT:
+        return json.dumps(shorten(message), ensure_ascii=False, separators=(",", ":"), default=str)
+    if encoding == ENCODING_MSGPACK:
+        return msgpack.packb(shorten(message), default=str, use_bin_type=True)
+    return json.dumps(message, ensure_ascii=False, default=str)
@@ -1,8 +1,11 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set
-import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Union
 import asyncio
+from app import database
+from app.models.chat import chat_members
 from app.models.user import User
+from app.websocket.encoding import ENCODING_JSON, encode_frame
 
 
 class ConnectionManager:
@@ -13,8 +16,10 @@ class ConnectionManager:
         self.chat_users: Dict[int, Set[int]] = {}
         # Словарь: user_id -> set чатов пользователя
         self.user_chats: Dict[int, Set[int]] = {}
+        # Словарь: WebSocket -> кодировка кадров, выбранная клиентом
+        self.connection_encodings: Dict[WebSocket, str] = {}
 
-    async def connect(self, websocket: WebSocket, user: User):
+    async def connect(self, websocket: WebSocket, user: User, encoding: str = ENCODING_JSON):
         """
         Подключение пользователя к WebSocket
         """
@@ -24,6 +29,8 @@ class ConnectionManager:
             self.active_connections[user.id] = []
         
         self.active_connections[user.id].append(websocket)
+        if encoding != ENCODING_JSON:
+            self.connection_encodings[websocket] = encoding
         
         # Отправляем подтверждение подключения
         await self.send_personal_message({
@@ -36,6 +43,7 @@ class ConnectionManager:
         """
         Отключение пользователя от WebSocket
         """
+        self.connection_encodings.pop(websocket, None)
         if user_id in self.active_connections:
             if websocket in self.active_connections[user_id]:
                 self.active_connections[user_id].remove(websocket)
@@ -57,29 +65,47 @@ class ConnectionManager:
         """
         Отправка личного сообщения пользователю
         """
-        if user_id in self.active_connections:
-            message_json = json.dumps(message, ensure_ascii=False, default=str)
-            
-            # Отправляем сообщение всем активным соединениям пользователя
-            disconnected_connections = []
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_text(message_json)
-                except Exception:
-                    disconnected_connections.append(connection)
-            
-            # Удаляем неактивные соединения
-            for connection in disconnected_connections:
-                self.active_connections[user_id].remove(connection)
+        await self._send_to_user(message, user_id, {})
+
+    async def _send_to_user(self, message: dict, user_id: int, frames: Dict[str, Union[str, bytes]]):
+        """
+        Отправка события всем соединениям пользователя.
+
+        frames — кэш уже закодированных кадров по кодировкам, общий для всей
+        рассылки, чтобы событие сериализовалось один раз на кодировку
+        """
+        if user_id not in self.active_connections:
+            return
+        
+        # Отправляем сообщение всем активным соединениям пользователя
+        disconnected_connections = []
+        for connection in self.active_connections[user_id]:
+            encoding = self.connection_encodings.get(connection, ENCODING_JSON)
+            frame = frames.get(encoding)
+            if frame is None:
+                frame = frames[encoding] = encode_frame(message, encoding)
+            try:
+                if isinstance(frame, bytes):
+                    await connection.send_bytes(frame)
+                else:
+                    await connection.send_text(frame)
+            except Exception:
+                disconnected_connections.append(connection)
+        
+        # Удаляем неактивные соединения
+        for connection in disconnected_connections:
+            self.active_connections[user_id].remove(connection)
+            self.connection_encodings.pop(connection, None)
 
     async def send_to_chat(self, message: dict, chat_id: int, exclude_user_id: int = None):
         """
         Отправка сообщения всем участникам чата
         """
         if chat_id in self.chat_users:
-            for user_id in self.chat_users[chat_id]:
+            frames: Dict[str, Union[str, bytes]] = {}
+            for user_id in list(self.chat_users[chat_id]):
                 if exclude_user_id is None or user_id != exclude_user_id:
-                    await self.send_personal_message(message, user_id)
+                    await self._send_to_user(message, user_id, frames)
 
     def join_chat(self, user_id: int, chat_id: int):
         """
@@ -109,6 +135,34 @@ class ConnectionManager:
             if not self.user_chats[user_id]:
                 del self.user_chats[user_id]
 
+    def add_chat_members(self, chat_id: int, user_ids: Iterable[int]):
+        """
+        Массовое добавление подключенных пользователей в чат для WebSocket уведомлений
+        """
+        online_ids = [user_id for user_id in user_ids if user_id in self.active_connections]
+        if not online_ids:
+            return
+        
+        self.chat_users.setdefault(chat_id, set()).update(online_ids)
+        for user_id in online_ids:
+            self.user_chats.setdefault(user_id, set()).add(chat_id)
+
+    def remove_chat_members(self, chat_id: int, user_ids: Iterable[int]):
+        """
+        Массовое удаление пользователей из чата для WebSocket уведомлений
+        """
+        user_ids = set(user_ids)
+        if chat_id in self.chat_users:
+            self.chat_users[chat_id] -= user_ids
+            if not self.chat_users[chat_id]:
+                del self.chat_users[chat_id]
+        
+        for user_id in user_ids:
+            if user_id in self.user_chats:
+                self.user_chats[user_id].discard(chat_id)
+                if not self.user_chats[user_id]:
+                    del self.user_chats[user_id]
+
     async def broadcast_typing(self, chat_id: int, user_id: int, is_typing: bool):
         """
         Уведомление о том, что пользователь печатает
@@ -162,6 +216,55 @@ class ConnectionManager:
             for chat_id in self.user_chats[user_id]:
                 await self.send_to_chat(message, chat_id, exclude_user_id=user_id)
 
+    @staticmethod
+    def _load_memberships(user_ids: List[int]) -> List[tuple]:
+        """Пары (user_id, chat_id) всех чатов пользователей"""
+        db = database.SessionLocal()
+        try:
+            return db.query(chat_members.c.user_id, chat_members.c.chat_id).filter(
+                chat_members.c.user_id.in_(user_ids)
+            ).all()
+        finally:
+            db.close()
+
+    async def broadcast_presence(self, changes: Dict[int, bool], last_seen: Optional[Dict[int, datetime]] = None):
+        """
+        Рассылка пачки изменений статуса: чаты всех изменившихся пользователей
+        берутся одним запросом (после отключения их нет в user_chats), и каждый
+        подключенный собеседник получает одно событие на пользователя, даже
+        если у них несколько общих чатов
+        """
+        # Синхронный запрос к БД выполняется в потоке, не блокируя event loop
+        rows = await asyncio.to_thread(self._load_memberships, list(changes))
+        
+        recipients: Dict[int, Set[int]] = {}
+        for user_id, chat_id in rows:
+            recipients.setdefault(user_id, set()).update(self.chat_users.get(chat_id, ()))
+        
+        for user_id, is_online in changes.items():
+            message = {
+                "type": "user_status",
+                "user_id": user_id,
+                "is_online": is_online
+            }
+            if last_seen and user_id in last_seen:
+                message["last_seen"] = last_seen[user_id]
+            frames: Dict[str, Union[str, bytes]] = {}
+            for recipient_id in recipients.get(user_id, set()) - {user_id}:
+                await self._send_to_user(message, recipient_id, frames)
+
+    async def send_interview_event(self, event_type: str, interview_id: int, user_id: int, **data):
+        """
+        Уведомление пользователя об изменении состояния его интервью
+        """
+        message = {
+            "type": event_type,
+            "interview_id": interview_id,
+            **data
+        }
+        
+        await self.send_personal_message(message, user_id)
+
 
 # Глобальный менеджер соединений
 manager = ConnectionManager() 
\ No newline at end of file
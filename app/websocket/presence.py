@@ -0,0 +1,162 @@
+from datetime import datetime, timezone
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+import asyncio
+import logging
+import math
+import time
+
+from app.config import settings
+from app.websocket.manager import manager
+
+logger = logging.getLogger(__name__)
+
+# Шаг колеса таймеров, секунд
+WHEEL_TICK = 1.0
+
+
+class TimerWheel:
+    """
+    Хэшированное колесо таймеров: постановка, перенос и отмена за O(1),
+    продвижение — O(число слотов между тиками), без кучи и отдельных задач
+    на каждый таймер. Таймеры дальше одного оборота колеса проверяются по
+    сроку и остаются в слоте до нужного оборота.
+    """
+
+    def __init__(self, tick: float, slots: int, now: float):
+        self.tick = tick
+        self.slots = slots
+        self.wheel: List[Dict[Hashable, float]] = [{} for _ in range(slots)]
+        self.positions: Dict[Hashable, int] = {}
+        self.current = int(now // tick)
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        self.cancel(key)
+        tick_index = max(math.ceil(deadline / self.tick), self.current + 1)
+        slot = tick_index % self.slots
+        self.wheel[slot][key] = deadline
+        self.positions[key] = slot
+
+    def cancel(self, key: Hashable) -> None:
+        slot = self.positions.pop(key, None)
+        if slot is not None:
+            self.wheel[slot].pop(key, None)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Продвигает колесо до now и возвращает ключи истекших таймеров"""
+        target = int(now // self.tick)
+        steps = min(target - self.current, self.slots)
+        expired = []
+        for step in range(1, steps + 1):
+            slot = self.wheel[(self.current + step) % self.slots]
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self.positions[key]
+                    expired.append(key)
+        self.current = max(self.current, target)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+class PresenceRegistry:
+    """
+    Реестр присутствия пользователей в памяти процесса.
+
+    Как и соединения /ws в менеджере, реестр не разделяется между
+    процессами, поэтому приложение запускается одним воркером gunicorn
+    (--workers 1 в Procfile перекрывает WEB_CONCURRENCY). Масштабирование
+    на несколько процессов потребует общего хранилища (Redis) и для
+    соединений, и для присутствия.
+
+    Пользователь онлайн, пока приходят кадры /ws (в том числе ping) не реже
+    чем раз в ttl секунд; истечение отслеживает колесо таймеров, поэтому
+    упавшие клиенты без закрытия соединения тоже уходят в офлайн. Изменения
+    статуса не рассылаются сразу: они копятся и отдаются пачкой в flush, где
+    противоположные изменения в пределах окна (переподключение) взаимно
+    гасятся.
+    """
+
+    def __init__(self, ttl: float, now: Optional[float] = None):
+        self.ttl = ttl
+        self.timers = TimerWheel(WHEEL_TICK, math.ceil(ttl / WHEEL_TICK) + 1, time.monotonic() if now is None else now)
+        self.online: Set[int] = set()
+        self.last_seen: Dict[int, datetime] = {}
+        # Последний разосланный статус и изменения, ожидающие рассылки
+        self.published: Dict[int, bool] = {}
+        self.pending: Dict[int, bool] = {}
+
+    def heartbeat(self, user_id: int, now: Optional[float] = None) -> None:
+        """Кадр от пользователя: продлевает присутствие на ttl"""
+        now = time.monotonic() if now is None else now
+        self.last_seen[user_id] = datetime.now(timezone.utc)
+        self.timers.schedule(user_id, now + self.ttl)
+        if user_id not in self.online:
+            self.online.add(user_id)
+            self.mark_changed(user_id, True)
+
+    def disconnect(self, user_id: int) -> None:
+        """Закрыто последнее соединение пользователя"""
+        self.timers.cancel(user_id)
+        self.set_offline(user_id)
+
+    def expire(self, now: Optional[float] = None) -> List[int]:
+        """Переводит в офлайн пользователей без кадров дольше ttl"""
+        expired = self.timers.advance(time.monotonic() if now is None else now)
+        for user_id in expired:
+            self.set_offline(user_id)
+        return expired
+
+    def set_offline(self, user_id: int) -> None:
+        if user_id in self.online:
+            self.online.discard(user_id)
+            self.mark_changed(user_id, False)
+
+    def mark_changed(self, user_id: int, is_online: bool) -> None:
+        if self.published.get(user_id, False) == is_online:
+            # Вернулись к разосланному статусу — рассылать нечего
+            self.pending.pop(user_id, None)
+        else:
+            self.pending[user_id] = is_online
+
+    def flush(self) -> Dict[int, bool]:
+        """Забирает накопленные изменения статуса для рассылки"""
+        changes, self.pending = self.pending, {}
+        for user_id, is_online in changes.items():
+            if is_online:
+                self.published[user_id] = True
+            else:
+                self.published.pop(user_id, None)
+        return changes
+
+    def status(self, user_ids: Iterable[int]) -> List[dict]:
+        return [
+            {
+                "user_id": user_id,
+                "is_online": user_id in self.online,
+                "last_seen": self.last_seen.get(user_id)
+            }
+            for user_id in user_ids
+        ]
+
+
+async def run_presence_worker(interval: Optional[float] = None) -> None:
+    """
+    Фоновая задача: раз в interval секунд (окно дебаунса) снимает истекшие
+    присутствия и рассылает накопленные изменения статуса одной пачкой
+    """
+    interval = settings.presence_debounce if interval is None else interval
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            presence.expire()
+            changes = presence.flush()
+            if changes:
+                await manager.broadcast_presence(changes, presence.last_seen)
+        except Exception as e:
+            logger.error(f"Ошибка рассылки статусов присутствия: {e}", exc_info=True)
+
+
+# Глобальный реестр присутствия
+presence = PresenceRegistry(ttl=settings.presence_ttl)
@@ -5,6 +5,8 @@ from app.models.user import User
 from app.models.chat import chat_members
 from app.auth.telegram import validate_telegram_data, extract_user_info
 from app.websocket.manager import manager
+from app.websocket.presence import presence
+from app.websocket.encoding import normalize_encoding
 from sqlalchemy import and_
 import json
 
@@ -56,8 +58,11 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
         # Получаем пользователя
         user = await get_websocket_user(websocket, db)
         
+        # Кодировка кадров выбирается клиентом при подключении: ?encoding=json|compact|msgpack
+        encoding = normalize_encoding(websocket.query_params.get('encoding'))
+        
         # Подключаем пользователя
-        await manager.connect(websocket, user)
+        await manager.connect(websocket, user, encoding)
         
         # Добавляем пользователя во все его чаты
         user_chat_ids = db.query(chat_members.c.chat_id).filter(
@@ -67,12 +72,15 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
         for (chat_id,) in user_chat_ids:
             manager.join_chat(user.id, chat_id)
         
-        # Уведомляем о том, что пользователь онлайн
-        await manager.broadcast_user_online(user.id, True)
+        # Пользователь онлайн; рассылку статуса выполняет фоновая задача
+        # присутствия пачками, так что быстрые переподключения не видны
+        presence.heartbeat(user.id)
         
         while True:
             # Получаем сообщение от клиента
             data = await websocket.receive_text()
+            # Любой кадр (в том числе ping) продлевает присутствие
+            presence.heartbeat(user.id)
             
             try:
                 message = json.loads(data)
@@ -135,13 +143,15 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
     except WebSocketDisconnect:
         # Обрабатываем отключение
         manager.disconnect(websocket, user.id)
-        await manager.broadcast_user_online(user.id, False)
+        if user.id not in manager.active_connections:
+            presence.disconnect(user.id)
     
     except Exception as e:
         # Обрабатываем другие ошибки
         print(f"Ошибка WebSocket соединения: {e}")
         try:
             manager.disconnect(websocket, user.id)
-            await manager.broadcast_user_online(user.id, False)
+            if user.id not in manager.active_connections:
+                presence.disconnect(user.id)
         except:
             pass 
\ No newline at end of file
@@ -0,0 +1,27 @@
+from uvicorn.workers import UvicornWorker
+
+
+class AeonUvicornWorker(UvicornWorker):
+    """
+    Gunicorn worker с явным включением permessage-deflate для /ws.
+
+    Реализация websockets согласует сжатие с клиентом при рукопожатии,
+    клиенты без поддержки расширения получают несжатые кадры.
+
+    Соединения /ws и присутствие хранятся в памяти процесса, поэтому
+    воркер запускается в единственном экземпляре (--workers 1 в Procfile).
+    """
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "ws": "websockets",
+        "ws_per_message_deflate": True,
+    }
+
+    def init_process(self) -> None:
+        if self.cfg.workers > 1:
+            self.log.error(
+                "Запущено %d воркеров: соединения /ws и присутствие не разделяются "
+                "между процессами, нужен --workers 1",
+                self.cfg.workers
+            )
+        super().init_process()
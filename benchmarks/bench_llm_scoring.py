@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк очереди оценки интервью без сети.
+
+Использует FakeLLMProvider с заданной задержкой и сравнивает время оценки
+N интервью при оценке по одному (batch_size=1) и пачками.
+
+Запуск: python benchmarks/bench_llm_scoring.py [--interviews N] [--latency S] [--batch-size N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import database
+from app.database import Base
+from app.models import Interview, Position, User
+from app.services.llm import FakeLLMProvider, set_llm_provider
+from app.services.scoring import ScoringQueue
+
+
+def setup_db(interviews: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    user = User(telegram_id=1000, username="bench", first_name="Bench")
+    position = Position(title="Backend Developer")
+    db.add_all([user, position])
+    db.flush()
+    questions = [{"id": i + 1, "text": f"Вопрос {i + 1}", "type": "text", "category": "bench"} for i in range(10)]
+    answers = {str(i): f"Развернутый ответ на вопрос {i + 1}" for i in range(10)}
+    db.add_all([
+        Interview(user_id=user.id, position_id=position.id, questions=questions, answers=answers, status="scoring")
+        for _ in range(interviews)
+    ])
+    db.commit()
+    db.close()
+    return Session
+
+
+async def run_queue(Session, interviews: int, batch_size: int, concurrency: int) -> float:
+    database.SessionLocal = Session
+    db = Session()
+    db.query(Interview).update({"status": "scoring", "score": None})
+    db.commit()
+    db.close()
+
+    queue = ScoringQueue(workers=concurrency, concurrency=concurrency, batch_size=batch_size, batch_wait=0.01)
+    start = time.perf_counter()
+    queue.start()
+    await queue.queue.join()
+    elapsed = time.perf_counter() - start
+    await queue.stop()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--interviews", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=2)
+    args = parser.parse_args()
+
+    provider = FakeLLMProvider(latency=args.latency)
+    set_llm_provider(provider)
+    Session = setup_db(args.interviews)
+
+    single = asyncio.run(run_queue(Session, args.interviews, 1, args.concurrency))
+    single_calls = provider.calls
+    batched = asyncio.run(run_queue(Session, args.interviews, args.batch_size, args.concurrency))
+
+    print(f"Интервью: {args.interviews}, задержка модели: {args.latency * 1000:.0f} мс, параллельно: {args.concurrency}")
+    print(f"{'По одному:':<22}{single:8.2f} с, запросов: {single_calls}")
+    print(f"{'Пачками по ' + str(args.batch_size) + ':':<22}{batched:8.2f} с, запросов: {provider.calls - single_calls}")
+    print(f"{'Ускорение:':<22}{single / batched:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
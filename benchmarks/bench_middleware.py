@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк накладных расходов HTTP middleware на один запрос.
+
+Вызывает ASGI приложение напрямую (без сети и TestClient) и сравнивает
+голый обработчик с обработчиком, обернутым в AccessLogMiddleware.
+
+Запуск: python benchmarks/bench_middleware.py [--requests N] [--sample-rate R]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.middleware import AccessLogMiddleware
+
+BODY = b'{"status":"ok"}'
+
+
+async def endpoint(scope, receive, send):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json")],
+    })
+    await send({"type": "http.response.body", "body": BODY})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def make_scope():
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/chats/",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"origin", b"https://aeon-messenger.vercel.app"),
+            (b"x-telegram-init-data", b"query_id=bench"),
+        ],
+    }
+
+
+async def run(app, requests: int) -> float:
+    scope = make_scope()
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    # Access log пишется в NullHandler, чтобы мерить только сам middleware
+    logging.getLogger("app.access").addHandler(logging.NullHandler())
+    logging.getLogger("app.access").propagate = False
+    logging.getLogger("app.access").setLevel(logging.INFO)
+
+    wrapped = AccessLogMiddleware(
+        endpoint,
+        allowed_origins=["https://aeon-messenger.vercel.app", "*"],
+        sample_rate=args.sample_rate,
+    )
+
+    baseline = asyncio.run(run(endpoint, args.requests))
+    with_middleware = asyncio.run(run(wrapped, args.requests))
+
+    print(f"Запросов: {args.requests}, sample rate: {args.sample_rate}")
+    print(f"{'Без middleware:':<22}{baseline * 1e6:8.2f} мкс/запрос")
+    print(f"{'AccessLogMiddleware:':<22}{with_middleware * 1e6:8.2f} мкс/запрос")
+    print(f"{'Накладные расходы:':<22}{(with_middleware - baseline) * 1e6:8.2f} мкс/запрос")
+
+
+if __name__ == "__main__":
+    main()
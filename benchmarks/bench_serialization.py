@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк сериализации страницы из 100 сообщений.
+
+Сравнивает прежний путь (ORM объекты с ленивой загрузкой отправителя,
+валидация Pydantic из атрибутов, стандартный JSONResponse) с новым
+(выборка колонок, model_validate из строк, ORJSONResponse).
+
+Запуск: python benchmarks/bench_serialization.py [--messages N] [--rounds N]
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, create_engine, desc
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.messages import MESSAGE_COLUMNS, SENDER_COLUMNS, message_from_row
+from app.database import Base
+from app.models import Chat, Message, User
+from app.responses import DefaultResponse
+from app.schemas.message import MessageList
+
+
+def setup_db(messages: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+
+    users = [User(telegram_id=1000 + i, username=f"user{i}", first_name=f"User {i}") for i in range(10)]
+    db.add_all(users)
+    db.flush()
+    chat = Chat(title="Bench", chat_type="group", created_by=users[0].id)
+    db.add(chat)
+    db.flush()
+    db.add_all([
+        Message(chat_id=chat.id, sender_id=users[i % 10].id, text=f"Сообщение номер {i} " * 5, read_by=[1, 2, 3])
+        for i in range(messages)
+    ])
+    chat_id = chat.id
+    db.commit()
+    db.close()
+    return Session, chat_id
+
+
+def orm_page(db, chat_id, per_page):
+    messages = db.query(Message).filter(
+        and_(Message.chat_id == chat_id, Message.is_deleted == False)
+    ).order_by(desc(Message.created_at)).limit(per_page).all()
+    messages.reverse()
+    page = MessageList(messages=messages, total=len(messages), page=1, per_page=per_page,
+                       has_next=False, has_prev=False)
+    return JSONResponse(jsonable_encoder(page)).body
+
+
+def column_page(db, chat_id, per_page):
+    rows = db.query(*MESSAGE_COLUMNS, *SENDER_COLUMNS).join(
+        User, User.id == Message.sender_id
+    ).filter(
+        and_(Message.chat_id == chat_id, Message.is_deleted == False)
+    ).order_by(desc(Message.created_at)).limit(per_page).all()
+    messages = [message_from_row(row) for row in reversed(rows)]
+    page = MessageList(messages=messages, total=len(messages), page=1, per_page=per_page,
+                       has_next=False, has_prev=False)
+    return DefaultResponse(page.model_dump(mode="json")).body
+
+
+def measure(fn, Session, chat_id, per_page, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        db = Session()
+        start = time.perf_counter()
+        fn(db, chat_id, per_page)
+        best = min(best, time.perf_counter() - start)
+        db.close()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    Session, chat_id = setup_db(args.messages)
+    orm = measure(orm_page, Session, chat_id, args.messages, args.rounds)
+    columns = measure(column_page, Session, chat_id, args.messages, args.rounds)
+
+    print(f"Сообщений на странице: {args.messages}, класс ответа: {DefaultResponse.__name__}")
+    print(f"{'ORM + JSONResponse:':<26}{orm * 1000:8.2f} мс")
+    print(f"{'Колонки + DefaultResponse:':<26}{columns * 1000:8.2f} мс")
+    print(f"{'Ускорение:':<26}{orm / columns:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
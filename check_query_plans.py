@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Скрипт для проверки планов запросов горячих эндпоинтов.
+
+Для каждого запроса выполняет EXPLAIN (PostgreSQL) или EXPLAIN QUERY PLAN
+(SQLite) и проверяет, что в плане используется ожидаемый индекс.
+
+Запуск:
+    python check_query_plans.py            # база из DATABASE_URL
+    python check_query_plans.py --sqlite   # временная SQLite база в памяти
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_, create_engine, desc, exists, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.chats import last_message_column, query_chat_members
+from app.api.messages import MESSAGE_COLUMNS, SENDER_COLUMNS
+from app.models import Chat, ChatInvitation, Interview, Message, User, chat_members
+
+# Имена индекса первичного ключа различаются по диалектам
+PRIMARY_KEYS = {
+    "chat_members": {"chat_members_pkey", "sqlite_autoindex_chat_members_1"},
+}
+
+
+def endpoint_queries(db: Session):
+    """
+    Запросы эндпоинтов и индексы, которые они должны использовать
+    """
+    return [
+        (
+            "Проверка участия в чате (chats, messages, websocket)",
+            db.query(chat_members).filter(
+                and_(chat_members.c.user_id == 1, chat_members.c.chat_id == 1)
+            ),
+            PRIMARY_KEYS["chat_members"],
+        ),
+        (
+            "GET /chats/{chat_id}/members",
+            query_chat_members(db, 1).limit(50),
+            {"ix_chat_members_chat_id_user_id"},
+        ),
+        (
+            "GET /messages/chat/{chat_id}",
+            db.query(*MESSAGE_COLUMNS, *SENDER_COLUMNS).join(
+                User, User.id == Message.sender_id
+            ).filter(
+                and_(Message.chat_id == 1, Message.is_deleted == False)
+            ).order_by(desc(Message.created_at)).limit(50),
+            {"ix_messages_chat_id_created_at_live"},
+        ),
+        (
+            "GET /chats/ (последнее сообщение чата)",
+            db.query(Chat.id, last_message_column(Message.text)),
+            {"ix_messages_chat_id_created_at_live"},
+        ),
+        (
+            "POST /chats/{chat_id}/invite-by-username",
+            db.query(ChatInvitation).filter(
+                and_(
+                    ChatInvitation.username == "someone",
+                    ChatInvitation.chat_id == 1,
+                    ChatInvitation.is_active == True
+                )
+            ),
+            {"ix_chat_invitations_active_username_chat_id"},
+        ),
+        (
+            "Очистка сообщений: есть ли ответы на сообщение",
+            db.query(exists().where(Message.reply_to_message_id == 1)),
+            {"ix_messages_reply_to_message_id"},
+        ),
+        (
+            "GET /hr/interviews/current",
+            db.query(Interview).filter(
+                Interview.user_id == 1,
+                Interview.status == "in_progress"
+            ),
+            {"ix_interviews_user_id_status"},
+        ),
+    ]
+
+
+def explain(db: Session, query) -> str:
+    """
+    Возвращает текст плана запроса для текущего диалекта
+    """
+    dialect = db.get_bind().dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "postgresql":
+        rows = db.execute(text(f"EXPLAIN {sql}")).all()
+        return "\n".join(row[0] for row in rows)
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def partition_indexes(db: Session, indexes: set) -> set:
+    """
+    Добавляет к индексам их копии на партициях: в плане запроса к
+    секционированной таблице PostgreSQL видны имена индексов партиций
+    (messages_p202403_chat_id_created_at_idx), а не родительского индекса
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return set(indexes)
+    rows = db.execute(text(
+        "WITH RECURSIVE tree(oid) AS ("
+        " SELECT c.oid FROM pg_class c WHERE c.relname = ANY(:names)"
+        " UNION"
+        " SELECT i.inhrelid FROM pg_inherits i JOIN tree t ON i.inhparent = t.oid"
+        ") SELECT c.relname FROM tree t JOIN pg_class c ON c.oid = t.oid"
+    ), {"names": list(indexes)}).all()
+    return set(indexes) | {row[0] for row in rows}
+
+
+def check_query_plans(db: Session) -> list:
+    """
+    Проверяет планы всех запросов, возвращает список ошибок
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # На маленьких таблицах планировщик предпочитает seq scan;
+        # отключаем его, чтобы проверить саму возможность использовать индекс
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+
+    failures = []
+    for name, query, expected_indexes in endpoint_queries(db):
+        plan = explain(db, query)
+        used = sorted(index for index in partition_indexes(db, expected_indexes) if index in plan)
+        if used:
+            print(f"✅ {name}: {used[0]}")
+        else:
+            print(f"❌ {name}: ожидался один из {sorted(expected_indexes)}")
+            print("   " + plan.replace("\n", "\n   "))
+            failures.append(name)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка использования индексов в планах запросов")
+    parser.add_argument("--sqlite", action="store_true", help="проверить на временной SQLite базе")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        from app.database import Base
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+    else:
+        from app.database import engine
+
+    db = sessionmaker(bind=engine)()
+    try:
+        failures = check_query_plans(db)
+    finally:
+        db.rollback()
+        db.close()
+
+    if failures:
+        print(f"\nИндексы не используются в {len(failures)} запросах")
+        sys.exit(1)
+    print("\nВсе запросы используют индексы")
+
+
+if __name__ == "__main__":
+    main()
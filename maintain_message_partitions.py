@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Обслуживание секционированной таблицы messages (PostgreSQL):
+создает партиции на ближайшие месяцы и архивирует старые в сжатый JSONL.
+
+Запускается по расписанию (например, Heroku Scheduler раз в сутки):
+    python maintain_message_partitions.py [--months-ahead 2] [--retain-months 12] [--archive-dir DIR]
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.services.partitions import ensure_message_partitions, archive_old_partitions
+import logging
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Обслуживание партиций messages")
+    parser.add_argument("--months-ahead", type=int, default=2)
+    parser.add_argument("--retain-months", type=int, default=None)
+    parser.add_argument("--archive-dir", default=None)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        created = ensure_message_partitions(db, months_ahead=args.months_ahead)
+        archived = archive_old_partitions(db, retain_months=args.retain_months, archive_dir=args.archive_dir)
+        logger.info("Создано партиций: %d, архивировано: %d", len(created), len(archived))
+        for item in archived:
+            logger.info("  %s: %d строк -> %s", item["partition"], item["rows"], item["path"])
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Ошибка обслуживания партиций: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Пересчет агрегатов аналитики по позициям (position_interview_stats)
+по всем завершенным интервью.
+
+Нужен после миграции и при расхождении агрегатов с данными:
+    python rebuild_position_stats.py
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.services.analytics import rebuild_position_stats
+import logging
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    db = SessionLocal()
+    try:
+        count = rebuild_position_stats(db)
+        logger.info("Учтено завершенных интервью: %d", count)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Ошибка пересчета агрегатов: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,8 @@
+import os
+
+# Тесты не пишут app.log: пустой LOG_FILE отключает файловый обработчик
+os.environ["LOG_FILE"] = ""
+
 import pytest
 import asyncio
 from fastapi.testclient import TestClient
@@ -5,7 +10,6 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import tempfile
-import os
 from unittest.mock import patch
 
 # Импортируем модели напрямую, не через main.py
@@ -8,6 +8,8 @@ from unittest.mock import patch
 from app.auth.telegram import validate_telegram_data, extract_user_info
 from app.auth.dependencies import get_current_user
 from app.models.user import User
+from app.models.chat import chat_members
+from app.models.chat_invitation import ChatInvitation
 
 
 class TestTelegramAuth:
@@ -203,4 +205,33 @@ class TestAuthDependencies:
         # Проверяем, что данные обновились
         db.refresh(user)
         assert user.username == 'testuser'
-        assert user.first_name == 'Test' 
\ No newline at end of file
+        assert user.first_name == 'Test'
+
+    def test_invitations_accepted_on_first_login(self, client, auth_headers, db, create_user, create_chat):
+        """Тест автоматического принятия приглашений при первом входе"""
+        inviter = create_user()
+        chat1 = create_chat(creator_id=inviter.id, chat_type='group')
+        chat2 = create_chat(creator_id=inviter.id, chat_type='group')
+        other_chat = create_chat(creator_id=inviter.id, chat_type='group')
+        db.add_all([
+            ChatInvitation(chat_id=chat1.id, username='testuser', invited_by=inviter.id),
+            ChatInvitation(chat_id=chat2.id, username='testuser', invited_by=inviter.id),
+            ChatInvitation(chat_id=chat2.id, username='testuser', invited_by=inviter.id),
+            ChatInvitation(chat_id=other_chat.id, username='someone_else', invited_by=inviter.id),
+        ])
+        db.commit()
+        
+        response = client.get("/api/v1/me", headers=auth_headers)
+        
+        assert response.status_code == 200
+        user_id = response.json()['id']
+        
+        chat_ids = {
+            chat_id for (chat_id,) in db.query(chat_members.c.chat_id).filter(
+                chat_members.c.user_id == user_id
+            )
+        }
+        assert chat_ids == {chat1.id, chat2.id}
+        
+        active = db.query(ChatInvitation).filter(ChatInvitation.is_active == True).all()
+        assert [invitation.username for invitation in active] == ['someone_else']
@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy import and_
 
 from app.models.chat import chat_members
+from app.schemas.chat import MAX_BULK_MEMBERS
 
 
 class TestChatAPI:
@@ -70,6 +71,30 @@ class TestChatAPI:
         
         # Чат должен создаться, но несуществующий пользователь просто не добавится
         assert response.status_code == 200
+        assert response.json()['unknown_member_ids'] == [999999]
+    
+    def test_create_chat_batch_members(self, client, auth_headers, create_user):
+        """Тест создания чата с большим количеством участников"""
+        users = [create_user() for _ in range(20)]
+        member_ids = [user.id for user in users] + [users[0].id, 888888, 999999]
+        
+        chat_data = {
+            "title": "Big Group",
+            "chat_type": "group",
+            "member_ids": member_ids
+        }
+        
+        response = client.post("/api/v1/chats/", json=chat_data, headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        # 20 участников + создатель, дубликаты и неизвестные ID не добавляются
+        assert data['member_count'] == 21
+        assert data['unknown_member_ids'] == [888888, 999999]
+        # В ответе только первые участники, создатель-администратор первым
+        assert len(data['members']) == 20
+        assert data['members'][0]['is_admin'] is True
     
     def test_get_user_chats_with_data(self, client, auth_headers, db, create_user, create_chat):
         """Тест получения списка чатов с данными"""
@@ -100,6 +125,36 @@ class TestChatAPI:
         assert data[0]['title'] == 'Test Chat'
         assert data[0]['unread_count'] == 0
     
+    def test_get_user_chats_last_message(self, client, auth_headers, db, create_chat, create_message):
+        """Тест последнего сообщения в списке чатов"""
+        current_user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        
+        chat = create_chat(creator_id=current_user_id, title="Test Chat")
+        empty_chat = create_chat(creator_id=current_user_id, title="Empty Chat")
+        for chat_id in (chat.id, empty_chat.id):
+            db.execute(
+                chat_members.insert().values(
+                    user_id=current_user_id,
+                    chat_id=chat_id,
+                    is_admin=True
+                )
+            )
+        db.commit()
+        
+        create_message(chat.id, current_user_id, text="First")
+        create_message(chat.id, current_user_id, text="Last")
+        create_message(chat.id, current_user_id, text="Deleted", is_deleted=True)
+        
+        response = client.get("/api/v1/chats/", headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = {item['id']: item for item in response.json()}
+        
+        assert len(data) == 2
+        assert data[chat.id]['last_message'] == 'Last'
+        assert data[chat.id]['last_message_time'] is not None
+        assert data[empty_chat.id]['last_message'] is None
+    
     def test_get_chat_by_id(self, client, auth_headers, db, create_chat):
         """Тест получения чата по ID"""
         # Получаем текущего пользователя
@@ -176,6 +231,8 @@ class TestChatAPI:
         
         assert data['title'] == 'New Title'
         assert data['description'] == 'New description'
+        assert data['member_count'] == 1
+        assert 'members' not in data
     
     def test_update_chat_not_admin(self, client, auth_headers, db, create_chat, create_user):
         """Тест обновления чата не администратором"""
@@ -404,4 +461,172 @@ class TestChatAPI:
         response = client.delete(f"/api/v1/chats/{chat.id}/members/{current_user_id}", headers=auth_headers)
         
         assert response.status_code == 200
-        assert "успешно удален" in response.json()['message'] 
\ No newline at end of file
+        assert "успешно удален" in response.json()['message'] 
+
+class TestBulkMembersAPI:
+    """Тесты для массового управления участниками"""
+    
+    def setup_admin_chat(self, client, auth_headers, db, create_chat):
+        current_user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        chat = create_chat(creator_id=current_user_id, title="Team", chat_type="group")
+        db.execute(
+            chat_members.insert().values(
+                user_id=current_user_id,
+                chat_id=chat.id,
+                is_admin=True
+            )
+        )
+        db.commit()
+        return chat, current_user_id
+    
+    def member_ids(self, db, chat_id):
+        return {
+            user_id for (user_id,) in db.query(chat_members.c.user_id).filter(
+                chat_members.c.chat_id == chat_id
+            )
+        }
+    
+    def test_bulk_add_members(self, client, auth_headers, db, create_chat, create_user):
+        """Тест массового добавления по ID и username"""
+        chat, admin_id = self.setup_admin_chat(client, auth_headers, db, create_chat)
+        user1 = create_user()
+        user2 = create_user(username='bulk_user')
+        
+        response = client.post(
+            f"/api/v1/chats/{chat.id}/members/bulk",
+            json={"user_ids": [user1.id, admin_id, 999999], "usernames": ["@bulk_user", "nobody"]},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        statuses = [(r['user_id'], r['username'], r['status']) for r in data['results']]
+        
+        assert statuses == [
+            (user1.id, None, 'added'),
+            (admin_id, None, 'already_member'),
+            (999999, None, 'not_found'),
+            (user2.id, 'bulk_user', 'added'),
+            (None, 'nobody', 'not_found'),
+        ]
+        assert data['affected'] == 2
+        assert self.member_ids(db, chat.id) == {admin_id, user1.id, user2.id}
+    
+    def test_bulk_add_requires_admin(self, client, auth_headers, db, create_chat, create_user):
+        """Тест массового добавления без прав администратора"""
+        other = create_user()
+        chat = create_chat(creator_id=other.id)
+        
+        response = client.post(
+            f"/api/v1/chats/{chat.id}/members/bulk",
+            json={"user_ids": [other.id]},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 403
+    
+    def test_bulk_members_limit(self, client, auth_headers, db, create_chat):
+        """Слишком длинный список пользователей отклоняется валидацией"""
+        chat, _ = self.setup_admin_chat(client, auth_headers, db, create_chat)
+
+        response = client.post(
+            f"/api/v1/chats/{chat.id}/members/bulk",
+            json={"user_ids": list(range(1, MAX_BULK_MEMBERS + 2))},
+            headers=auth_headers
+        )
+        assert response.status_code == 422
+
+    def test_bulk_remove_members(self, client, auth_headers, db, create_chat, create_user):
+        """Тест массового удаления участников"""
+        chat, admin_id = self.setup_admin_chat(client, auth_headers, db, create_chat)
+        user1 = create_user()
+        user2 = create_user()
+        outsider = create_user()
+        client.post(
+            f"/api/v1/chats/{chat.id}/members/bulk",
+            json={"user_ids": [user1.id, user2.id]},
+            headers=auth_headers
+        )
+        
+        response = client.post(
+            f"/api/v1/chats/{chat.id}/members/bulk-remove",
+            json={"user_ids": [user1.id, outsider.id], "usernames": [user2.username]},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert [r['status'] for r in data['results']] == ['removed', 'not_member', 'removed']
+        assert data['affected'] == 2
+        assert self.member_ids(db, chat.id) == {admin_id}
+
+
+
+class TestChatMembersAPI:
+    """Тесты для постраничного списка участников"""
+    
+    def setup_chat(self, client, auth_headers, db, create_chat, create_user, count):
+        current_user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        chat = create_chat(creator_id=current_user_id, title="Channel", chat_type="channel")
+        users = [create_user(username=f"member{i:02d}") for i in range(count)]
+        rows = [{"user_id": current_user_id, "chat_id": chat.id, "is_admin": False}]
+        rows.extend(
+            {"user_id": user.id, "chat_id": chat.id, "is_admin": i == count - 1}
+            for i, user in enumerate(users)
+        )
+        db.execute(chat_members.insert(), rows)
+        db.commit()
+        return chat, current_user_id, users
+    
+    def test_get_chat_preview(self, client, auth_headers, db, create_chat, create_user):
+        """Информация о чате содержит количество и первых участников"""
+        chat, _, users = self.setup_chat(client, auth_headers, db, create_chat, create_user, 30)
+        
+        response = client.get(f"/api/v1/chats/{chat.id}?members_limit=5", headers=auth_headers)
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['member_count'] == 31
+        assert len(data['members']) == 5
+        assert data['members'][0]['id'] == users[-1].id
+        assert data['members'][0]['is_admin'] is True
+    
+    def test_members_cursor_pagination(self, client, auth_headers, db, create_chat, create_user):
+        """Курсорная пагинация проходит всех участников без повторов"""
+        chat, current_user_id, users = self.setup_chat(client, auth_headers, db, create_chat, create_user, 12)
+        
+        seen = []
+        cursor = None
+        while True:
+            url = f"/api/v1/chats/{chat.id}/members?limit=5"
+            if cursor:
+                url += f"&cursor={cursor}"
+            data = client.get(url, headers=auth_headers).json()
+            seen.extend(member['id'] for member in data['members'])
+            cursor = data['next_cursor']
+            if not data['has_more']:
+                break
+        
+        assert len(seen) == 13
+        assert len(set(seen)) == 13
+        assert seen[0] == users[-1].id
+    
+    def test_members_prefix_search(self, client, auth_headers, db, create_chat, create_user):
+        """Поиск участников по префиксу username"""
+        chat, _, users = self.setup_chat(client, auth_headers, db, create_chat, create_user, 12)
+        
+        response = client.get(f"/api/v1/chats/{chat.id}/members?prefix=@MEMBER1", headers=auth_headers)
+        
+        assert response.status_code == 200
+        usernames = [member['username'] for member in response.json()['members']]
+        assert usernames == ['member11', 'member10']
+    
+    def test_members_access_denied(self, client, auth_headers, create_chat, create_user):
+        """Список участников доступен только участникам"""
+        other = create_user()
+        chat = create_chat(creator_id=other.id)
+        
+        response = client.get(f"/api/v1/chats/{chat.id}/members", headers=auth_headers)
+        
+        assert response.status_code == 403
@@ -0,0 +1,79 @@
+import pytest
+
+from app.models.user import subordinates_association
+from app.services.hierarchy import (
+    add_subordinate_link,
+    all_reports,
+    is_direct_subordinate,
+    is_report,
+    org_tree,
+    would_create_cycle,
+)
+
+
+@pytest.fixture
+def org(db, create_user):
+    """
+    ceo -> cto -> dev1, dev2
+    ceo -> cfo
+    """
+    users = {name: create_user(first_name=name) for name in ("ceo", "cto", "cfo", "dev1", "dev2")}
+    for manager, subordinate in (("ceo", "cto"), ("ceo", "cfo"), ("cto", "dev1"), ("cto", "dev2")):
+        db.execute(subordinates_association.insert().values(
+            manager_id=users[manager].id, subordinate_id=users[subordinate].id
+        ))
+    db.commit()
+    return users
+
+
+class TestHierarchy:
+    """Тесты иерархии руководитель-подчиненный"""
+
+    def test_all_reports_with_depth(self, db, org):
+        reports = [(user.first_name, depth) for user, depth in all_reports(db, org["ceo"].id)]
+        assert reports == [("cto", 1), ("cfo", 1), ("dev1", 2), ("dev2", 2)]
+        assert all_reports(db, org["dev1"].id) == []
+
+    def test_membership_checks(self, db, org):
+        assert is_direct_subordinate(db, org["cto"].id, org["dev1"].id)
+        assert not is_direct_subordinate(db, org["ceo"].id, org["dev1"].id)
+        assert is_report(db, org["ceo"].id, org["dev1"].id)
+        assert not is_report(db, org["cfo"].id, org["dev1"].id)
+
+    def test_org_tree(self, db, org):
+        tree = org_tree(db, org["ceo"].id)
+        assert [node["user"].first_name for node in tree] == ["cto", "cfo"]
+        assert [node["user"].first_name for node in tree[0]["subordinates"]] == ["dev1", "dev2"]
+        assert tree[1]["subordinates"] == []
+
+    def test_cycle_prevented(self, db, org):
+        """Нельзя назначить руководителя подчиненным своего подчиненного"""
+        assert would_create_cycle(db, org["dev1"].id, org["ceo"].id)
+        assert would_create_cycle(db, org["ceo"].id, org["ceo"].id)
+        assert not would_create_cycle(db, org["cfo"].id, org["dev1"].id)
+
+        assert add_subordinate_link(db, org["dev2"].id, org["ceo"].id) == "Назначение образует цикл в иерархии"
+        assert add_subordinate_link(db, org["ceo"].id, org["cto"].id) == "Пользователь уже является подчиненным"
+        assert add_subordinate_link(db, org["cfo"].id, org["dev1"].id) is None
+        db.commit()
+
+        # dev1 теперь и под cfo, глубина считается по кратчайшему пути
+        reports = {user.first_name: depth for user, depth in all_reports(db, org["ceo"].id)}
+        assert reports["dev1"] == 2
+        assert [user.first_name for user, _ in all_reports(db, org["cfo"].id)] == ["dev1"]
+
+    def test_deep_cycle_and_diamonds(self, db, create_user):
+        """Обход завершается на циклах любой длины и не размножает пути через ромбы"""
+        chain = [create_user(first_name=f"u{i}") for i in range(60)]
+        links = [(chain[i], chain[i + 1]) for i in range(59)] + [(chain[-1], chain[0])]
+        # Ромбы: u0 -> u1 -> u3 и u0 -> u2 -> u3
+        links += [(chain[0], chain[2]), (chain[1], chain[3])]
+        for manager, subordinate in links:
+            db.execute(subordinates_association.insert().values(manager_id=manager.id, subordinate_id=subordinate.id))
+        db.commit()
+
+        reports = {user.first_name: depth for user, depth in all_reports(db, chain[0].id)}
+        assert len(reports) == 59
+        assert reports["u2"] == 1 and reports["u3"] == 2 and reports["u59"] == 58
+        assert is_report(db, chain[59].id, chain[58].id)
+        assert would_create_cycle(db, chain[30].id, chain[5].id)
@@ -0,0 +1,749 @@
+import csv
+import io
+import json
+import logging
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from app.config import settings
+from app.models.interview import Interview
+from app.models.interview_answer import InterviewAnswer
+from app.models.position import Position
+from app.models.position_quality import PositionQuality
+from app.models.position_interview_stats import PositionInterviewStats
+from app.models.position_question import PositionQuestion
+from app.models.quality import Quality
+from app.models.user import User
+from app.services.analytics import rebuild_position_stats
+from app.services.interviews import generate_questions_for_position, request_completion
+from app.services.llm import FakeLLMProvider, LLMProvider, set_llm_provider
+from app.services.llm_cache import evict_entries, stats as cache_counters, store_response
+from app.models.llm_cache import LLMCacheEntry
+from app.services.public_positions import etag_matches, invalidate_public_positions
+from app.services.question_bank import build_question_bank
+from app.services.scoring import ScoringQueue, claim_stale_interviews, format_answers, score_interviews
+
+
+@pytest.fixture
+def create_position(db):
+    """Фабрика для создания позиций с качествами"""
+    def _create_position(title="Backend Developer", qualities=(("Python", 1),), **kwargs):
+        position = Position(title=title, is_active=True, **kwargs)
+        db.add(position)
+        db.flush()
+        for name, weight in qualities:
+            quality = Quality(name=name)
+            db.add(quality)
+            db.flush()
+            db.add(PositionQuality(position_id=position.id, quality_id=quality.id, weight=weight))
+        db.commit()
+        db.refresh(position)
+        return position
+
+    return _create_position
+
+
+class TestInterviewAPI:
+    """Тесты для API интервью"""
+
+    @pytest.fixture(autouse=True)
+    def no_openai(self):
+        with patch.object(settings, 'openai_api_key', None):
+            yield
+
+    def test_create_interview_generates_in_background(self, client, auth_headers, db, create_position):
+        """Интервью создается сразу в статусе generating, вопросы готовятся в фоне"""
+        position = create_position()
+
+        with patch('app.services.interviews.manager.send_interview_event', new_callable=AsyncMock) as notify:
+            response = client.post("/api/v1/hr/interviews", json={"position_id": position.id}, headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['status'] == "generating"
+        assert data['questions'] == []
+
+        # Фоновая задача уже выполнена TestClient после ответа
+        current = client.get("/api/v1/hr/interviews/current", headers=auth_headers).json()
+        assert current['id'] == data['id']
+        assert current['status'] == "in_progress"
+        assert len(current['questions']) == 10
+
+        notify.assert_awaited_once()
+        assert notify.await_args.args[:2] == ("interview_ready", data['id'])
+
+    def test_answer_rejected_while_generating(self, client, auth_headers, db, create_position):
+        """Ответы не принимаются, пока вопросы генерируются"""
+        position = create_position()
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        interview = Interview(user_id=user_id, position_id=position.id, questions=[], answers={}, status="generating")
+        db.add(interview)
+        db.commit()
+
+        response = client.put(
+            f"/api/v1/hr/interviews/{interview.id}/answer",
+            params={"question_index": 0, "answer": "Ответ"},
+            headers=auth_headers
+        )
+        assert response.status_code == 409
+
+        response = client.post("/api/v1/hr/interviews", json={"position_id": position.id}, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_stale_generating_replaced(self, client, auth_headers, db, create_position):
+        """Интервью, застрявшее в generating, не мешает начать новое"""
+        position = create_position()
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        stale = Interview(
+            user_id=user_id,
+            position_id=position.id,
+            questions=[],
+            answers={},
+            status="generating",
+            started_at=datetime.now(timezone.utc) - timedelta(seconds=settings.interview_generating_timeout + 60)
+        )
+        db.add(stale)
+        db.commit()
+
+        with patch('app.services.interviews.manager.send_interview_event', new_callable=AsyncMock):
+            response = client.post("/api/v1/hr/interviews", json={"position_id": position.id}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()['id'] != stale.id
+        db.expire_all()
+        assert db.query(Interview.status).filter(Interview.id == stale.id).scalar() == "failed"
+
+    def test_submit_answer_upserts_row(self, client, auth_headers, db, create_position):
+        """Повторное сохранение ответа перезаписывает одну строку interview_answers"""
+        position = create_position()
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        questions = [{"id": 1, "text": "Вопрос", "type": "text", "category": "test"}]
+        interview = Interview(user_id=user_id, position_id=position.id, questions=questions, answers={}, status="in_progress")
+        db.add(interview)
+        db.commit()
+
+        for answer in ("Черновик", "Итоговый ответ"):
+            response = client.put(
+                f"/api/v1/hr/interviews/{interview.id}/answer",
+                params={"question_index": 0, "answer": answer},
+                headers=auth_headers
+            )
+            assert response.status_code == 200
+
+        response = client.put(
+            f"/api/v1/hr/interviews/{interview.id}/answer",
+            params={"question_index": 5, "answer": "Ответ"},
+            headers=auth_headers
+        )
+        assert response.status_code == 400
+
+        assert db.query(InterviewAnswer).filter(InterviewAnswer.interview_id == interview.id).count() == 1
+        current = client.get("/api/v1/hr/interviews/current", headers=auth_headers).json()
+        assert current['answers'] == {"0": "Итоговый ответ"}
+
+    def test_submit_answer_by_question_id(self, client, auth_headers, db, create_position):
+        """Ответ по id вопроса хранится по позиции вопроса и не дублирует ответ по позиции"""
+        position = create_position()
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        questions = [{"id": i + 1, "text": f"Вопрос {i + 1}", "type": "text", "category": "test"} for i in range(3)]
+        interview = Interview(user_id=user_id, position_id=position.id, questions=questions, answers={}, status="in_progress")
+        db.add(interview)
+        db.commit()
+
+        url = f"/api/v1/hr/interviews/{interview.id}/answer"
+        assert client.put(url, params={"question_id": 3, "answer": "Черновик"}, headers=auth_headers).status_code == 200
+        assert client.put(url, params={"question_index": 2, "answer": "Ответ на третий"}, headers=auth_headers).status_code == 200
+        for params in ({"question_id": 4}, {"question_index": 3}, {"question_index": -1}, {}, {"question_id": 1, "question_index": 0}):
+            assert client.put(url, params={**params, "answer": "Ответ"}, headers=auth_headers).status_code == 400
+
+        db.expire_all()
+        interview = db.query(Interview).filter(Interview.id == interview.id).one()
+        assert interview.answers == {"2": "Ответ на третий"}
+        assert format_answers(interview) == "Вопрос 3: Вопрос 3\nОтвет: Ответ на третий"
+
+    def test_answers_merge_legacy_json(self, db, create_user, create_position):
+        """Ответы, сохраненные до переноса в JSON колонке, остаются видны"""
+        position = create_position()
+        user = create_user()
+        interview = Interview(user_id=user.id, position_id=position.id, questions=[], status="in_progress")
+        interview.legacy_answers = {"0": "Старый ответ"}
+        interview.answer_rows.append(InterviewAnswer(question_index=1, answer="Новый ответ"))
+        db.add(interview)
+        db.commit()
+
+        assert interview.answers == {"0": "Старый ответ", "1": "Новый ответ"}
+
+
+class TestQuestionBank:
+    """Тесты банка вопросов позиции"""
+
+    @pytest.fixture(autouse=True)
+    def no_openai(self):
+        with patch.object(settings, 'openai_api_key', None):
+            yield
+
+    def test_interview_samples_from_bank(self, client, auth_headers, db, create_position):
+        """С построенным банком интервью создается сразу, без генерации"""
+        position = create_position(qualities=(("Python", 1), ("SQL", 0)))
+        assert asyncio.run(build_question_bank(position.id)) == 10
+
+        response = client.post("/api/v1/hr/interviews", json={"position_id": position.id}, headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['status'] == "in_progress"
+        assert len(data['questions']) == 10
+        categories = [q['category'] for q in data['questions']]
+        # Качество с нулевым весом не выбирается, недостающие вопросы — базовые
+        assert categories.count("Python") == 5
+        assert "SQL" not in categories
+
+    def test_concurrent_builds_save_one_bank(self, client, db, create_position):
+        """Параллельные сборки не дублируют банк, устаревшая сборка не перезаписывает новую"""
+        position = create_position(qualities=(("Python", 1), ("SQL", 1)))
+
+        async def build_twice():
+            return await asyncio.gather(build_question_bank(position.id), build_question_bank(position.id))
+
+        assert sorted(asyncio.run(build_twice())) == [0, 10]
+        assert db.query(PositionQuestion).filter(PositionQuestion.position_id == position.id).count() == 10
+
+        async def rename_during_build(*args, **kwargs):
+            db.query(Position).filter(Position.id == position.id).update({"title": "Renamed"})
+            db.commit()
+            return None
+
+        with patch('app.services.question_bank.request_completion', side_effect=rename_during_build):
+            assert asyncio.run(build_question_bank(position.id)) == 0
+
+    def test_position_listing_logs_nothing_at_info(self, client, auth_headers, db, create_position, caplog):
+        """Список позиций не пишет в лог по строке на каждое качество"""
+        for i in range(3):
+            create_position(title=f"Позиция {i}", qualities=[(f"Качество {i}-{j}", 1) for j in range(3)])
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        db.commit()
+
+        with caplog.at_level(logging.INFO, logger="app.api.admin"):
+            response = client.get("/api/v1/admin/positions", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        assert not [r for r in caplog.records if r.name == "app.api.admin"]
+
+    def test_admin_quality_change_rebuilds_bank(self, client, auth_headers, db, create_position):
+        """Изменение качеств позиции пересобирает банк вопросов"""
+        position = create_position(qualities=(("Python", 1),))
+        asyncio.run(build_question_bank(position.id))
+
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        quality = Quality(name="Go")
+        db.add(quality)
+        db.commit()
+
+        response = client.put(
+            f"/api/v1/admin/positions/{position.id}",
+            json={"quality_ids": [quality.id]},
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+
+        db.expire_all()
+        categories = {q.category for q in db.query(PositionQuestion).filter(PositionQuestion.position_id == position.id)}
+        assert categories == {"Go"}
+
+
+class TestInterviewScoring:
+    """Тесты очереди оценки интервью"""
+
+    def create_interview(self, db, user_id, position_id, answers):
+        questions = [{"id": i + 1, "text": f"Вопрос {i + 1}", "type": "text", "category": "test"} for i in range(10)]
+        interview = Interview(
+            user_id=user_id,
+            position_id=position_id,
+            questions=questions,
+            answers=answers,
+            max_score=100,
+            status="in_progress"
+        )
+        db.add(interview)
+        db.commit()
+        return interview
+
+    def test_complete_returns_provisional_score(self, client, auth_headers, db, create_position):
+        """Завершение сразу возвращает предварительный балл и ставит оценку в очередь"""
+        position = create_position()
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        interview = self.create_interview(db, user_id, position.id, {"0": "Подробный развернутый ответ"})
+
+        with patch('app.api.hr.scoring_queue.submit') as submit:
+            response = client.post(f"/api/v1/hr/interviews/{interview.id}/complete", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['status'] == "scoring"
+        assert data['provisional'] is True
+        assert data['score'] == 10
+        submit.assert_called_once_with(interview.id)
+
+        with patch.object(settings, 'openai_api_key', None), \
+             patch('app.services.scoring.manager.send_interview_event', new_callable=AsyncMock) as notify:
+            assert asyncio.run(score_interviews([interview.id])) == {interview.id: 10}
+
+        data = client.get(f"/api/v1/hr/interviews/{interview.id}/result", headers=auth_headers).json()
+        assert data['status'] == "completed"
+        assert data['provisional'] is False
+        assert notify.await_args.args[:2] == ("interview_scored", interview.id)
+
+    def test_batch_scored_with_single_request(self, client, db, create_user, create_position):
+        """Пачка интервью оценивается одним запросом к модели"""
+        position = create_position()
+        user = create_user()
+        first = self.create_interview(db, user.id, position.id, {"0": "Ответ"})
+        second = self.create_interview(db, user.id, position.id, {"0": "Ответ"})
+        for interview in (first, second):
+            interview.status = "scoring"
+        db.commit()
+
+        with patch('app.services.scoring.get_llm_provider', return_value=FakeLLMProvider()), \
+             patch('app.services.scoring.request_completion', new_callable=AsyncMock, return_value="1: 80\n2: 140") as completion, \
+             patch('app.services.scoring.manager.send_interview_event', new_callable=AsyncMock):
+            results = asyncio.run(score_interviews([first.id, second.id]))
+
+        completion.assert_awaited_once()
+        assert results == {first.id: 80, second.id: 100}
+
+    def test_scores_not_applied_after_status_change(self, client, db, create_user, create_position):
+        """Интервью, сменившее статус во время запроса к модели, не перезаписывается"""
+        position = create_position()
+        user = create_user()
+        first = self.create_interview(db, user.id, position.id, {"0": "Ответ"})
+        second = self.create_interview(db, user.id, position.id, {"0": "Ответ"})
+        for interview in (first, second):
+            interview.status = "scoring"
+        db.commit()
+
+        async def cancel_during_request(*args, **kwargs):
+            db.query(Interview).filter(Interview.id == second.id).update({"status": "cancelled"})
+            db.commit()
+            return "1: 80\n2: 90"
+
+        with patch('app.services.scoring.get_llm_provider', return_value=FakeLLMProvider()), \
+             patch('app.services.scoring.request_completion', side_effect=cancel_during_request), \
+             patch('app.services.scoring.manager.send_interview_event', new_callable=AsyncMock) as notify:
+            results = asyncio.run(score_interviews([first.id, second.id]))
+
+        assert results == {first.id: 80}
+        assert notify.await_count == 1
+        db.expire_all()
+        assert db.query(Interview.status).filter(Interview.id == second.id).scalar() == "cancelled"
+
+    def test_stale_interviews_claimed_once(self, client, db, create_user, create_position):
+        """Интервью в статусе scoring забирает в очередь только один процесс"""
+        position = create_position()
+        user = create_user()
+        unclaimed = self.create_interview(db, user.id, position.id, {"0": "Ответ"})
+        expired = self.create_interview(db, user.id, position.id, {"0": "Ответ"})
+        active = self.create_interview(db, user.id, position.id, {"0": "Ответ"})
+        now = datetime.now(timezone.utc)
+        unclaimed.status = expired.status = active.status = "scoring"
+        expired.scoring_claimed_at = now - timedelta(minutes=10)
+        active.scoring_claimed_at = now
+        db.commit()
+
+        assert sorted(claim_stale_interviews(60)) == [unclaimed.id, expired.id]
+        assert claim_stale_interviews(60) == []
+
+    def test_stop_drains_queue(self):
+        """Остановка дожидается оценки уже поставленных интервью"""
+        async def run():
+            queue = ScoringQueue(workers=1, concurrency=1, batch_size=5, batch_wait=0.01, drain_timeout=1)
+            with patch('app.services.scoring.claim_stale_interviews', return_value=[]), \
+                 patch('app.services.scoring.score_interviews', new_callable=AsyncMock) as score:
+                queue.start()
+                queue.submit(1)
+                await queue.stop()
+            return score.await_args.args[0]
+
+        assert asyncio.run(run()) == [1]
+
+    def test_queue_collects_batches(self):
+        """Воркер забирает из очереди не больше batch_size интервью за раз"""
+        async def collect():
+            queue = ScoringQueue(workers=1, concurrency=1, batch_size=3, batch_wait=0.01)
+            queue.queue = asyncio.Queue()
+            for interview_id in range(1, 6):
+                queue.queue.put_nowait(interview_id)
+            return [await queue.next_batch(), await queue.next_batch()]
+
+        assert asyncio.run(collect()) == [[1, 2, 3], [4, 5]]
+
+
+class TestLLMProvider:
+    """Тесты подключаемого LLM провайдера"""
+
+    @pytest.fixture
+    def fake_provider(self):
+        provider = FakeLLMProvider()
+        set_llm_provider(provider)
+        with patch.object(settings, 'llm_cache_enabled', False):
+            yield provider
+        set_llm_provider(None)
+
+    def test_fake_provider_is_deterministic(self, fake_provider):
+        first = asyncio.run(generate_questions_for_position("Backend Developer", ["Python"]))
+        second = asyncio.run(generate_questions_for_position("Backend Developer", ["Python"]))
+
+        assert first == second
+        assert len(first) == 10
+        assert all(q['category'] == "ai_generated" for q in first)
+        assert fake_provider.calls == 2
+
+    def test_provider_without_complete_rejected(self):
+        """Провайдер без complete не создается"""
+        class IncompleteProvider(LLMProvider):
+            name = "incomplete"
+
+        with pytest.raises(TypeError):
+            IncompleteProvider()
+
+    def test_fake_provider_scores_candidates(self, fake_provider):
+        text = asyncio.run(fake_provider.complete("", "Кандидат 1:\nОтвет\n\nКандидат 2:\nОтвет", 40, 0.3))
+        assert [line.split(":")[0] for line in text.splitlines()] == ["1", "2"]
+
+    def test_request_timeout(self, fake_provider):
+        """Медленный ответ обрывается по LLM_TIMEOUT"""
+        fake_provider.latency = 0.2
+        with patch.object(settings, 'llm_timeout', 0.05):
+            assert asyncio.run(request_completion("", "prompt", 10, 0.0)) is None
+
+
+class TestLLMCache:
+    """Тесты кэша ответов LLM"""
+
+    @pytest.fixture
+    def fake_provider(self, client):
+        # client подменяет SessionLocal тестовой базой, где хранится кэш
+        provider = FakeLLMProvider()
+        set_llm_provider(provider)
+        yield provider
+        set_llm_provider(None)
+
+    def test_repeated_prompt_served_from_cache(self, fake_provider):
+        hits = cache_counters["hits"]
+
+        first = asyncio.run(request_completion("system", "Вопросы   для\n  позиции", 100, 0.3))
+        second = asyncio.run(request_completion("system", "Вопросы для позиции", 100, 0.3))
+
+        assert first == second
+        assert fake_provider.calls == 1
+        assert cache_counters["hits"] == hits + 1
+
+    def test_high_temperature_bypasses_cache(self, fake_provider):
+        bypassed = cache_counters["bypassed"]
+
+        asyncio.run(request_completion("system", "prompt", 100, 1.2))
+        asyncio.run(request_completion("system", "prompt", 100, 1.2))
+
+        assert fake_provider.calls == 2
+        assert cache_counters["bypassed"] == bypassed + 2
+
+    def test_eviction_by_ttl_and_size(self, fake_provider, db):
+        for key in ("a", "b", "c"):
+            store_response(key, f"response {key}")
+        db.query(LLMCacheEntry).filter(LLMCacheEntry.key == "a").update({"expires_at": datetime(2000, 1, 1)})
+        db.query(LLMCacheEntry).filter(LLMCacheEntry.key == "b").update({"last_used_at": datetime(2000, 1, 1)})
+        db.commit()
+
+        assert evict_entries(db, max_entries=1) == 2
+        assert [entry.key for entry in db.query(LLMCacheEntry)] == ["c"]
+
+    def test_admin_cache_stats(self, client, auth_headers, db, fake_provider):
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        db.commit()
+        store_response("key", "response")
+
+        response = client.get("/api/v1/admin/llm-cache/stats", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data['entries'] == 1
+        assert {"hits", "misses", "bypassed", "evictions", "hit_rate"} <= set(data)
+
+
+class TestAdminListings:
+    """Тесты для списков и выгрузок администратора"""
+
+    @pytest.fixture
+    def admin_headers(self, client, auth_headers, db):
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        db.commit()
+        return auth_headers
+
+    @pytest.fixture
+    def interviews(self, db, create_user, create_position):
+        position = create_position()
+        user = create_user()
+        created = []
+        for i in range(5):
+            interview = Interview(
+                user_id=user.id,
+                position_id=position.id,
+                questions=[],
+                answers={"0": "Ответ"},
+                status="completed" if i % 2 == 0 else "in_progress"
+            )
+            db.add(interview)
+            created.append(interview)
+        db.commit()
+        return created
+
+    def test_interviews_cursor_pagination(self, client, admin_headers, interviews):
+        """Курсорная пагинация проходит все интервью без повторов"""
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            page = client.get("/api/v1/admin/interviews", params=params, headers=admin_headers).json()
+            seen.extend(item['id'] for item in page['interviews'])
+            assert all('answers' not in item for item in page['interviews'])
+            if not page['has_more']:
+                assert page['next_cursor'] is None
+                break
+            cursor = page['next_cursor']
+
+        assert seen == sorted((interview.id for interview in interviews), reverse=True)
+
+    def test_interviews_status_filter(self, client, admin_headers, interviews):
+        """Фильтр по статусу"""
+        page = client.get(
+            "/api/v1/admin/interviews", params={"status": "completed"}, headers=admin_headers
+        ).json()
+        assert len(page['interviews']) == 3
+        assert {item['status'] for item in page['interviews']} == {"completed"}
+
+    def test_invalid_cursor(self, client, admin_headers):
+        response = client.get("/api/v1/admin/users", params={"cursor": "abc"}, headers=admin_headers)
+        assert response.status_code == 400
+
+    def test_export_interviews_ndjson(self, client, admin_headers, interviews):
+        """Выгрузка интервью в NDJSON — по строке на интервью"""
+        response = client.get("/api/v1/admin/interviews/export", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line['id'] for line in lines] == [interview.id for interview in interviews]
+        assert 'answers' not in lines[0]
+
+    def test_export_users_csv(self, client, admin_headers, create_user):
+        """Выгрузка пользователей в CSV с заголовком"""
+        create_user()
+        create_user(is_admin=True)
+        response = client.get(
+            "/api/v1/admin/users/export", params={"format": "csv", "is_admin": True}, headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith("text/csv")
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0][0] == "id"
+        assert len(rows) == 3
+
+
+class TestPositionAnalytics:
+    """Тесты агрегатов аналитики по позициям"""
+
+    def test_rollup_skips_interviews_completed_concurrently(self, client, db, create_user, create_position):
+        """Интервью, завершенное другим воркером во время запроса к модели, не учитывается повторно"""
+        position = create_position()
+        user = create_user()
+        interview = Interview(
+            user_id=user.id,
+            position_id=position.id,
+            questions=[{"id": 1, "text": "Вопрос", "type": "text", "category": "test"}],
+            answers={"0": "Ответ"},
+            status="scoring"
+        )
+        db.add(interview)
+        db.commit()
+
+        async def complete_concurrently(*args, **kwargs):
+            db.query(Interview).filter(Interview.id == interview.id).update({"status": "completed", "score": 40})
+            db.commit()
+            return "1: 85"
+
+        with patch('app.services.scoring.get_llm_provider', return_value=FakeLLMProvider()), \
+             patch('app.services.scoring.request_completion', side_effect=complete_concurrently), \
+             patch('app.services.scoring.manager.send_interview_event', new_callable=AsyncMock) as notify:
+            assert asyncio.run(score_interviews([interview.id])) == {}
+
+        notify.assert_not_awaited()
+        db.expire_all()
+        assert db.query(Interview.score).filter(Interview.id == interview.id).scalar() == 40
+        assert db.query(PositionInterviewStats).count() == 0
+
+    def test_rollup_updated_on_scoring_and_rebuild(self, client, auth_headers, db, create_user, create_position):
+        """Агрегаты обновляются при оценке и совпадают с полным пересчетом"""
+        position = create_position()
+        user = create_user()
+        interviews = []
+        for _ in range(2):
+            interview = Interview(
+                user_id=user.id,
+                position_id=position.id,
+                questions=[{"id": 1, "text": "Вопрос", "type": "text", "category": "test"}],
+                answers={"0": "Ответ"},
+                status="scoring",
+                started_at=datetime(2025, 8, 1, 10, 0),
+                completed_at=datetime(2025, 8, 1, 10, 20)
+            )
+            db.add(interview)
+            interviews.append(interview)
+        db.commit()
+        ids = [interview.id for interview in interviews]
+
+        with patch('app.services.scoring.get_llm_provider', return_value=FakeLLMProvider()), \
+             patch('app.services.scoring.request_completion', new_callable=AsyncMock, return_value="1: 85\n2: 30"), \
+             patch('app.services.scoring.manager.send_interview_event', new_callable=AsyncMock):
+            asyncio.run(score_interviews(ids))
+            # Повторная оценка уже завершенных интервью не учитывается дважды
+            asyncio.run(score_interviews(ids))
+
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        db.commit()
+
+        response = client.get("/api/v1/admin/analytics/positions", headers=auth_headers)
+        assert response.status_code == 200
+        [stats] = response.json()
+        assert stats['position_id'] == position.id
+        assert stats['completed'] == 2
+        assert stats['passed'] == 1
+        assert stats['pass_rate'] == 0.5
+        assert stats['average_percentage'] == 57.5
+        assert stats['histogram'][8] == 1 and stats['histogram'][3] == 1
+        assert stats['average_completion_seconds'] == 1200
+
+        assert rebuild_position_stats(db) == 2
+        assert client.get("/api/v1/admin/analytics/positions", headers=auth_headers).json() == [stats]
+
+
+class TestPositionQualities:
+    """Тесты назначения качеств позиции"""
+
+    @pytest.fixture
+    def admin_headers(self, client, auth_headers, db):
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        db.commit()
+        return auth_headers
+
+    @pytest.fixture
+    def qualities(self, db):
+        created = [Quality(name=name) for name in ("Python", "SQL", "Go")]
+        db.add_all(created)
+        db.commit()
+        return [quality.id for quality in created]
+
+    def links(self, db, position_id):
+        db.expire_all()
+        return {
+            pq.quality_id: pq.weight
+            for pq in db.query(PositionQuality).filter(PositionQuality.position_id == position_id)
+        }
+
+    def test_create_skips_duplicates_and_unknown(self, client, admin_headers, db, qualities):
+        """Повторные и несуществующие id качеств не создают связей"""
+        python, sql, _ = qualities
+        response = client.post(
+            "/api/v1/admin/positions",
+            json={"title": "Аналитик", "quality_ids": [python, python, sql, 999]},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert self.links(db, response.json()['id']) == {python: 1, sql: 1}
+
+    def test_update_applies_diff(self, client, admin_headers, db, qualities):
+        """Обновление меняет только разницу и сохраняет веса оставшихся качеств"""
+        python, sql, go = qualities
+        position_id = client.post(
+            "/api/v1/admin/positions",
+            json={"title": "Аналитик", "quality_ids": [python, sql]},
+            headers=admin_headers
+        ).json()['id']
+        db.query(PositionQuality).filter(PositionQuality.quality_id == sql).update({"weight": 3})
+        db.commit()
+
+        response = client.put(
+            f"/api/v1/admin/positions/{position_id}",
+            json={"quality_ids": [sql, go]},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert self.links(db, position_id) == {sql: 3, go: 1}
+
+    def test_duplicate_link_rejected_by_constraint(self, client, admin_headers, db, qualities):
+        python = qualities[0]
+        position_id = client.post(
+            "/api/v1/admin/positions",
+            json={"title": "Аналитик", "quality_ids": [python]},
+            headers=admin_headers
+        ).json()['id']
+
+        response = client.post(f"/api/v1/admin/positions/{position_id}/qualities/{python}", headers=admin_headers)
+        assert response.status_code == 400
+        assert self.links(db, position_id) == {python: 1}
+
+
+class TestPublicPositions:
+    """Тесты кэшированного публичного списка позиций"""
+
+    @pytest.fixture(autouse=True)
+    def reset_cache(self):
+        invalidate_public_positions()
+        yield
+        invalidate_public_positions()
+
+    def test_etag_and_not_modified(self, client, db, create_position):
+        """Повторный запрос с If-None-Match получает 304 без обращения к БД"""
+        create_position(title="Backend Developer")
+
+        response = client.get("/api/v1/hr/positions/public")
+        assert response.status_code == 200
+        assert [item['title'] for item in response.json()] == ["Backend Developer"]
+        etag = response.headers['etag']
+        assert etag.startswith('"') and not etag.startswith('W/')
+
+        with patch('app.services.public_positions.Position') as position_model:
+            cached = client.get("/api/v1/hr/positions/public", headers={"If-None-Match": etag})
+        position_model.assert_not_called()
+        assert cached.status_code == 304
+        assert cached.headers['etag'] == etag
+
+    def test_admin_change_invalidates_cache(self, client, auth_headers, db, create_position):
+        """Изменение позиции в админке сбрасывает кэш и меняет ETag"""
+        position = create_position(title="Backend Developer")
+        etag = client.get("/api/v1/hr/positions/public").headers['etag']
+
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        db.commit()
+        client.put(f"/api/v1/admin/positions/{position.id}", json={"is_active": False}, headers=auth_headers)
+
+        response = client.get("/api/v1/hr/positions/public", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json() == []
+        assert response.headers['etag'] != etag
+
+    def test_etag_matches_compressed_variant(self):
+        assert etag_matches('"abc-gzip"', '"abc"')
+        assert etag_matches('W/"x", "abc"', '"abc"')
+        assert etag_matches('*', '"abc"')
+        assert not etag_matches('"abd"', '"abc"')
+        assert not etag_matches(None, '"abc"')
@@ -1,5 +1,6 @@
 import pytest
 import io
+from datetime import datetime, timezone
 from sqlalchemy import and_
 
 from app.models.chat import chat_members
@@ -118,6 +119,21 @@ class TestMessageAPI:
         assert data['reply_to_message_id'] == original_message.id
         assert data['text'] == 'Reply to original'
     
+    def test_send_reply_to_unknown_message(self, client, auth_headers, db, create_chat):
+        """Тест ответа на несуществующее сообщение"""
+        chat, user_id = self.setup_chat_with_user(client, auth_headers, db, create_chat)
+        
+        message_data = {
+            "chat_id": chat.id,
+            "text": "Reply",
+            "message_type": "text",
+            "reply_to_message_id": 99999
+        }
+        
+        response = client.post("/api/v1/messages/", json=message_data, headers=auth_headers)
+        
+        assert response.status_code == 400
+    
     def test_get_chat_messages_with_data(self, client, auth_headers, db, create_chat, create_message):
         """Тест получения сообщений с данными"""
         chat, user_id = self.setup_chat_with_user(client, auth_headers, db, create_chat)
@@ -145,6 +161,22 @@ class TestMessageAPI:
         assert "Second message" in messages_texts
         assert "Third message" in messages_texts
     
+    def test_get_chat_messages_sender(self, client, auth_headers, db, create_chat, create_message):
+        """Тест данных отправителя в списке сообщений"""
+        chat, user_id = self.setup_chat_with_user(client, auth_headers, db, create_chat)
+        
+        create_message(chat.id, user_id, text="Hello")
+        
+        response = client.get(f"/api/v1/messages/chat/{chat.id}", headers=auth_headers)
+        
+        assert response.status_code == 200
+        message = response.json()['messages'][0]
+        
+        assert message['sender']['id'] == user_id
+        assert message['sender']['username'] == 'testuser'
+        assert message['sender_id'] == user_id
+        assert message['read_by'] == []
+    
     def test_get_chat_messages_pagination(self, client, auth_headers, db, create_chat, create_message):
         """Тест пагинации сообщений"""
         chat, user_id = self.setup_chat_with_user(client, auth_headers, db, create_chat)
@@ -166,6 +198,24 @@ class TestMessageAPI:
         assert data['has_next'] is True
         assert data['has_prev'] is False
     
+    def test_get_chat_messages_before(self, client, auth_headers, db, create_chat, create_message):
+        """Тест курсора before по времени создания"""
+        chat, user_id = self.setup_chat_with_user(client, auth_headers, db, create_chat)
+        
+        create_message(chat.id, user_id, text="Old", created_at=datetime(2024, 1, 15, tzinfo=timezone.utc))
+        create_message(chat.id, user_id, text="New", created_at=datetime(2024, 3, 15, tzinfo=timezone.utc))
+        
+        response = client.get(
+            f"/api/v1/messages/chat/{chat.id}",
+            params={"before": "2024-02-01T00:00:00+00:00"},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data['total'] == 1
+        assert [msg['text'] for msg in data['messages']] == ["Old"]
+    
     def test_edit_message(self, client, auth_headers, db, create_chat, create_message):
         """Тест редактирования сообщения"""
         chat, user_id = self.setup_chat_with_user(client, auth_headers, db, create_chat)
@@ -0,0 +1,217 @@
+import json
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.logging_config import apply_log_levels, parse_log_levels
+from app.middleware import AccessLogMiddleware, CompressionMiddleware, parse_accept_encoding
+
+
+def make_app(sample_rate=1.0, debug=False):
+    app = FastAPI()
+    app.add_middleware(
+        AccessLogMiddleware,
+        allowed_origins=["https://aeon-messenger.vercel.app"],
+        sample_rate=sample_rate,
+        debug=debug
+    )
+
+    @app.get("/ok")
+    async def ok():
+        return {"status": "ok"}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return app
+
+
+class TestAccessLogMiddleware:
+    """Тесты для единого CORS/access log middleware"""
+
+    def test_cors_headers_for_allowed_origin(self):
+        """Разрешенный Origin возвращается в заголовке"""
+        client = TestClient(make_app())
+        response = client.get("/ok", headers={"Origin": "https://aeon-messenger.vercel.app"})
+
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == "https://aeon-messenger.vercel.app"
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert response.headers["access-control-max-age"] == "86400"
+
+    def test_cors_headers_for_unknown_origin(self):
+        """Неизвестный Origin получает wildcard"""
+        client = TestClient(make_app())
+        response = client.get("/ok", headers={"Origin": "https://evil.example"})
+
+        assert response.headers["access-control-allow-origin"] == "*"
+
+    def test_preflight_request(self):
+        """OPTIONS запрос обрабатывается без вызова приложения"""
+        client = TestClient(make_app())
+        response = client.options("/anything", headers={"Origin": "https://aeon-messenger.vercel.app"})
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+        assert "x-telegram-init-data" in response.headers["access-control-allow-headers"]
+
+    def test_unhandled_error_returns_json_with_cors(self):
+        """Необработанная ошибка превращается в JSON 500 с CORS заголовками"""
+        client = TestClient(make_app(), raise_server_exceptions=False)
+        response = client.get("/boom", headers={"Origin": "https://aeon-messenger.vercel.app"})
+
+        assert response.status_code == 500
+        assert response.json()["error"] == "Internal Server Error"
+        assert response.headers["access-control-allow-origin"] == "https://aeon-messenger.vercel.app"
+
+    def test_access_log_sampling(self, caplog):
+        """При нулевом sample rate успешные запросы не логируются, ошибки — логируются"""
+        client = TestClient(make_app(sample_rate=0.0), raise_server_exceptions=False)
+
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            client.get("/ok")
+            client.get("/boom")
+
+        records = [r for r in caplog.records if r.name == "app.access"]
+        assert len(records) == 1
+        assert records[0].http_path == "/boom"
+        assert records[0].http_status == 500
+
+
+def make_compression_app(minimum_size=100):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size, compression_level=6)
+
+    @app.get("/big")
+    async def big():
+        return {"items": ["x" * 50] * 100}
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def rows():
+            for i in range(100):
+                yield (json.dumps({"id": i, "text": "y" * 40}) + "\n").encode()
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    @app.get("/tagged")
+    async def tagged():
+        return Response(json.dumps({"items": ["x" * 50] * 100}), media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/media/file.bin")
+    async def media():
+        return Response(b"\x00" * 5000, media_type="application/octet-stream")
+
+    @app.get("/api/file.bin")
+    async def binary():
+        return Response(b"\x00" * 5000, media_type="application/octet-stream")
+
+    return app
+
+
+class TestCompressionMiddleware:
+    """Тесты для сжатия ответов"""
+
+    def test_gzip_large_response(self):
+        """Большой JSON сжимается gzip"""
+        client = TestClient(make_compression_app())
+        response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < 5000
+        assert response.json()["items"][0] == "x" * 50
+
+    def test_etag_gets_encoding_suffix(self):
+        """Сильный ETag сжатого ответа отличается от ETag несжатого"""
+        client = TestClient(make_compression_app())
+
+        assert client.get("/tagged", headers={"Accept-Encoding": "gzip"}).headers["etag"] == '"abc-gzip"'
+        assert client.get("/tagged", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"abc"'
+
+    def test_small_response_not_compressed(self):
+        """Ответ меньше порога отдается без сжатия"""
+        client = TestClient(make_compression_app())
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"status": "ok"}
+
+    def test_no_accept_encoding(self):
+        """Без Accept-Encoding ответ не сжимается"""
+        client = TestClient(make_compression_app())
+        response = client.get("/big", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_streaming_response_compressed(self):
+        """Потоковый ответ сжимается по чанкам"""
+        client = TestClient(make_compression_app())
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        lines = response.text.strip().split("\n")
+        assert len(lines) == 100
+        assert json.loads(lines[-1])["id"] == 99
+
+    def test_binary_and_media_not_compressed(self):
+        """Бинарные ответы и /media не сжимаются"""
+        client = TestClient(make_compression_app())
+
+        for path in ("/media/file.bin", "/api/file.bin"):
+            response = client.get(path, headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in response.headers
+            assert len(response.content) == 5000
+
+    def test_brotli_preferred(self):
+        """Brotli выбирается, если клиент его поддерживает"""
+        pytest.importorskip("brotli")
+        client = TestClient(make_compression_app())
+        response = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+
+        assert response.headers["content-encoding"] == "br"
+
+
+    def test_q_values_honored(self):
+        """q=0 запрещает алгоритм, identity с большим q отключает сжатие"""
+        client = TestClient(make_compression_app())
+
+        assert client.get("/big", headers={"Accept-Encoding": "br;q=0, gzip"}).headers["content-encoding"] == "gzip"
+        assert client.get("/big", headers={"Accept-Encoding": "gzip;q=0"}).headers.get("content-encoding") is None
+        assert client.get("/big", headers={"Accept-Encoding": "*;q=0, identity"}).headers.get("content-encoding") is None
+        assert client.get("/big", headers={"Accept-Encoding": "gzip;q=0.5, identity;q=0.9"}).headers.get("content-encoding") is None
+        assert client.get("/big", headers={"Accept-Encoding": "br;q=0.5, gzip;q=0.8"}).headers["content-encoding"] == "gzip"
+
+    def test_parse_accept_encoding(self):
+        assert parse_accept_encoding("gzip;q=0.8, BR , identity; q=0, x;q=abc") == {"gzip": 0.8, "br": 1.0, "identity": 0.0}
+
+    def test_vary_on_uncompressed_responses(self):
+        """Несжатые JSON ответы тоже получают Vary: Accept-Encoding, бинарные — нет"""
+        client = TestClient(make_compression_app())
+
+        assert client.get("/big", headers={"Accept-Encoding": "identity"}).headers["vary"] == "Accept-Encoding"
+        assert client.get("/small", headers={"Accept-Encoding": "gzip"}).headers["vary"] == "Accept-Encoding"
+        assert "vary" not in client.get("/api/file.bin", headers={"Accept-Encoding": "gzip"}).headers
+
+class TestLogLevels:
+    """Тесты переопределения уровней логгеров"""
+
+    def test_parse_log_levels(self):
+        assert parse_log_levels("app.api.admin=debug, app.api.hr=WARNING,bad,x=NOPE") == {
+            "app.api.admin": logging.DEBUG,
+            "app.api.hr": logging.WARNING
+        }
+
+    def test_apply_log_levels(self):
+        logger = logging.getLogger("app.tests.override")
+        apply_log_levels("app.tests.override=ERROR")
+        try:
+            assert logger.getEffectiveLevel() == logging.ERROR
+        finally:
+            logger.setLevel(logging.NOTSET)
@@ -0,0 +1,42 @@
+from datetime import date
+
+from app.services.partitions import (
+    add_months,
+    archive_old_partitions,
+    create_partition_sql,
+    default_partition_rows_sql,
+    ensure_message_partitions,
+    parse_partition_month,
+    partition_bounds,
+    partition_name,
+)
+
+
+class TestMessagePartitions:
+    """Тесты обслуживания партиций messages"""
+
+    def test_month_arithmetic(self):
+        assert add_months(date(2024, 11, 1), 2) == date(2025, 1, 1)
+        assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+        assert partition_bounds(date(2024, 12, 17)) == (date(2024, 12, 1), date(2025, 1, 1))
+
+    def test_partition_names(self):
+        assert partition_name(date(2024, 3, 1)) == "messages_p202403"
+        assert parse_partition_month("messages_p202403") == date(2024, 3, 1)
+        assert parse_partition_month("messages_default") is None
+
+    def test_create_partition_sql(self):
+        sql = create_partition_sql(date(2024, 3, 9))
+        assert "messages_p202403 PARTITION OF messages" in sql
+        assert "FROM ('2024-03-01') TO ('2024-04-01')" in sql
+
+    def test_default_partition_rows_sql(self):
+        sql = default_partition_rows_sql(date(2024, 3, 9), "DELETE")
+        assert sql.startswith("DELETE FROM messages_default")
+        assert "created_at >= '2024-03-01' AND created_at < '2024-04-01'" in sql
+
+    def test_noop_without_partitioning(self, db, tmp_path):
+        """На SQLite таблица не секционирована — обслуживание ничего не делает"""
+        assert ensure_message_partitions(db) == []
+        assert archive_old_partitions(db, retain_months=0, archive_dir=str(tmp_path)) == []
+        assert list(tmp_path.iterdir()) == []
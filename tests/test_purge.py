@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.message import Message
+from app.services.purge import purge_deleted_messages
+
+
+class TestMessagePurge:
+    """Тесты фоновой очистки удаленных сообщений"""
+
+    old = datetime.now(timezone.utc) - timedelta(days=90)
+
+    def test_purge_old_deleted_messages(self, db, create_user, create_chat, create_message, tmp_path):
+        user = create_user()
+        chat = create_chat(creator_id=user.id)
+
+        media_file = tmp_path / "photo.jpg"
+        media_file.write_bytes(b"x" * 100)
+
+        purged = create_message(
+            chat.id, user.id, is_deleted=True, updated_at=self.old, media_url="/media/photo.jpg"
+        )
+        recent = create_message(chat.id, user.id, is_deleted=True)
+        live = create_message(chat.id, user.id, created_at=self.old)
+        purged_id, recent_id, live_id = purged.id, recent.id, live.id
+
+        report = purge_deleted_messages(
+            db, retention_days=30, batch_size=10, batch_pause=0, upload_dir=str(tmp_path)
+        )
+
+        remaining = {row.id for row in db.query(Message.id)}
+        assert purged_id not in remaining
+        assert {recent_id, live_id} <= remaining
+        assert report["messages_deleted"] == 1
+        assert report["files_deleted"] == 1
+        assert report["file_bytes"] == 100
+        assert not media_file.exists()
+
+    def test_purge_keeps_shared_media_and_replied_messages(self, db, create_user, create_chat, create_message, tmp_path):
+        user = create_user()
+        chat = create_chat(creator_id=user.id)
+
+        media_file = tmp_path / "video.mp4"
+        media_file.write_bytes(b"x" * 10)
+
+        original = create_message(
+            chat.id, user.id, is_deleted=True, updated_at=self.old, media_url="/media/video.mp4"
+        )
+        create_message(chat.id, user.id, reply_to_message_id=original.id)
+        create_message(chat.id, user.id, media_url="/media/video.mp4")
+
+        report = purge_deleted_messages(
+            db, retention_days=30, batch_size=10, batch_pause=0, upload_dir=str(tmp_path)
+        )
+
+        db.expire_all()
+        compacted = db.query(Message).filter(Message.id == original.id).one()
+        assert compacted.media_url is None
+        assert report["messages_compacted"] == 1
+        assert report["messages_deleted"] == 0
+        # Файл остается: на него ссылается пересланное сообщение
+        assert report["files_deleted"] == 0
+        assert media_file.exists()
+
+    def test_purge_compacts_replied_text_message(self, db, create_user, create_chat, create_message, tmp_path):
+        """Текст сообщения без медиа, на которое отвечают, тоже очищается, и только один раз"""
+        user = create_user()
+        chat = create_chat(creator_id=user.id)
+        original = create_message(chat.id, user.id, text="Секрет", is_deleted=True, updated_at=self.old)
+        create_message(chat.id, user.id, reply_to_message_id=original.id)
+
+        report = purge_deleted_messages(
+            db, retention_days=30, batch_size=10, batch_pause=0, upload_dir=str(tmp_path)
+        )
+        db.expire_all()
+        assert db.query(Message.text).filter(Message.id == original.id).scalar() is None
+        assert report["messages_compacted"] == 1
+
+        report = purge_deleted_messages(
+            db, retention_days=30, batch_size=10, batch_pause=0, upload_dir=str(tmp_path)
+        )
+        assert report["messages_compacted"] == 0
+
+    def test_purge_inactive_chat_in_batches(self, db, create_user, create_chat, create_message, tmp_path):
+        user = create_user()
+        chat = create_chat(creator_id=user.id, is_active=False, updated_at=self.old)
+        for i in range(5):
+            create_message(chat.id, user.id, text=f"Message {i}")
+
+        report = purge_deleted_messages(
+            db, retention_days=30, batch_size=2, batch_pause=0, upload_dir=str(tmp_path)
+        )
+
+        assert db.query(Message).filter(Message.chat_id == chat.id).count() == 0
+        assert report["messages_deleted"] == 5
+        assert report["batches"] == 3
@@ -0,0 +1,11 @@
+import pytest
+
+from check_query_plans import check_query_plans
+
+
+class TestQueryPlans:
+    """Тесты использования индексов в горячих запросах"""
+    
+    def test_hot_queries_use_indexes(self, db):
+        """Все горячие запросы используют ожидаемые индексы"""
+        assert check_query_plans(db) == []
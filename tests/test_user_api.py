@@ -0,0 +1,124 @@
+import pytest
+
+from app.models.user import User
+
+
+class TestUserSearch:
+    """Тесты поиска пользователей по префиксу"""
+
+    def test_search_by_username_and_first_name(self, client, auth_headers, create_user):
+        """Поиск без учета регистра по username и имени"""
+        create_user(username='AnnaDev', first_name='Anna')
+        create_user(username='boris', first_name='Annet')
+        create_user(username='clara', first_name='Clara')
+
+        response = client.get("/api/v1/users/search", params={"prefix": "ann"}, headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [user['username'] for user in data['users']] == ['AnnaDev', 'boris']
+        assert data['has_more'] is False
+        assert 'subordinates' not in data['users'][0]
+
+    def test_search_keyset_pagination(self, client, auth_headers, create_user):
+        """Курсорная пагинация и ограничение размера страницы"""
+        for i in range(5):
+            create_user(username=f'dev{i}')
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"prefix": "DEV", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            page = client.get("/api/v1/users/search", params=params, headers=auth_headers).json()
+            seen.extend(user['username'] for user in page['users'])
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+
+        assert seen == [f'dev{i}' for i in range(5)]
+
+        response = client.get("/api/v1/users/search", params={"prefix": "dev", "limit": 500}, headers=auth_headers)
+        assert response.status_code == 422
+
+    def test_like_wildcards_escaped(self, client, auth_headers, create_user):
+        create_user(username='a_b')
+        create_user(username='axb')
+
+        data = client.get("/api/v1/users/search", params={"prefix": "a_"}, headers=auth_headers).json()
+        assert [user['username'] for user in data['users']] == ['a_b']
+
+    def test_search_skips_inactive(self, client, auth_headers, create_user):
+        create_user(username='ghost', is_active=False)
+
+        data = client.get("/api/v1/users/search", params={"prefix": "gh"}, headers=auth_headers).json()
+        assert data['users'] == []
+
+
+class TestSubordinatesAPI:
+    """Тесты API подчиненных"""
+
+    @pytest.fixture
+    def admin_id(self, client, auth_headers, db):
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.query(User).filter(User.id == user_id).update({"is_admin": True})
+        db.commit()
+        return user_id
+
+    def test_reports_and_cycle_rejected(self, client, auth_headers, db, admin_id, create_user):
+        """Подчиненные любого уровня и запрет циклов"""
+        lead = create_user(username='lead')
+        response = client.post("/api/v1/users/subordinates", json={"subordinate_id": lead.id}, headers=auth_headers)
+        assert response.status_code == 200
+
+        response = client.post("/api/v1/users/subordinates", json={"subordinate_id": lead.id}, headers=auth_headers)
+        assert response.status_code == 400
+
+        response = client.post("/api/v1/users/subordinates", json={"subordinate_id": admin_id}, headers=auth_headers)
+        assert response.status_code == 400
+
+        reports = client.get(f"/api/v1/users/{admin_id}/reports", headers=auth_headers).json()
+        assert [(item['user']['username'], item['depth']) for item in reports] == [('lead', 1)]
+
+        tree = client.get(f"/api/v1/users/{admin_id}/org-tree", headers=auth_headers).json()
+        assert tree == [{"user": reports[0]['user'], "subordinates": []}]
+
+        response = client.delete(f"/api/v1/users/subordinates/{lead.id}", headers=auth_headers)
+        assert response.status_code == 200
+        assert client.get(f"/api/v1/users/{admin_id}/reports", headers=auth_headers).json() == []
+
+
+class TestProfileUpdate:
+    """Тесты обновления собственного профиля"""
+
+    @pytest.fixture(autouse=True)
+    def existing_admin(self, create_user):
+        # Первый вошедший пользователь становится администратором автоматически
+        return create_user(is_admin=True)
+
+    def test_profile_update(self, client, auth_headers):
+        response = client.put("/api/v1/users/me", json={"bio": "О себе"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()['bio'] == "О себе"
+
+    def test_self_promotion_rejected(self, client, auth_headers, db):
+        """Пользователь не может сделать себя администратором"""
+        response = client.put("/api/v1/users/me", json={"is_admin": True}, headers=auth_headers)
+        assert response.status_code == 422
+
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        db.expire_all()
+        assert db.query(User).filter(User.id == user_id).first().is_admin is False
+        assert client.get("/api/v1/admin/users", headers=auth_headers).status_code == 403
+
+    def test_subordinate_endpoints_require_admin(self, client, auth_headers, create_user):
+        other = create_user()
+        assert client.post(
+            "/api/v1/users/subordinates", json={"subordinate_id": other.id}, headers=auth_headers
+        ).status_code == 403
+        assert client.get(f"/api/v1/users/{other.id}/reports", headers=auth_headers).status_code == 403
+
+    def test_user_list_hides_hierarchy(self, client, auth_headers):
+        data = client.get("/api/v1/users/", headers=auth_headers).json()
+        assert data['total'] == 2
+        assert all('subordinates' not in user and 'managers' not in user for user in data['users'])
@@ -4,6 +4,8 @@ import asyncio
 from unittest.mock import AsyncMock, patch
 
 from app.websocket.manager import ConnectionManager, manager
+from app.websocket.encoding import encode_frame, normalize_encoding
+from app.websocket.presence import PresenceRegistry, TimerWheel, presence
 from app.models.user import User
 
 
@@ -130,6 +132,23 @@ class TestConnectionManager:
         # Проверяем, что чат удален у пользователя
         assert sample_user.id not in connection_manager.user_chats
     
+    def test_bulk_chat_membership(self, connection_manager, mock_websocket):
+        """Тест массового добавления и удаления участников чата"""
+        chat_id = 123
+        connection_manager.active_connections[1] = [mock_websocket]
+        connection_manager.active_connections[2] = [mock_websocket]
+        
+        # Пользователь 3 не подключен и не попадает в чат
+        connection_manager.add_chat_members(chat_id, [1, 2, 3])
+        
+        assert connection_manager.chat_users[chat_id] == {1, 2}
+        assert 3 not in connection_manager.user_chats
+        
+        connection_manager.remove_chat_members(chat_id, [1, 2])
+        
+        assert chat_id not in connection_manager.chat_users
+        assert 1 not in connection_manager.user_chats
+    
     @pytest.mark.asyncio
     async def test_send_to_chat(self, connection_manager, mock_websocket, sample_user, create_user, db):
         """Тест отправки сообщения в чат"""
@@ -309,6 +328,78 @@ class TestConnectionManager:
         assert sent_data['is_online'] is True
 
 
+class TestFrameEncoding:
+    """Тесты для компактных кодировок WebSocket кадров"""
+    
+    @pytest.fixture
+    def event(self):
+        return {
+            "type": "new_message",
+            "chat_id": 123,
+            "message": {
+                "id": 1,
+                "chat_id": 123,
+                "sender_id": 7,
+                "text": "Привет",
+                "message_type": "text",
+                "media_url": None,
+                "is_edited": False,
+                "read_by": [],
+                "created_at": "2025-01-01T00:00:00"
+            }
+        }
+    
+    def test_normalize_encoding(self):
+        """Тест выбора кодировки по параметру подключения"""
+        assert normalize_encoding(None) == "json"
+        assert normalize_encoding("COMPACT") == "compact"
+        assert normalize_encoding("unknown") == "json"
+    
+    def test_compact_encoding_is_smaller(self, event):
+        """Компактная кодировка использует короткие ключи и меньше байт"""
+        compact = encode_frame(event, "compact")
+        plain = encode_frame(event, "json")
+        
+        decoded = json.loads(compact)
+        assert decoded["t"] == "nm"
+        assert decoded["c"] == 123
+        assert decoded["m"]["x"] == "Привет"
+        assert "mu" not in decoded["m"]
+        assert len(compact.encode()) < len(plain.encode()) * 0.7
+    
+    def test_msgpack_encoding(self, event):
+        """MessagePack кадры бинарные"""
+        msgpack = pytest.importorskip("msgpack")
+        frame = encode_frame(event, "msgpack")
+        
+        assert isinstance(frame, bytes)
+        assert msgpack.unpackb(frame)["t"] == "nm"
+    
+    @pytest.mark.asyncio
+    async def test_send_to_chat_mixed_encodings(self, create_user, db, event):
+        """Каждое соединение получает кадр в своей кодировке"""
+        connection_manager = ConnectionManager()
+        user1 = create_user()
+        user2 = create_user()
+        websocket1 = AsyncMock()
+        websocket2 = AsyncMock()
+        
+        await connection_manager.connect(websocket1, user1)
+        await connection_manager.connect(websocket2, user2, "compact")
+        connection_manager.join_chat(user1.id, 123)
+        connection_manager.join_chat(user2.id, 123)
+        websocket1.send_text.reset_mock()
+        websocket2.send_text.reset_mock()
+        
+        await connection_manager.send_to_chat(event, 123)
+        
+        assert json.loads(websocket1.send_text.call_args[0][0])["type"] == "new_message"
+        assert json.loads(websocket2.send_text.call_args[0][0])["t"] == "nm"
+        
+        connection_manager.disconnect(websocket2, user2.id)
+        assert websocket2 not in connection_manager.connection_encodings
+
+
 class TestWebSocketRouter:
     """Тесты для WebSocket роутера"""
     
@@ -330,4 +421,75 @@ class TestWebSocketRouter:
 
 
 # Интеграционные тесты с реальным WebSocket будут требовать более сложной настройки
-# и использования pytest-asyncio с реальными WebSocket соединениями 
\ No newline at end of file
+# и использования pytest-asyncio с реальными WebSocket соединениями 
+
+class TestPresence:
+    """Тесты реестра присутствия"""
+
+    def test_timer_wheel_expiry_and_reschedule(self):
+        wheel = TimerWheel(tick=1.0, slots=8, now=0)
+        wheel.schedule("a", 3.0)
+        wheel.schedule("b", 5.0)
+
+        assert wheel.advance(2.5) == []
+        # Перенос таймера отменяет старый срок
+        wheel.schedule("a", 6.0)
+        assert wheel.advance(5.0) == ["b"]
+        assert wheel.advance(7.0) == ["a"]
+        assert len(wheel) == 0
+
+    def test_heartbeat_ttl_expiry(self):
+        """Без кадров дольше ttl пользователь уходит в офлайн"""
+        registry = PresenceRegistry(ttl=10, now=0)
+        registry.heartbeat(1, now=0)
+        registry.heartbeat(1, now=8)
+
+        assert registry.expire(now=15) == []
+        assert registry.expire(now=19) == [1]
+        assert registry.status([1, 2]) == [
+            {"user_id": 1, "is_online": False, "last_seen": registry.last_seen[1]},
+            {"user_id": 2, "is_online": False, "last_seen": None},
+        ]
+
+    def test_reconnect_is_coalesced(self):
+        """Переподключение в пределах окна не порождает рассылки"""
+        registry = PresenceRegistry(ttl=10, now=0)
+        registry.heartbeat(1, now=0)
+        assert registry.flush() == {1: True}
+
+        registry.disconnect(1)
+        registry.heartbeat(1, now=1)
+        assert registry.flush() == {}
+
+        registry.disconnect(1)
+        assert registry.flush() == {1: False}
+
+    @pytest.mark.asyncio
+    async def test_broadcast_presence_once_per_recipient(self, client, db, create_user, create_chat):
+        """Собеседник с несколькими общими чатами получает одно событие"""
+        user1 = create_user()
+        user2 = create_user()
+        connection_manager = ConnectionManager()
+        websocket2 = AsyncMock()
+        connection_manager.active_connections[user2.id] = [websocket2]
+        for _ in range(2):
+            chat = create_chat(user1.id)
+            chat.members.extend([user1, user2])
+            db.commit()
+            connection_manager.join_chat(user2.id, chat.id)
+
+        await connection_manager.broadcast_presence({user1.id: False})
+
+        websocket2.send_text.assert_called_once()
+        sent_data = json.loads(websocket2.send_text.call_args[0][0])
+        assert sent_data == {"type": "user_status", "user_id": user1.id, "is_online": False}
+
+    def test_presence_endpoint(self, client, auth_headers):
+        user_id = client.get("/api/v1/me", headers=auth_headers).json()['id']
+        with patch.object(presence, 'online', {user_id}):
+            response = client.get("/api/v1/presence", params={"user_ids": f"{user_id},999999"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert [(item['user_id'], item['is_online']) for item in response.json()] == [(user_id, True), (999999, False)]
+
+        assert client.get("/api/v1/presence", params={"user_ids": "a,b"}, headers=auth_headers).status_code == 400